@@ -0,0 +1,159 @@
+"""Tarefas agendadas do sistema, executadas fora do Streamlit.
+
+Uso (a partir da raiz do projeto, onde está .streamlit/secrets.toml):
+    python agendador.py lembretes              # execução única (ex.: cron diário)
+    python agendador.py resumo-semanal         # snapshot + envio do resumo da semana anterior
+    python agendador.py lembretes --forcar     # reenvia, mesmo que o dia já tenha sido enviado
+    python agendador.py --loop                 # worker contínuo: roda as tarefas do dia após --hora
+"""
+import argparse
+import logging
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+from utils.db_queries import (
+    listar_acoes_para_lembrete, listar_usuarios, get_resumo_semanal, gerar_resumo_semanal
+)
+from utils.fila_email import get_fila_email
+from utils.notifications import (
+    notificar_lembretes_prazos_lote, notificar_resumo_semanal_lote, get_agrupador_status
+)
+
+log = logging.getLogger("agendador")
+
+DIAS_ANTECEDENCIA  = 3
+DIAS_ATRASO_MAXIMO = 30   # ações vencidas há mais tempo que isso saem do lembrete diário
+
+
+# ================================================================
+# LEMBRETES DE PRAZO
+# ================================================================
+def agrupar_lembretes(acoes: list, hoje: date) -> dict:
+    """`{responsavel_id: {"proximas": [...], "vencidas": [...]}}` no formato dos modelos de e-mail."""
+    grupos = {}
+    for a in acoes:
+        dias = (date.fromisoformat(str(a["prazo"])) - hoje).days
+        item = {
+            "descricao": a["descricao"],
+            "projeto":   (a.get("paradas") or {}).get("nome", ""),
+            "prazo":     a["prazo"],
+        }
+        g = grupos.setdefault(a["responsavel_id"], {"proximas": [], "vencidas": []})
+        if dias < 0:
+            g["vencidas"].append({**item, "dias_atraso": -dias})
+        else:
+            g["proximas"].append({**item, "dias_restantes": dias})
+    return grupos
+
+
+def _chave_fila(chave: str, forcar: bool) -> str:
+    """Chave de idempotência na fila; `forcar` usa uma nova, para os e-mails entrarem de novo."""
+    return f"{chave}:forcado:{uuid.uuid4().hex[:8]}" if forcar else chave
+
+
+def executar_lembretes(hoje: date = None, forcar: bool = False) -> int:
+    """Envia um e-mail por responsável com suas ações vencidas e vencendo; idempotente por dia.
+
+    Os lembretes entram na fila numa única transação; o dia só é registrado como executado
+    depois disso, então uma falha ao enfileirar é refeita na próxima execução. `forcar`
+    reenvia mesmo que o dia já tenha sido registrado.
+    """
+    hoje  = hoje or date.today()
+    fila  = get_fila_email()
+    chave = hoje.isoformat()
+    if not forcar and fila.ja_executado("lembretes", chave):
+        log.info("Lembretes de %s já enviados; nada a fazer.", chave)
+        return 0
+
+    acoes     = listar_acoes_para_lembrete(DIAS_ANTECEDENCIA, DIAS_ATRASO_MAXIMO)
+    usuarios  = {u["id"]: u for u in listar_usuarios()}
+    lembretes = []
+    for responsavel_id, g in agrupar_lembretes(acoes, hoje).items():
+        u = usuarios.get(responsavel_id)
+        if not u:
+            log.warning("Responsável %s sem perfil ativo; %s ação(ões) sem lembrete.",
+                        responsavel_id, len(g["proximas"]) + len(g["vencidas"]))
+            continue
+        lembretes.append({"email": u["email"], "nome": u["nome"], **g})
+    enviados = notificar_lembretes_prazos_lote(lembretes, chave=_chave_fila(f"lembrete:{chave}", forcar),
+                                              levantar_erros=True)
+    fila.registrar_execucao("lembretes", chave)
+    log.info("Lembretes de %s: %s ação(ões), %s e-mail(s) enfileirado(s).", chave, len(acoes), enviados)
+    return enviados
+
+
+# ================================================================
+# RESUMO SEMANAL
+# ================================================================
+def executar_resumo_semanal(hoje: date = None, forcar: bool = False) -> int:
+    """Materializa o resumo da semana anterior (uma vez) e o distribui a todos os PMO/admin.
+
+    `forcar` regera o snapshot e reenvia, mesmo que a semana já tenha sido registrada.
+    """
+    hoje   = hoje or date.today()
+    semana = hoje - timedelta(days=hoje.weekday() + 7)
+    fila   = get_fila_email()
+    chave  = semana.isoformat()
+    if not forcar and fila.ja_executado("resumo_semanal", chave):
+        log.info("Resumo da semana %s já enviado; nada a fazer.", chave)
+        return 0
+
+    snapshot = {} if forcar else get_resumo_semanal(semana)
+    dados    = snapshot.get("dados") or gerar_resumo_semanal(semana)
+    enviados = notificar_resumo_semanal_lote(
+        listar_usuarios(perfil=["pmo","admin"]), dados, semana, chave=_chave_fila(f"resumo_semanal:{chave}", forcar),
+        levantar_erros=True,
+    )
+    fila.registrar_execucao("resumo_semanal", chave)
+    log.info("Resumo da semana %s: %s e-mail(s) enfileirado(s).", chave, enviados)
+    return enviados
+
+
+TAREFAS = {
+    "lembretes":      executar_lembretes,
+    "resumo-semanal": executar_resumo_semanal,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tarefas agendadas — Lições Aprendidas")
+    parser.add_argument("tarefas", nargs="*", metavar="tarefa",
+                        help=f"tarefas a executar: {', '.join(TAREFAS)} (padrão: todas)")
+    parser.add_argument("--forcar", action="store_true", help="reenvia mesmo que a execução do dia/semana já esteja registrada")
+    parser.add_argument("--loop",   action="store_true", help="mantém o processo rodando")
+    parser.add_argument("--hora",   type=int, default=7, help="hora a partir da qual o --loop executa")
+    parser.add_argument("--intervalo", type=int, default=300, help="segundos entre verificações do --loop")
+    args = parser.parse_args()
+    desconhecidas = set(args.tarefas) - set(TAREFAS)
+    if desconhecidas:
+        parser.error(f"tarefa(s) desconhecida(s): {', '.join(sorted(desconhecidas))}")
+    args.tarefas = args.tarefas or list(TAREFAS)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    fila = get_fila_email()
+    get_agrupador_status()   # no --loop, o thread do agrupador descarrega as janelas vencidas
+    if not args.loop:
+        try:
+            for nome in args.tarefas:
+                TAREFAS[nome](forcar=args.forcar)
+            # resumos de status com janela vencida que ficaram para trás (app parado)
+            get_agrupador_status().descarregar()
+        finally:
+            # os workers terminam o lote que reservaram antes de o processo sair; o resto é drenado aqui
+            fila.parar(aguardar=True)
+            fila.drenar()
+        return
+
+    while True:
+        if datetime.now().hour >= args.hora:
+            for nome in args.tarefas:
+                try:
+                    TAREFAS[nome]()
+                except Exception:
+                    log.exception("Falha na tarefa %s", nome)
+        time.sleep(args.intervalo)
+
+
+if __name__ == "__main__":
+    main()
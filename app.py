@@ -1,6 +1,9 @@
+import httpx
 import streamlit as st
+from postgrest.exceptions import APIError
 from utils.auth import login, logout, is_autenticado, usuario_logado, get_perfil_atual
-from utils.db_queries import listar_paradas
+from utils.db_queries import listar_paradas, listar_rascunhos
+from utils.instrumentacao import instrumentar_pagina
 
 st.set_page_config(
     page_title="Contrex — Lições Aprendidas",
@@ -8,6 +11,7 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded",
 )
+instrumentar_pagina("inicio")
 
 STYLE = """
 <style>
@@ -56,11 +60,24 @@ def tela_login():
                 with st.spinner("Autenticando..."):
                     try:
                         login(email, senha)
+                        restaurar_rascunhos()
                         st.rerun()
                     except ValueError as e:
                         st.error(f"❌ {e}")
 
 
+def restaurar_rascunhos():
+    """Traz para a sessão, logo após o login, os rascunhos do Formulário do Setor salvos no servidor.
+
+    Se a leitura falhar, `rascunhos_restaurados` fica sem valor e o formulário busca o rascunho
+    da parada ao abrir; o aviso aparece na tela inicial (o login faz rerun logo em seguida).
+    """
+    try:
+        st.session_state["rascunhos_restaurados"] = listar_rascunhos(st.session_state["user_id"])
+    except (APIError, httpx.HTTPError) as e:
+        st.session_state["aviso_rascunhos"] = f"⚠️ Não foi possível restaurar os rascunhos salvos: {e}"
+
+
 def tela_home():
     usuario = usuario_logado()
     perfil  = get_perfil_atual()
@@ -100,6 +117,13 @@ def tela_home():
     </div>
     """, unsafe_allow_html=True)
 
+    aviso = st.session_state.pop("aviso_rascunhos", None)
+    if aviso:
+        st.warning(aviso)
+    restaurados = st.session_state.get("rascunhos_restaurados")
+    if restaurados and perfil in ("setor","pmo","admin"):
+        st.info(f"📂 Rascunho restaurado em {len(restaurados)} parada(s) — continue no Formulário do Setor.")
+
     st.markdown("### Acesso Rápido")
 
     modulos = []
@@ -0,0 +1,63 @@
+"""Benchmark da entrega SMTP: uma conexão em série vs. fan-out pelo pool de conexões.
+
+Envia o e-mail de avanço de fase para `--destinatarios` endereços a um SMTP local
+(`benchmarks.smtp_falso`) que demora `--atraso-ms` por mensagem, como um relay real, e
+compara `SMTPTransport.send_many` com `send_many_paralelo` em pools de tamanhos diferentes
+(opcionalmente com `--taxa` mensagens/segundo).
+
+Uso:  python -m benchmarks.bench_envio [--destinatarios 200] [--atraso-ms 20] [--pools 1 2 4 8] [--taxa 0]
+"""
+import argparse
+import time
+
+from benchmarks.smtp_falso import SMTPFalso
+from utils.email_templates import Modelo
+from utils.notifications import _MARCADOR_NOME, _base_template
+from utils.smtp_client import SMTPTransport, montar_mensagem
+
+REMETENTE = "contrex@benchmark.local"
+
+
+def gerar_mensagens(n: int) -> list:
+    modelo = Modelo(_base_template("🚀 Parada avançou de fase", "PG-001",
+                                   f"<p>Olá, <strong>{_MARCADOR_NOME}</strong>!</p>" + "<p>Texto</p>" * 20))
+    return [(f"u{i}@contrex.com.br",
+             montar_mensagem(REMETENTE, f"u{i}@contrex.com.br", "[Contrex] Fase", modelo.render(nome_destinatario=f"U{i}")))
+            for i in range(n)]
+
+
+def _medir(smtp: SMTPFalso, mensagens: list, pool: int, paralelo: bool, taxa: float) -> tuple:
+    transporte = SMTPTransport(smtp.host, smtp.porta, starttls=False, tamanho_pool=pool, taxa=taxa or None)
+    antes = smtp.mensagens
+    t0 = time.perf_counter()
+    if paralelo:
+        resultados = transporte.send_many_paralelo(REMETENTE, mensagens)
+    else:
+        resultados = transporte.send_many(REMETENTE, mensagens)
+    segundos = time.perf_counter() - t0
+    transporte.fechar()
+    assert smtp.mensagens - antes == len(mensagens)
+    return segundos, sum(r is None for r in resultados)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--destinatarios", type=int, default=200)
+    parser.add_argument("--atraso-ms",     type=float, default=20)
+    parser.add_argument("--pools",         type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--taxa",          type=float, default=0, help="mensagens/segundo (0 = sem limite)")
+    args = parser.parse_args()
+
+    mensagens = gerar_mensagens(args.destinatarios)
+    with SMTPFalso(atraso=args.atraso_ms / 1000) as smtp:
+        serie, ok = _medir(smtp, mensagens, 1, False, args.taxa)
+        print(f"{'variante':>22} | {'s':>7} | {'e-mails/s':>9} | {'ok':>5} | {'ganho':>6}")
+        print("-" * 62)
+        print(f"{'uma conexão (série)':>22} | {serie:>7.2f} | {len(mensagens) / serie:>9.1f} | {ok:>5} | {1:>5.1f}x")
+        for pool in args.pools:
+            s, ok = _medir(smtp, mensagens, pool, True, args.taxa)
+            print(f"{f'fan-out, pool {pool}':>22} | {s:>7.2f} | {len(mensagens) / s:>9.1f} | {ok:>5} | {serie / s:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
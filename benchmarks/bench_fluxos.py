@@ -0,0 +1,273 @@
+"""Benchmark dos fluxos de dados das páginas contra um Supabase e um SMTP locais.
+
+Executa as funções reais de `utils.db_queries` e `utils.notifications` (cliente `supabase` e
+`SMTPTransport` de verdade) contra `benchmarks.postgrest_falso` e `benchmarks.smtp_falso`, em
+bases sintéticas de tamanhos crescentes (`benchmarks.dados_sinteticos`). Para cada operação
+dos fluxos de listagem, classificação, publicação e Painel mede o melhor tempo (com o cache
+de leitura frio), as requisições ao PostgREST, os KB devolvidos, o tempo gasto dentro do
+stand-in, as mensagens SMTP e o pico de memória (tracemalloc, numa execução à parte).
+
+`--saida` grava os resultados em JSON; `--comparar` confronta com um JSON anterior e sai com
+código 1 se alguma operação ficou mais lenta que a tolerância ou passou a fazer mais
+requisições.
+
+Uso:  python -m benchmarks.bench_fluxos [--tamanhos 10 1000 100000] [--repeticoes 3]
+                                          [--latencia-ms 0] [--saida r.json] [--comparar base.json]
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from pathlib import Path
+
+from benchmarks.dados_sinteticos import gerar_base, maior_parada
+from benchmarks.smtp_falso import SMTPFalso
+from utils import cache, db_queries, notifications, supabase_client
+from utils.agrupador_status import AgrupadorStatus
+from utils.db_queries import (
+    listar_paradas, listar_usuarios, listar_ocorrencias_por_parada, listar_ocorrencias_priorizadas,
+    listar_acoes_por_parada, listar_acoes_pagina, painel_agregados, classificar_ocorrencias_em_lote,
+    reclassificar_contrato, atualizar_status_parada, atualizar_acao,
+)
+from utils.fila_email import FilaEmail
+from utils.gut_calculator import limites_do_contrato
+from utils.painel_dados import preparar_acoes, preparar_exibicao
+from utils.smtp_client import SMTPTransport, montar_mensagem
+
+REMETENTE = "contrex@benchmark.local"
+
+# mesma projeção de pages/4_Painel.py
+COLUNAS_PAINEL = (
+    "id, descricao, responsavel_nome, prazo, status, comentarios, data_conclusao, "
+    "ocorrencias(area_setor, ocorrencia, classificacao), paradas(nome)"
+)
+
+
+# ================================================================
+# AMBIENTE
+# ================================================================
+def montar_ambiente(base, smtp: SMTPFalso, diretorio: str) -> dict:
+    """Aponta `db_queries` e `notifications` para o stand-in e o SMTP local."""
+    cliente = base.cliente()
+    db_queries.get_supabase = supabase_client.get_supabase = lambda: cliente
+
+    transporte = SMTPTransport(smtp.host, smtp.porta, starttls=False, tamanho_pool=2)
+
+    def enviar(envios: list) -> list:
+        mensagens = [(to, montar_mensagem(REMETENTE, to, assunto, html)) for to, assunto, html in envios]
+        return transporte.send_many_paralelo(REMETENTE, mensagens)
+
+    fila      = FilaEmail(str(Path(diretorio) / "fila.sqlite3"), workers=0, enviar=enviar)
+    agrupador = AgrupadorStatus(str(Path(diretorio) / "fila.sqlite3"), janela=0, iniciar=False,
+                                enviar=notifications._enviar_status_consolidado)
+    notifications.get_fila_email        = lambda: fila
+    notifications.get_agrupador_status  = lambda: agrupador
+    return {"fila": fila, "agrupador": agrupador, "transporte": transporte}
+
+
+# ================================================================
+# FLUXOS
+# ================================================================
+def _listar_paradas(ctx):               listar_paradas()
+def _listar_usuarios(ctx):              listar_usuarios()
+def _ocorrencias_da_parada(ctx):        listar_ocorrencias_por_parada(ctx["parada"]["id"])
+def _ocorrencias_priorizadas(ctx):      listar_ocorrencias_priorizadas(ctx["parada"]["id"], limite=20, offset=0)
+def _acoes_da_parada(ctx):              listar_acoes_por_parada(ctx["parada"]["id"])
+
+
+def _classificar_parada(ctx):
+    """Carrega as ocorrências da parada e grava uma nova classificação para todas (pages/2)."""
+    rnd         = ctx["rnd"]
+    ocorrencias = listar_ocorrencias_por_parada(ctx["parada"]["id"])
+    valores     = {o["id"]: {"g": rnd.randint(1, 5), "u": rnd.randint(1, 5), "t": rnd.randint(1, 5)}
+                   for o in ocorrencias}
+    classificar_ocorrencias_em_lote(valores, ocorrencias, limites_do_contrato(ctx["parada"]))
+
+
+def _reclassificar_contrato(ctx):
+    limites = ((20, 60), (30, 80))[ctx["repeticao"] % 2]
+    reclassificar_contrato(ctx["parada"]["contrato_id"], limites)
+
+
+def _publicar(ctx):
+    """O botão "Publicar Plano de Ação" (pages/3): status, leituras e enfileiramento dos e-mails."""
+    parada    = ctx["parada"]
+    parada_id = parada["id"]
+    atualizar_status_parada(parada_id, "monitoramento")
+    usuarios_por_id = {u["id"]: u for u in listar_usuarios()}
+    acoes_por_occ   = listar_acoes_por_parada(parada_id)
+    notificados     = set()
+    avisos          = []
+    todas = sorted(listar_ocorrencias_por_parada(parada_id),
+                   key=lambda o: o.get("resultado_gut") or 0, reverse=True)
+    for occ in todas:
+        for acao in acoes_por_occ.get(occ["id"], []):
+            resp = usuarios_por_id.get(acao.get("responsavel_id"))
+            if resp and resp["email"] not in notificados:
+                avisos.append({
+                    "email": resp["email"], "nome": resp["nome"], "acao": acao["descricao"],
+                    "prazo": acao["prazo"], "projeto": parada["nome"],
+                    "ocorrencia": occ.get("ocorrencia", ""), "nivel_gut": occ.get("classificacao", "baixo"),
+                })
+                notificados.add(resp["email"])
+    notifications.notificar_responsaveis_acao_lote(avisos)
+    notifications.notificar_avanco_fase(
+        emails=[u["email"] for u in usuarios_por_id.values()], parada=parada["nome"],
+        fase_anterior="plano_acao", nova_fase="monitoramento", responsavel_acao="Benchmark",
+    )
+    atualizar_status_parada(parada_id, "plano_acao")
+
+
+def _entregar(ctx):
+    """Drena a fila pelo SMTP (o que os workers fazem em segundo plano)."""
+    ctx["ambiente"]["fila"].drenar()
+
+
+def _painel(ctx):
+    """Uma execução do Painel sem filtros além do período padrão (pages/4)."""
+    hoje    = date.today()
+    filtros = {"prazo_inicio": hoje - timedelta(days=180), "prazo_fim": hoje + timedelta(days=180)}
+    listar_paradas()
+    listar_usuarios()
+    painel_agregados(filtros)
+    pagina = listar_acoes_pagina(filtros, colunas=COLUNAS_PAINEL, limite=50)
+    preparar_exibicao(preparar_acoes(pagina["acoes"]))
+    listar_acoes_pagina(filtros, colunas=COLUNAS_PAINEL, busca=None, limite=50)
+
+
+def _painel_atualizar(ctx):
+    """Salvar uma atualização de status no Painel e descarregar o resumo consolidado."""
+    acao = ctx["acao"]
+    novo = "concluido" if acao["status"] != "concluido" else "em_andamento"
+    atualizar_acao(acao["id"], novo, "Atualizado pelo benchmark")
+    notifications.notificar_atualizacao_status_agrupado(
+        destinatarios=listar_usuarios(perfil=["pmo", "admin"]), acao_id=acao["id"],
+        responsavel_nome="Benchmark", acao=acao["descricao"], status_anterior=acao["status"],
+        novo_status=novo, comentario="", projeto=ctx["parada"]["nome"],
+    )
+    acao["status"] = novo
+    ctx["ambiente"]["agrupador"].descarregar(forcar=True)
+    ctx["ambiente"]["fila"].drenar()
+
+
+FLUXOS = [
+    ("listagem",     "paradas",                  _listar_paradas),
+    ("listagem",     "usuários",                 _listar_usuarios),
+    ("listagem",     "ocorrências da parada",    _ocorrencias_da_parada),
+    ("listagem",     "ocorrências priorizadas",  _ocorrencias_priorizadas),
+    ("listagem",     "ações da parada",          _acoes_da_parada),
+    ("classificação", "classificar parada",      _classificar_parada),
+    ("classificação", "reclassificar contrato",  _reclassificar_contrato),
+    ("publicação",   "publicar e enfileirar",    _publicar),
+    ("publicação",   "entregar (SMTP)",          _entregar),
+    ("painel",       "carregar",                 _painel),
+    ("painel",       "atualizar status",         _painel_atualizar),
+]
+
+
+# ================================================================
+# MEDIÇÃO
+# ================================================================
+def _executar(func, ctx, base, smtp) -> dict:
+    cache.limpar()
+    base.zerar_contadores()
+    smtp_antes = smtp.mensagens
+    t0 = time.perf_counter()
+    func(ctx)
+    return {
+        "ms":          (time.perf_counter() - t0) * 1000,
+        "requisicoes": base.requisicoes,
+        "kb":          base.bytes_enviados / 1024,
+        "ms_servidor": base.segundos * 1000,
+        "smtp":        smtp.mensagens - smtp_antes,
+    }
+
+
+def medir_tamanho(n: int, repeticoes: int, latencia: float, smtp: SMTPFalso) -> list:
+    base = gerar_base(n, latencia=latencia)
+    with tempfile.TemporaryDirectory() as diretorio:
+        ctx = {
+            "rnd":      random.Random(7),
+            "parada":   maior_parada(base),
+            "ambiente": montar_ambiente(base, smtp, diretorio),
+        }
+        ctx["acao"] = dict(next(a for a in base.tabelas["acoes"] if a["parada_id"] == ctx["parada"]["id"]))
+        print(f"\nn={n:,}: {len(base.tabelas['paradas']):,} paradas, {len(base.tabelas['acoes']):,} ações; "
+              f"maior parada com {ctx['parada']['ocorrencias']:,} ocorrências")
+
+        melhores = {}
+        for repeticao in range(repeticoes):
+            ctx["repeticao"] = repeticao
+            for fluxo, operacao, func in FLUXOS:
+                r = _executar(func, ctx, base, smtp)
+                atual = melhores.get((fluxo, operacao))
+                if atual is None or r["ms"] < atual["ms"]:
+                    melhores[(fluxo, operacao)] = r
+
+        ctx["repeticao"] = repeticoes
+        for fluxo, operacao, func in FLUXOS:
+            tracemalloc.start()
+            _executar(func, ctx, base, smtp)
+            melhores[(fluxo, operacao)]["pico_mb"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            tracemalloc.stop()
+        ctx["ambiente"]["transporte"].fechar()
+
+    return [{"n": n, "fluxo": f, "operacao": o, **r} for (f, o), r in melhores.items()]
+
+
+def imprimir(resultados: list):
+    print(f"{'fluxo':>13} | {'operação':<24} | {'ms':>9} | {'req':>4} | {'KB':>9} | "
+          f"{'ms servidor':>11} | {'smtp':>5} | {'pico MB':>8}")
+    print("-" * 102)
+    for r in resultados:
+        print(f"{r['fluxo']:>13} | {r['operacao']:<24} | {r['ms']:>9.1f} | {r['requisicoes']:>4} | "
+              f"{r['kb']:>9.1f} | {r['ms_servidor']:>11.1f} | {r['smtp']:>5} | {r['pico_mb']:>8.1f}")
+
+
+def comparar(resultados: list, arquivo: str, tolerancia: float) -> bool:
+    """Imprime a variação em relação a `arquivo`; retorna False se houve regressão."""
+    anteriores = {(r["n"], r["fluxo"], r["operacao"]): r for r in json.loads(Path(arquivo).read_text("utf-8"))}
+    ok = True
+    print(f"\nComparação com {arquivo} (tolerância de tempo: {tolerancia:.0%})")
+    for r in resultados:
+        a = anteriores.get((r["n"], r["fluxo"], r["operacao"]))
+        if a is None:
+            continue
+        variacao = r["ms"] / a["ms"] - 1 if a["ms"] else 0.0
+        regrediu = variacao > tolerancia or r["requisicoes"] > a["requisicoes"]
+        ok      &= not regrediu
+        print(f"{'REGRESSÃO' if regrediu else 'ok':>9}  n={r['n']:<7} {r['fluxo']:>13} | {r['operacao']:<24} "
+              f"{a['ms']:>9.1f} → {r['ms']:>9.1f} ms ({variacao:+.0%}); req {a['requisicoes']} → {r['requisicoes']}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanhos",    type=int, nargs="+", default=[10, 1_000, 100_000])
+    parser.add_argument("--repeticoes",  type=int, default=3)
+    parser.add_argument("--latencia-ms", type=float, default=0.0,
+                        help="latência simulada por requisição ao PostgREST")
+    parser.add_argument("--saida")
+    parser.add_argument("--comparar")
+    parser.add_argument("--tolerancia",  type=float, default=0.2)
+    args = parser.parse_args()
+
+    resultados = []
+    with SMTPFalso() as smtp:
+        for n in args.tamanhos:
+            parcial = medir_tamanho(n, args.repeticoes, args.latencia_ms / 1000, smtp)
+            imprimir(parcial)
+            resultados.extend(parcial)
+
+    if args.saida:
+        Path(args.saida).write_text(json.dumps(resultados, indent=2, ensure_ascii=False), "utf-8")
+    if args.comparar and not comparar(resultados, args.comparar, args.tolerancia):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Micro-benchmark da pontuação GUT em massa.
+
+Compara `calcular_gut` linha a linha (como as análises faziam) com `classificar_dataframe`,
+uma passada vetorizada sobre o DataFrame — inclusive com limites diferentes por contrato.
+
+Uso:  python -m benchmarks.bench_gut [--tamanhos 10000 100000] [--repeticoes 3]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.gut_calculator import calcular_gut, classificar_dataframe
+
+
+def gerar_ocorrencias(n: int, semente: int = 42) -> pd.DataFrame:
+    rnd = np.random.default_rng(semente)
+    return pd.DataFrame({
+        "gravidade":        rnd.integers(1, 6, n),
+        "urgencia":         rnd.integers(1, 6, n),
+        "tendencia":        rnd.integers(1, 6, n),
+        "gut_limite_baixo": rnd.choice([20, 25, 30], n),
+        "gut_limite_medio": rnd.choice([64, 74, 80], n),
+    })
+
+
+def _por_linha(df: pd.DataFrame) -> list:
+    return [calcular_gut(g, u, t, (b, m))["nivel"]
+            for g, u, t, b, m in df.itertuples(index=False)]
+
+
+def _vetorizado(df: pd.DataFrame) -> pd.Series:
+    return classificar_dataframe(df)["classificacao"]
+
+
+def _medir(func, df: pd.DataFrame, repeticoes: int) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        func(df)
+        melhor = min(melhor, time.perf_counter() - t0)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanhos",   type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'linhas':>8} | {'por linha (s)':>13} | {'vetorizado (s)':>14} | {'ganho':>7}")
+    print("-" * 52)
+    for n in args.tamanhos:
+        df = gerar_ocorrencias(n)
+        assert _por_linha(df.head(1000)) == _vetorizado(df.head(1000)).tolist()
+        t_lin = _medir(_por_linha, df, args.repeticoes)
+        t_vet = _medir(_vetorizado, df, args.repeticoes)
+        print(f"{n:>8} | {t_lin:>13.3f} | {t_vet:>14.4f} | {t_lin / t_vet:>6.0f}x")
+
+
+if __name__ == "__main__":
+    main()
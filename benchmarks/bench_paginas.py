@@ -0,0 +1,163 @@
+"""Benchmark de renderização das páginas com `streamlit.testing.v1.AppTest`, com orçamento de tempo.
+
+Cada página roda inteira, sem navegador, com `get_supabase` apontando para o stand-in em
+memória (`benchmarks.postgrest_falso`) carregado com a base sintética de cada tamanho, e com a
+fila de e-mails em um SQLite temporário. Mede a primeira execução (cache de leitura frio) e um
+rerun (o que acontece a cada interação com um widget), descontando o tempo gasto dentro do
+stand-in, que não existe em produção.
+
+Sai com código 1 se alguma página passar do orçamento (`ORCAMENTOS`, multiplicado por
+`--fator` em máquinas mais lentas) ou levantar exceção.
+
+Uso:  python -m benchmarks.bench_paginas [--tamanhos 10 1000 100000] [--paginas 4_Painel ...]
+                                           [--repeticoes 3] [--fator 1.0]
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.dados_sinteticos import gerar_base, maior_parada
+from utils import cache, db_async, db_queries, fila_email, supabase_client
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+# página -> status que a maior parada precisa ter para ser a selecionada por padrão
+PAGINAS = {
+    "app":                 None,
+    "1_Formulario_Setor":  "coleta",
+    "2_Classificacao_PMO": "classificacao",
+    "3_Plano_de_Acao":     "plano_acao",
+    "4_Painel":            None,
+    "5_Administracao":     None,
+}
+
+# orçamento em ms (primeira execução, rerun) por página e tamanho da base; tamanhos fora da
+# tabela usam o do maior tamanho até ele
+ORCAMENTOS = {
+    "app":                 {10: (500, 100),   1_000: (500, 100),   100_000: (500, 100)},
+    "1_Formulario_Setor":  {10: (500, 150),   1_000: (500, 150),   100_000: (500, 150)},
+    "2_Classificacao_PMO": {10: (500, 200),   1_000: (600, 200),   100_000: (1500, 300)},
+    "3_Plano_de_Acao":     {10: (500, 250),   1_000: (700, 300),   100_000: (1500, 400)},
+    "4_Painel":            {10: (1200, 500),  1_000: (1200, 500),  100_000: (1500, 600)},
+    "5_Administracao":     {10: (600, 300),   1_000: (1400, 1000), 100_000: (1800, 1200)},
+}
+
+
+def orcamento(pagina: str, n: int) -> tuple:
+    tabela = ORCAMENTOS[pagina]
+    return tabela[max([t for t in tabela if t <= n], default=min(tabela))]
+
+
+# ================================================================
+# AMBIENTE
+# ================================================================
+def montar_ambiente(base, diretorio: str):
+    """Aponta o cliente Supabase e a fila de e-mails das páginas para o stand-in e um SQLite temporário."""
+    cliente = base.cliente()
+    supabase_client.get_supabase       = lambda: cliente
+    supabase_client.get_supabase_admin = lambda: cliente
+    db_queries.get_supabase            = lambda: cliente
+    cliente_async = asyncio.run_coroutine_threadsafe(base.cliente_async(), db_async._laco()).result()
+    db_async.get_supabase              = lambda: cliente_async
+    fila = fila_email.FilaEmail(str(Path(diretorio) / "fila.sqlite3"), workers=0)
+    fila_email.get_fila_email = lambda: fila
+
+
+def preparar_parada(base, status: str):
+    """Deixa a maior parada com `status` e como a mais recente (a primeira do selectbox)."""
+    parada = base.indice("paradas")[maior_parada(base)["id"]]
+    if status:
+        parada["status"] = status
+    parada["criado_em"] = datetime.now(timezone.utc).isoformat()
+
+
+def _app_test(pagina: str, usuario: dict) -> AppTest:
+    arquivo = RAIZ / ("app.py" if pagina == "app" else f"pages/{pagina}.py")
+    at = AppTest.from_file(str(arquivo), default_timeout=300)
+    for chave, valor in {
+        "autenticado": True,
+        "user_id":     usuario["id"],
+        "user_email":  usuario["email"],
+        "user_nome":   usuario["nome"],
+        "user_perfil": "admin",
+        "user_setor":  usuario["setor"],
+        "user_ativo":  True,
+    }.items():
+        at.session_state[chave] = valor
+    return at
+
+
+def _rodar(at: AppTest, base) -> float:
+    """Executa o script; retorna os ms fora do stand-in."""
+    base.zerar_contadores()
+    t0 = time.perf_counter()
+    at.run()
+    total = time.perf_counter() - t0
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return (total - base.segundos) * 1000
+
+
+def medir_pagina(pagina: str, base, usuario: dict, repeticoes: int) -> dict:
+    preparar_parada(base, PAGINAS[pagina])
+    primeira, rerun, requisicoes = float("inf"), float("inf"), 0
+    for _ in range(repeticoes):
+        cache.limpar()
+        at          = _app_test(pagina, usuario)
+        primeira    = min(primeira, _rodar(at, base))
+        requisicoes = base.requisicoes
+        rerun       = min(rerun, _rodar(at, base))
+    return {"primeira": primeira, "rerun": rerun, "requisicoes": requisicoes, "req_rerun": base.requisicoes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanhos",   type=int, nargs="+", default=[10, 1_000, 100_000])
+    parser.add_argument("--paginas",    nargs="+", default=list(PAGINAS), choices=list(PAGINAS))
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--fator",      type=float, default=1.0, help="multiplica os orçamentos")
+    args = parser.parse_args()
+
+    estouros = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        for n in args.tamanhos:
+            base = gerar_base(n)
+            montar_ambiente(base, diretorio)
+            usuario = next(u for u in base.tabelas["perfis_usuarios"] if u["perfil"] == "admin")
+            print(f"\nn={n:,}: maior parada com {maior_parada(base)['ocorrencias']:,} ocorrências")
+            print(f"{'página':>20} | {'1ª exec (ms)':>12} | {'orçamento':>9} | {'rerun (ms)':>10} | "
+                  f"{'orçamento':>9} | {'req':>4} | {'req rerun':>9}")
+            print("-" * 95)
+            for pagina in args.paginas:
+                lim_primeira, lim_rerun = (v * args.fator for v in orcamento(pagina, n))
+                try:
+                    r = medir_pagina(pagina, base, usuario, args.repeticoes)
+                except Exception as e:
+                    print(f"{pagina:>20} | ERRO: {e}")
+                    estouros.append(f"{pagina} (n={n}): {e}")
+                    continue
+                marca = lambda v, lim: f"{v:>10.0f}{' !' if v > lim else '  '}"
+                print(f"{pagina:>20} | {marca(r['primeira'], lim_primeira):>12} | {lim_primeira:>9.0f} | "
+                      f"{marca(r['rerun'], lim_rerun):>10} | {lim_rerun:>9.0f} | {r['requisicoes']:>4} | "
+                      f"{r['req_rerun']:>9}")
+                if r["primeira"] > lim_primeira:
+                    estouros.append(f"{pagina} (n={n}): 1ª execução {r['primeira']:.0f} ms > {lim_primeira:.0f} ms")
+                if r["rerun"] > lim_rerun:
+                    estouros.append(f"{pagina} (n={n}): rerun {r['rerun']:.0f} ms > {lim_rerun:.0f} ms")
+
+    if estouros:
+        print("\nFora do orçamento:")
+        for e in estouros:
+            print(f"  - {e}")
+        sys.exit(1)
+    print("\nTodas as páginas dentro do orçamento.")
+
+
+if __name__ == "__main__":
+    main()
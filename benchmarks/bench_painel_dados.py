@@ -0,0 +1,114 @@
+"""Micro-benchmark da preparação de dados do Painel.
+
+Compara a montagem antiga (loop em Python + `.apply` por linha + Styler linha a linha) com
+`utils.painel_dados` (json_normalize + aritmética datetime64 + máscaras vetorizadas).
+
+Uso:  python -m benchmarks.bench_painel_dados [--tamanhos 10000 100000] [--repeticoes 3]
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+from utils.painel_dados import preparar_acoes, preparar_exibicao, estilos_linhas, GUT_BADGE, STATUS_LABEL
+
+COLUNAS_TABELA = ["Projeto","Área/Setor","Ocorrência","GUT","Ação","Responsável",
+                  "Prazo","Dias Restantes","Status_label","vencida","vence_em_breve"]
+
+
+def gerar_acoes(n: int, semente: int = 42) -> list:
+    rnd  = random.Random(semente)
+    hoje = date.today()
+    acoes = []
+    for i in range(n):
+        status = rnd.choice(["pendente","em_andamento","concluido","cancelado"])
+        acoes.append({
+            "id":               f"acao-{i}",
+            "descricao":        f"Ação corretiva {i} " + "x" * rnd.randint(10, 80),
+            "responsavel_nome": f"Responsável {rnd.randint(1, 200)}",
+            "prazo":            str(hoje + timedelta(days=rnd.randint(-90, 180))),
+            "status":           status,
+            "comentarios":      None if rnd.random() < 0.7 else "Comentário",
+            "data_conclusao":   str(hoje - timedelta(days=rnd.randint(0, 60))) if status == "concluido" else None,
+            "ocorrencias":      None if rnd.random() < 0.02 else {
+                "area_setor":    f"Setor {rnd.randint(1, 30)}",
+                "ocorrencia":    "Ocorrência " + "y" * rnd.randint(20, 200),
+                "classificacao": rnd.choice(["alto","medio","baixo", None]),
+            },
+            "paradas":          {"nome": f"PG-{rnd.randint(1, 50)}"},
+        })
+    return acoes
+
+
+def _legado(acoes: list):
+    """Reprodução da montagem original de pages/4_Painel.py, para comparação."""
+    rows = []
+    for a in acoes:
+        occ  = a.get("ocorrencias") or {}
+        para = a.get("paradas")     or {}
+        rows.append({
+            "id":             a["id"],
+            "Projeto":        para.get("nome",""),
+            "Área/Setor":     occ.get("area_setor",""),
+            "Ocorrência":     (occ.get("ocorrencia") or "")[:60],
+            "GUT_nivel":      occ.get("classificacao",""),
+            "Ação":           a["descricao"],
+            "Responsável":    a["responsavel_nome"],
+            "Prazo":          a["prazo"],
+            "Status":         a["status"],
+            "Comentários":    a.get("comentarios",""),
+            "Data Conclusão": a.get("data_conclusao",""),
+        })
+    df = pd.DataFrame(rows)
+    df["Prazo"]          = pd.to_datetime(df["Prazo"]).dt.date
+    df["dias_restantes"] = df["Prazo"].apply(lambda p: (p - date.today()).days)
+    df["vencida"]        = (df["dias_restantes"] < 0)  & (df["Status"].isin(["pendente","em_andamento"]))
+    df["vence_em_breve"] = (df["dias_restantes"] >= 0) & (df["dias_restantes"] <= 3) & (df["Status"].isin(["pendente","em_andamento"]))
+    df["GUT"]            = df["GUT_nivel"].map(GUT_BADGE).fillna("—")
+    df["Dias Restantes"] = df["dias_restantes"].apply(lambda d: f"{'⚠️ ' if d<0 else ''}{d}d")
+    df["Status_label"]   = df["Status"].map(STATUS_LABEL).fillna(df["Status"])
+
+    def highlight_row(row):
+        if row["vencida"]:          return ["background-color:#FFEAEA"] * len(row)
+        elif row["vence_em_breve"]: return ["background-color:#FFF8E1"] * len(row)
+        return [""] * len(row)
+
+    df[COLUNAS_TABELA].style.apply(highlight_row, axis=1)._compute()
+    return df
+
+
+def _vetorizado(acoes: list):
+    df = preparar_exibicao(preparar_acoes(acoes))
+    df[COLUNAS_TABELA].style.apply(estilos_linhas, axis=None)._compute()
+    return df
+
+
+def _medir(func, acoes: list, repeticoes: int) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        func(acoes)
+        melhor = min(melhor, time.perf_counter() - t0)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanhos",   type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'linhas':>8} | {'legado (s)':>10} | {'µs/linha':>8} | {'vetorizado (s)':>14} | {'µs/linha':>8} | {'ganho':>6}")
+    print("-" * 72)
+    for n in args.tamanhos:
+        acoes = gerar_acoes(n)
+        t_leg = _medir(_legado, acoes, args.repeticoes)
+        t_vet = _medir(_vetorizado, acoes, args.repeticoes)
+        print(f"{n:>8} | {t_leg:>10.3f} | {t_leg / n * 1e6:>8.2f} | {t_vet:>14.3f} | "
+              f"{t_vet / n * 1e6:>8.2f} | {t_leg / t_vet:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
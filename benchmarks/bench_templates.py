@@ -0,0 +1,78 @@
+"""Micro-benchmark da renderização de e-mails em massa.
+
+Compara montar o HTML completo por destinatário (como era antes de `utils.email_templates`)
+com renderizar uma vez com `{{nome_destinatario}}` e só substituir o nome de cada um. As
+duas variantes incluem a geração da parte `text/plain` de cada mensagem.
+
+Uso:  python -m benchmarks.bench_templates [--destinatarios 10000] [--repeticoes 3]
+"""
+import argparse
+import time
+
+from utils.email_templates import Modelo, html_para_texto
+from utils.notifications import _html_resumo_semanal, _MARCADOR_NOME
+
+DADOS = {
+    "total_acoes":       412,
+    "pendentes":         118,
+    "em_andamento":      64,
+    "concluidas_semana": 37,
+    "vencidas":          9,
+    "acoes_vencidas": [
+        {"descricao": f"Ação corretiva vencida número {i} " + "x" * 40, "projeto": f"PG-{i}", "dias_atraso": i + 1}
+        for i in range(9)
+    ],
+    "paradas_ativas": [f"PG-{i}" for i in range(6)],
+}
+
+
+def gerar_destinatarios(n: int) -> list:
+    return [{"email": f"pmo{i}@contrex.com.br", "nome": f"PMO {i}"} for i in range(n)]
+
+
+def _por_destinatario(destinatarios: list) -> list:
+    return [(u["email"], _html_resumo_semanal(u["nome"], DADOS)) for u in destinatarios]
+
+
+def _pre_compilado(destinatarios: list) -> list:
+    modelo = Modelo(_html_resumo_semanal(_MARCADOR_NOME, DADOS))
+    return [(u["email"], modelo.render(nome_destinatario=u["nome"])) for u in destinatarios]
+
+
+def _com_texto(func):
+    """Acrescenta a geração da parte `text/plain`, feita por mensagem em `montar_mensagem`."""
+    def medir(destinatarios: list) -> list:
+        return [(email, html, html_para_texto(html)) for email, html in func(destinatarios)]
+    return medir
+
+
+def _medir(func, destinatarios: list, repeticoes: int) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        func(destinatarios)
+        melhor = min(melhor, time.perf_counter() - t0)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--destinatarios", type=int, default=10_000)
+    parser.add_argument("--repeticoes",    type=int, default=3)
+    args = parser.parse_args()
+
+    destinatarios = gerar_destinatarios(args.destinatarios)
+    assert _por_destinatario(destinatarios[:3]) == _pre_compilado(destinatarios[:3])
+
+    n = len(destinatarios)
+    print(f"{'variante':>16} | {'só HTML (s)':>11} | {'µs/e-mail':>9} | {'HTML+texto (s)':>14} | {'µs/e-mail':>9}")
+    print("-" * 72)
+    for nome, func in [("por destinatário", _por_destinatario), ("pré-compilado", _pre_compilado)]:
+        t_html  = _medir(func, destinatarios, args.repeticoes)
+        t_texto = _medir(_com_texto(func), destinatarios, args.repeticoes)
+        print(f"{nome:>16} | {t_html:>11.3f} | {t_html / n * 1e6:>9.2f} | "
+              f"{t_texto:>14.3f} | {t_texto / n * 1e6:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
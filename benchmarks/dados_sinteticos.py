@@ -0,0 +1,97 @@
+"""Base sintética (contratos, paradas, usuários, ocorrências e ações) para os benchmarks.
+
+`gerar_base(n)` cria `n` ocorrências e `n` ações (uma por ocorrência), `max(1, n // 100)`
+paradas e até 200 usuários. As ocorrências se concentram nas primeiras paradas (a primeira
+fica com ~10% delas em `n=100_000`), então os fluxos "por parada" crescem com `n` em vez de
+ficarem em ~100 linhas.
+"""
+import random
+import uuid
+from datetime import date, timedelta
+
+from benchmarks.postgrest_falso import PostgrestFalso
+from utils.importacao import FASES
+
+STATUS_ACAO = ["pendente", "em_andamento", "concluido", "cancelado"]
+
+
+def _id(rnd: random.Random) -> str:
+    return str(uuid.UUID(int=rnd.getrandbits(128), version=4))
+
+
+def gerar_base(n: int, semente: int = 42, latencia: float = 0.0) -> PostgrestFalso:
+    rnd  = random.Random(semente)
+    hoje = date.today()
+    base = PostgrestFalso(latencia=latencia)
+
+    contratos = base.inserir("contratos", [
+        {"id": _id(rnd), "codigo": f"CON-{i:03d}", "nome": f"Contrato {i}", "responsavel": f"Gerente {i}",
+         "gut_limite_baixo": rnd.choice([20, 25, 30]), "gut_limite_medio": rnd.choice([64, 74, 80])}
+        for i in range(max(1, n // 1000))
+    ])
+    paradas = base.inserir("paradas", [
+        {"id": _id(rnd), "contrato_id": rnd.choice(contratos)["id"], "nome": f"PG-{i:05d}",
+         "responsavel": f"Coordenador {i % 50}", "data_inicio": str(hoje - timedelta(days=60)),
+         "data_fim": str(hoje + timedelta(days=30)), "status": "plano_acao"}
+        for i in range(max(1, n // 100))
+    ])
+    usuarios = base.inserir("perfis_usuarios", [
+        {"id": _id(rnd), "nome": f"Usuário {i:03d}", "email": f"usuario{i}@contrex.com.br",
+         "perfil": "pmo" if i < 5 else "admin" if i < 7 else "setor", "setor": f"Setor {i % 30}", "ativo": True}
+        for i in range(min(200, max(10, n)))
+    ])
+
+    ocorrencias = []
+    for i in range(n):
+        parada     = paradas[int(len(paradas) * rnd.random() ** 3)]
+        classifica = rnd.random() < 0.8
+        ocorrencias.append({
+            "id":              _id(rnd),
+            "parada_id":       parada["id"],
+            "area_setor":      f"Setor {rnd.randint(1, 30)}",
+            "fase":            rnd.choice(FASES),
+            "ocorrencia":      "Ocorrência " + "y" * rnd.randint(20, 200),
+            "impacto":         "Impacto " + "z" * rnd.randint(10, 80),
+            "licao_aprendida": "Lição " + "w" * rnd.randint(10, 80),
+            "enviado_por":     rnd.choice(usuarios)["id"],
+            "gravidade":       rnd.randint(1, 5) if classifica else None,
+            "urgencia":        rnd.randint(1, 5) if classifica else None,
+            "tendencia":       rnd.randint(1, 5) if classifica else None,
+            "classificacao":   None,
+        })
+    for o in ocorrencias:
+        if o["gravidade"] is not None:
+            r = o["gravidade"] * o["urgencia"] * o["tendencia"]
+            o["classificacao"] = "alto" if r > 74 else "medio" if r > 25 else "baixo"
+    ocorrencias = base.inserir("ocorrencias", ocorrencias)
+
+    acoes = []
+    for i, o in enumerate(ocorrencias):
+        resp   = rnd.choice(usuarios)
+        status = rnd.choice(STATUS_ACAO)
+        acoes.append({
+            "id":                 _id(rnd),
+            "ocorrencia_id":      o["id"],
+            "parada_id":          o["parada_id"],
+            "descricao":          f"Ação corretiva {i} " + "x" * rnd.randint(10, 80),
+            "prazo":              str(hoje + timedelta(days=rnd.randint(-90, 180))),
+            "responsavel_id":     resp["id"],
+            "responsavel_nome":   resp["nome"],
+            "status":             status,
+            "comentarios":        None if rnd.random() < 0.7 else "Comentário",
+            "data_conclusao":     str(hoje - timedelta(days=rnd.randint(0, 60))) if status == "concluido" else None,
+            "chave_idempotencia": f"sintetica:{i}",
+        })
+    base.inserir("acoes", acoes)
+    base.tabelas.setdefault("rascunhos", [])
+    base.tabelas.setdefault("resumos_semanais", [])
+    return base
+
+
+def maior_parada(base: PostgrestFalso) -> dict:
+    """A parada com mais ocorrências (alvo dos fluxos por parada)."""
+    contagem = {}
+    for o in base.tabelas["ocorrencias"]:
+        contagem[o["parada_id"]] = contagem.get(o["parada_id"], 0) + 1
+    parada_id = max(contagem, key=contagem.get)
+    return {**base.indice("paradas")[parada_id], "ocorrencias": contagem[parada_id]}
@@ -0,0 +1,420 @@
+"""Stand-in em memória do PostgREST do Supabase, para benchmarks sem rede.
+
+Responde, pelo cliente `supabase` real (via `httpx.MockTransport`), ao subconjunto da API que
+`utils.db_queries` usa: select com recursos embutidos (`tabela(cols)` / `tabela!inner(cols)`),
+filtros `eq/neq/gt/gte/lt/lte/in/is/like/ilike`, `not.`, `or=(...)` (com `and(...)` aninhado),
+filtros sobre o recurso embutido, `order` com `nullsfirst/nullslast`, `limit/offset`,
+`count=exact`, `.single()`, insert/upsert (`on_conflict` + `resolution`), update, delete e as
+RPCs `classificar_ocorrencias_lote` e `painel_agregados`. Conta as requisições, os bytes e o
+tempo gasto aqui dentro, para separar o custo do "servidor" do custo do cliente.
+"""
+import asyncio
+import json
+import re
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+import httpx
+from supabase import AsyncClient, AsyncClientOptions, Client, ClientOptions, acreate_client, create_client
+
+URL = "http://supabase.falso"
+KEY = "chave-falsa-" + "x" * 40
+
+# recurso embutido -> coluna de chave estrangeira na tabela que embute
+CHAVES_ESTRANGEIRAS = {"contratos": "contrato_id", "paradas": "parada_id", "ocorrencias": "ocorrencia_id"}
+
+
+def _resultado_gut(linha: dict):
+    g, u, t = linha.get("gravidade"), linha.get("urgencia"), linha.get("tendencia")
+    return g * u * t if None not in (g, u, t) else None
+
+
+# colunas geradas pelo banco (ver supabase/migrations)
+GERADAS = {"ocorrencias": {"resultado_gut": _resultado_gut}}
+
+
+class ErroPostgrest(Exception):
+    def __init__(self, status: int, codigo: str, mensagem: str):
+        super().__init__(mensagem)
+        self.status, self.codigo = status, codigo
+
+
+# ================================================================
+# PARSE DE SELECT E FILTROS
+# ================================================================
+def _dividir(texto: str) -> list:
+    """Divide por vírgulas de nível zero (fora de parênteses)."""
+    partes, nivel, atual = [], 0, ""
+    for c in texto:
+        if c == "," and nivel == 0:
+            partes.append(atual)
+            atual = ""
+            continue
+        nivel += (c == "(") - (c == ")")
+        atual += c
+    if atual:
+        partes.append(atual)
+    return partes
+
+
+def _parse_select(texto: str) -> tuple:
+    """`"*,contratos(codigo,nome),paradas!inner(nome)"` -> (colunas, {embutido: (inner, sub_select)})."""
+    colunas, embutidos = [], {}
+    for item in _dividir(texto or "*"):
+        if "(" in item:
+            nome, resto = item.split("(", 1)
+            inner = nome.endswith("!inner")
+            embutidos[nome.split("!")[0]] = (inner, _parse_select(resto[:-1]))
+        else:
+            colunas.append(item)
+    return colunas, embutidos
+
+
+def _converter(valor: str, referencia):
+    if referencia is None or isinstance(referencia, str):
+        return valor
+    if isinstance(referencia, bool):
+        return valor == "true"
+    if isinstance(referencia, int):
+        return int(valor)
+    if isinstance(referencia, float):
+        return float(valor)
+    return valor
+
+
+def _like(padrao: str, valor, sem_caixa: bool) -> bool:
+    if valor is None:
+        return False
+    regex, i = "", 0
+    while i < len(padrao):
+        c = padrao[i]
+        if c == "\\" and i + 1 < len(padrao):
+            regex += re.escape(padrao[i + 1])
+            i += 1
+        elif c in "%*":
+            regex += ".*"
+        elif c == "_":
+            regex += "."
+        else:
+            regex += re.escape(c)
+        i += 1
+    return re.fullmatch(regex, str(valor), re.S | (re.I if sem_caixa else 0)) is not None
+
+
+def _compilar_condicao(coluna: str, expressao: str):
+    """`("status", "in.(a,b)")` -> predicado sobre a linha."""
+    negar = expressao.startswith("not.")
+    if negar:
+        expressao = expressao[4:]
+    op, _, valor = expressao.partition(".")
+    if op == "in":
+        valores = [v.strip('"') for v in _dividir(valor[1:-1])]
+        pred = lambda v, _vs=valores: v is not None and (str(v).lower() if isinstance(v, bool) else str(v)) in _vs
+    elif op == "is":
+        alvo = {"null": None, "true": True, "false": False}[valor]
+        pred = lambda v: v is alvo
+    elif op in ("like", "ilike"):
+        pred = lambda v: _like(valor, v, op == "ilike")
+    else:
+        comparar = {
+            "eq":  lambda a, b: a == b, "neq": lambda a, b: a != b,
+            "gt":  lambda a, b: a > b,  "gte": lambda a, b: a >= b,
+            "lt":  lambda a, b: a < b,  "lte": lambda a, b: a <= b,
+        }.get(op)
+        if comparar is None:
+            raise ErroPostgrest(400, "PGRST100", f"operador não suportado: {op}")
+        pred = lambda v: v is not None and comparar(v, _converter(valor, v))
+    if negar:
+        return lambda linha: not pred(linha.get(coluna))
+    return lambda linha: pred(linha.get(coluna))
+
+
+def _compilar_logico(texto: str, conjuncao: bool):
+    """Corpo de `or=(...)`/`and(...)`: termos `col.op.valor`, `and(...)` ou `or(...)`."""
+    termos = []
+    for termo in _dividir(texto[1:-1]):
+        if termo.startswith(("and(", "or(")):
+            e_and = termo.startswith("and(")
+            termos.append(_compilar_logico(termo[3 if e_and else 2:], e_and))
+        else:
+            coluna, _, expressao = termo.partition(".")
+            termos.append(_compilar_condicao(coluna, expressao))
+    if conjuncao:
+        return lambda linha: all(t(linha) for t in termos)
+    return lambda linha: any(t(linha) for t in termos)
+
+
+# ================================================================
+# BACKEND
+# ================================================================
+class PostgrestFalso:
+    """Tabelas em memória (`{nome: [linha, ...]}`) servidas como PostgREST.
+
+    `latencia` (segundos) é somada a cada requisição para simular a ida e volta da rede.
+    """
+
+    PARAMETROS_RESERVADOS = {"select", "order", "limit", "offset", "on_conflict", "columns", "or"}
+
+    def __init__(self, tabelas: dict = None, latencia: float = 0.0):
+        self.tabelas  = {nome: list(linhas) for nome, linhas in (tabelas or {}).items()}
+        self.latencia = latencia
+        self._por_id  = {}
+        self.rpcs     = {
+            "classificar_ocorrencias_lote": self._rpc_classificar_ocorrencias_lote,
+            "painel_agregados":             self._rpc_painel_agregados,
+        }
+        self.zerar_contadores()
+
+    def zerar_contadores(self):
+        self.requisicoes     = 0
+        self.bytes_recebidos = 0
+        self.bytes_enviados  = 0
+        self.segundos        = 0.0
+
+    def cliente(self) -> Client:
+        """Cliente `supabase` real apontando para este backend."""
+        http = httpx.Client(transport=httpx.MockTransport(self._responder), timeout=120)
+        return create_client(URL, KEY, options=ClientOptions(httpx_client=http))
+
+    async def cliente_async(self) -> AsyncClient:
+        """Como `cliente`, para `utils.db_async`; criar no laço em que será usado."""
+        http = httpx.AsyncClient(transport=httpx.MockTransport(self._responder_async), timeout=120)
+        return await acreate_client(URL, KEY, options=AsyncClientOptions(httpx_client=http))
+
+    # ------------------------------------------------------------
+    # Transporte
+    # ------------------------------------------------------------
+    def _responder(self, request: httpx.Request) -> httpx.Response:
+        if self.latencia:
+            time.sleep(self.latencia)
+        return self._resposta(request)
+
+    async def _responder_async(self, request: httpx.Request) -> httpx.Response:
+        # a latência não pode bloquear o laço, senão as leituras concorrentes viram sequenciais
+        if self.latencia:
+            await asyncio.sleep(self.latencia)
+        return self._resposta(request)
+
+    def _resposta(self, request: httpx.Request) -> httpx.Response:
+        t0 = time.perf_counter()
+        try:
+            status, corpo, cabecalhos = self._despachar(request)
+        except ErroPostgrest as e:
+            status, corpo, cabecalhos = e.status, {"code": e.codigo, "message": str(e), "details": None, "hint": None}, {}
+        conteudo = json.dumps(corpo, default=str).encode("utf-8")
+        self.requisicoes     += 1
+        self.bytes_recebidos += len(request.content or b"")
+        self.bytes_enviados  += len(conteudo)
+        self.segundos        += time.perf_counter() - t0
+        return httpx.Response(status, content=conteudo, request=request,
+                              headers={"content-type": "application/json", **cabecalhos})
+
+    def _despachar(self, request: httpx.Request) -> tuple:
+        caminho = request.url.path.split("/rest/v1/", 1)[-1]
+        params  = list(request.url.params.multi_items())
+        corpo   = json.loads(request.content) if request.content else None
+        prefer  = request.headers.get("prefer", "")
+        if caminho.startswith("rpc/"):
+            nome = caminho[4:]
+            if nome not in self.rpcs:
+                raise ErroPostgrest(404, "PGRST202", f"função {nome} não existe no stand-in")
+            return 200, self.rpcs[nome](**(corpo or {})), {}
+        if caminho not in self.tabelas:
+            raise ErroPostgrest(404, "42P01", f'relation "public.{caminho}" does not exist')
+        if request.method == "GET":
+            return self._select(caminho, params, prefer, request.headers.get("accept", ""))
+        if request.method == "POST":
+            return 201, self._inserir(caminho, corpo, dict(params).get("on_conflict"), prefer), {}
+        if request.method == "PATCH":
+            return 200, self._atualizar(caminho, params, corpo), {}
+        if request.method == "DELETE":
+            return 200, self._remover(caminho, params), {}
+        raise ErroPostgrest(405, "PGRST000", f"método {request.method} não suportado")
+
+    # ------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------
+    def indice(self, tabela: str) -> dict:
+        idx = self._por_id.get(tabela)
+        if idx is None:
+            idx = self._por_id[tabela] = {l["id"]: l for l in self.tabelas[tabela]}
+        return idx
+
+    def _mudou(self, tabela: str):
+        self._por_id.pop(tabela, None)
+
+    def _filtros(self, params: list) -> tuple:
+        """Separa os filtros da tabela dos filtros sobre recursos embutidos (`emb.coluna`)."""
+        proprios, embutidos = [], {}
+        for chave, valor in params:
+            if chave in self.PARAMETROS_RESERVADOS:
+                continue
+            if "." in chave:
+                emb, coluna = chave.split(".", 1)
+                embutidos.setdefault(emb, []).append(_compilar_condicao(coluna, valor))
+            else:
+                proprios.append(_compilar_condicao(chave, valor))
+        ou = dict(params).get("or")
+        if ou:
+            proprios.append(_compilar_logico(ou, conjuncao=False))
+        return proprios, embutidos
+
+    def _projetar(self, tabela: str, linha: dict, select: tuple, filtros_emb: dict):
+        colunas, embutidos = select
+        saida = dict(linha) if "*" in colunas else {c: linha.get(c) for c in colunas}
+        for emb, (inner, sub) in embutidos.items():
+            fk   = CHAVES_ESTRANGEIRAS.get(emb)
+            alvo = self.indice(emb).get(linha.get(fk)) if fk else None
+            if alvo is not None and not all(f(alvo) for f in filtros_emb.get(emb, [])):
+                alvo = None
+            if alvo is None and inner:
+                return None
+            saida[emb] = None if alvo is None else self._projetar(emb, alvo, sub, {})
+        return saida
+
+    def _ordenar(self, linhas: list, ordem: str) -> list:
+        for termo in reversed(ordem.split(",")):
+            partes  = termo.split(".")
+            coluna  = partes[0]
+            desc    = "desc" in partes
+            nulos_1 = "nullsfirst" in partes or (desc and "nullslast" not in partes)
+            com     = [l for l in linhas if l.get(coluna) is not None]
+            sem     = [l for l in linhas if l.get(coluna) is None]
+            com.sort(key=lambda l: l[coluna], reverse=desc)
+            linhas  = sem + com if nulos_1 else com + sem
+        return linhas
+
+    def _select(self, tabela: str, params: list, prefer: str, accept: str) -> tuple:
+        p                   = dict(params)
+        select              = _parse_select(p.get("select", "*"))
+        proprios, embutidos = self._filtros(params)
+        linhas = [l for l in self.tabelas[tabela] if all(f(l) for f in proprios)]
+        if p.get("order"):
+            linhas = self._ordenar(linhas, p["order"])
+        projetadas = []
+        for l in linhas:
+            proj = self._projetar(tabela, l, select, embutidos)
+            if proj is not None:
+                projetadas.append(proj)
+        total  = len(projetadas)
+        inicio = int(p.get("offset", 0))
+        fim    = inicio + int(p["limit"]) if "limit" in p else None
+        pagina = projetadas[inicio:fim]
+        cabecalhos = {}
+        if "count=exact" in prefer:
+            faixa = f"{inicio}-{inicio + len(pagina) - 1}" if pagina else "*"
+            cabecalhos["content-range"] = f"{faixa}/{total}"
+        if "vnd.pgrst.object" in accept:
+            if len(pagina) != 1:
+                raise ErroPostgrest(406, "PGRST116", f"The result contains {len(pagina)} rows")
+            return 200, pagina[0], cabecalhos
+        return 200, pagina, cabecalhos
+
+    # ------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------
+    def _completar(self, tabela: str, linha: dict) -> dict:
+        linha = {"id": str(uuid.uuid4()), "criado_em": datetime.now(timezone.utc).isoformat(), **linha}
+        for coluna, func in GERADAS.get(tabela, {}).items():
+            linha[coluna] = func(linha)
+        return linha
+
+    def inserir(self, tabela: str, linhas: list) -> list:
+        """Carga direta (sem passar pelo cliente), para montar os dados do benchmark."""
+        novas = [self._completar(tabela, l) for l in linhas]
+        self.tabelas.setdefault(tabela, []).extend(novas)
+        self._mudou(tabela)
+        return novas
+
+    def _inserir(self, tabela: str, corpo, on_conflict: str, prefer: str) -> list:
+        linhas = corpo if isinstance(corpo, list) else [corpo]
+        if not on_conflict:
+            return self.inserir(tabela, linhas)
+        colunas    = on_conflict.split(",")
+        existentes = {tuple(l.get(c) for c in colunas): l for l in self.tabelas[tabela]}
+        gravadas   = []
+        for l in linhas:
+            atual = existentes.get(tuple(l.get(c) for c in colunas))
+            if atual is None:
+                nova = self.inserir(tabela, [l])[0]
+                existentes[tuple(nova.get(c) for c in colunas)] = nova
+                gravadas.append(nova)
+            elif "resolution=merge-duplicates" in prefer:
+                atual.update(l)
+                for coluna, func in GERADAS.get(tabela, {}).items():
+                    atual[coluna] = func(atual)
+                gravadas.append(atual)
+        return gravadas
+
+    def _atualizar(self, tabela: str, params: list, corpo: dict) -> list:
+        proprios, _ = self._filtros(params)
+        alteradas = [l for l in self.tabelas[tabela] if all(f(l) for f in proprios)]
+        for l in alteradas:
+            l.update(corpo)
+            for coluna, func in GERADAS.get(tabela, {}).items():
+                l[coluna] = func(l)
+        return alteradas
+
+    def _remover(self, tabela: str, params: list) -> list:
+        proprios, _ = self._filtros(params)
+        removidas, mantidas = [], []
+        for l in self.tabelas[tabela]:
+            (removidas if all(f(l) for f in proprios) else mantidas).append(l)
+        self.tabelas[tabela] = mantidas
+        self._mudou(tabela)
+        return removidas
+
+    # ------------------------------------------------------------
+    # RPCs (mesma semântica de supabase/migrations)
+    # ------------------------------------------------------------
+    def _rpc_classificar_ocorrencias_lote(self, itens: list) -> int:
+        ocorrencias = self.indice("ocorrencias")
+        gravadas = 0
+        for item in itens:
+            o = ocorrencias.get(item["id"])
+            if o is None:
+                continue
+            o.update({k: item[k] for k in ("gravidade", "urgencia", "tendencia", "classificacao")})
+            o["resultado_gut"] = _resultado_gut(o)
+            gravadas += 1
+        return gravadas
+
+    def _rpc_painel_agregados(self, p_parada_ids=None, p_responsavel_ids=None, p_status=None,
+                              p_gut_niveis=None, p_prazo_inicio=None, p_prazo_fim=None, p_hoje=None) -> dict:
+        paradas, ocorrencias = self.indice("paradas"), self.indice("ocorrencias")
+        hoje = p_hoje or str(date.today())
+        em_3 = str(date.fromisoformat(hoje) + timedelta(days=3))
+        base = []
+        for a in self.tabelas["acoes"]:
+            o = ocorrencias.get(a.get("ocorrencia_id")) or {}
+            if ((p_parada_ids      and a.get("parada_id")      not in p_parada_ids) or
+                (p_responsavel_ids and a.get("responsavel_id") not in p_responsavel_ids) or
+                (p_status          and a.get("status")         not in p_status) or
+                (p_gut_niveis      and o.get("classificacao")  not in p_gut_niveis) or
+                (p_prazo_inicio    and a["prazo"] < p_prazo_inicio) or
+                (p_prazo_fim       and a["prazo"] > p_prazo_fim)):
+                continue
+            base.append(a)
+        abertas = [a for a in base if a["status"] in ("pendente", "em_andamento")]
+        por_status, por_projeto, por_resp, conclusoes = {}, {}, {}, {}
+        for a in base:
+            projeto = (paradas.get(a.get("parada_id")) or {}).get("nome", "")
+            por_status[a["status"]]                   = por_status.get(a["status"], 0) + 1
+            por_projeto[projeto]                      = por_projeto.get(projeto, 0) + 1
+            por_resp[a.get("responsavel_nome") or ""] = por_resp.get(a.get("responsavel_nome") or "", 0) + 1
+            if a["status"] == "concluido" and a.get("data_conclusao"):
+                conclusoes[a["data_conclusao"]] = conclusoes.get(a["data_conclusao"], 0) + 1
+        acumulado, serie = 0, []
+        for dia in sorted(conclusoes):
+            acumulado += conclusoes[dia]
+            serie.append({"data": dia, "qtd": conclusoes[dia], "acumulado": acumulado})
+        return {
+            "total":           len(base),
+            "vencidas":        sum(a["prazo"] < hoje for a in abertas),
+            "vence_em_breve":  sum(hoje <= a["prazo"] <= em_3 for a in abertas),
+            "por_status":      por_status,
+            "por_projeto":     [{"projeto": k, "qtd": v} for k, v in sorted(por_projeto.items(), key=lambda kv: -kv[1])],
+            "por_responsavel": [{"responsavel": k, "qtd": v} for k, v in sorted(por_resp.items(), key=lambda kv: -kv[1])],
+            "conclusoes":      serie,
+        }
@@ -0,0 +1,65 @@
+"""Servidor SMTP local mínimo (sem TLS nem AUTH) que só recebe e conta mensagens.
+
+Fala o suficiente do protocolo para o `smtplib` usado por `utils.smtp_client.SMTPTransport`
+(com `starttls=False` e sem usuário). `atraso` (segundos) é aplicado a cada mensagem, para
+simular um relay lento.
+"""
+import socketserver
+import threading
+import time
+
+
+class _Sessao(socketserver.StreamRequestHandler):
+    def _responder(self, linha: str):
+        self.wfile.write((linha + "\r\n").encode("ascii"))
+
+    def handle(self):
+        servidor = self.server
+        self._responder("220 smtp-falso ESMTP")
+        for bruta in self.rfile:
+            comando = bruta.decode("ascii", "replace").strip().split(" ", 1)[0].upper()
+            if comando in ("EHLO", "HELO"):
+                self._responder("250 smtp-falso")
+            elif comando in ("MAIL", "RCPT", "RSET", "NOOP"):
+                self._responder("250 OK")
+            elif comando == "DATA":
+                self._responder("354 Fim com <CRLF>.<CRLF>")
+                tamanho = 0
+                for linha in self.rfile:
+                    if linha in (b".\r\n", b".\n"):
+                        break
+                    tamanho += len(linha)
+                if servidor.atraso:
+                    time.sleep(servidor.atraso)
+                with servidor.lock:
+                    servidor.mensagens += 1
+                    servidor.bytes     += tamanho
+                self._responder("250 OK")
+            elif comando == "QUIT":
+                self._responder("221 Tchau")
+                return
+            else:
+                self._responder("502 Comando não implementado")
+
+
+class SMTPFalso(socketserver.ThreadingTCPServer):
+    """`with SMTPFalso() as smtp: SMTPTransport(smtp.host, smtp.porta, starttls=False)`."""
+
+    daemon_threads      = True
+    allow_reuse_address = True
+
+    def __init__(self, atraso: float = 0.0):
+        super().__init__(("127.0.0.1", 0), _Sessao)
+        self.atraso    = atraso
+        self.lock      = threading.Lock()
+        self.mensagens = 0
+        self.bytes     = 0
+        self.host, self.porta = self.server_address
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, name="smtp-falso", daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
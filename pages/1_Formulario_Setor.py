@@ -1,10 +1,18 @@
+import uuid
 import streamlit as st
+from datetime import datetime
 from utils.auth import verificar_permissao, usuario_logado
 from utils.db_queries import (
     listar_paradas, inserir_ocorrencias,
-    listar_ocorrencias_por_parada, listar_usuarios
+    listar_ocorrencias_por_parada, listar_usuarios, ErroGravacaoEmLote,
+    carregar_rascunho, salvar_rascunho_incremental, descartar_rascunho,
 )
-from utils.notifications import notificar_pmo_envio_formulario
+from utils.notifications import notificar_pmo_envio_formulario_lote
+from utils.importacao import FASES, validar_linha, importar_ocorrencias, modelo_csv
+from utils.rascunho import novo_rascunho, linhas_do_editor, do_banco, Autosalvamento
+from utils.instrumentacao import instrumentar_pagina
+
+AUTOSAVE_INTERVALO = 5   # segundos entre verificações do autosave (o debounce fica no Autosalvamento)
 
 STYLE = """
 <style>
@@ -17,6 +25,7 @@ STYLE = """
 """
 
 st.set_page_config(page_title="Formulário do Setor", page_icon="📋", layout="wide")
+instrumentar_pagina("formulario_setor")
 st.markdown(STYLE, unsafe_allow_html=True)
 verificar_permissao(["setor","pmo","admin"])
 
@@ -49,10 +58,16 @@ c3.text_input("📅 Período",     value=f"{parada.get('data_inicio','')} → {p
 st.markdown("---")
 
 chave_rascunho = f"ocorrencias_{parada_id}"
+chave_autosave = f"autosave_{parada_id}"
 chave_enviado  = f"enviado_{parada_id}"
-
-if st.session_state.get(chave_enviado):
-    st.success("✅ Formulário já enviado ao PMO. Edição bloqueada.")
+chave_envio    = f"envio_{parada_id}"   # idempotência do envio: a mesma enquanto ele não dá certo
+
+if chave_enviado in st.session_state:
+    envio = st.session_state[chave_enviado]
+    st.success(f"✅ Formulário enviado ao PMO ({envio['inseridas']} ocorrência(s) gravada(s)). Edição bloqueada.")
+    if envio["inseridas"] < envio["enviadas"]:
+        st.caption(f"As outras {envio['enviadas'] - envio['inseridas']} já tinham sido gravadas "
+                   "numa tentativa anterior deste envio.")
     occs = listar_ocorrencias_por_parada(parada_id)
     if occs:
         import pandas as pd
@@ -62,96 +77,154 @@ if st.session_state.get(chave_enviado):
     st.stop()
 
 if chave_rascunho not in st.session_state:
-    st.session_state[chave_rascunho] = [
-        {"area_setor":"","fase":"","ocorrencia":"","impacto":"","licao_aprendida":""}
-    ]
-
-FASES = ["Planejamento","Mobilização","Desmontagem","Manutenção",
-         "Montagem","Comissionamento","Desmobilização","Encerramento"]
-
-linhas: list = st.session_state[chave_rascunho]
+    # o rascunho desta parada trazido no login (app.py); sem ele, busca no servidor
+    restaurados = st.session_state.get("rascunhos_restaurados")
+    try:
+        if restaurados is not None:
+            salvas = do_banco(restaurados.pop(parada_id, []))
+        else:
+            salvas = do_banco(carregar_rascunho(usuario["id"], parada_id))
+    except Exception as e:
+        salvas = []
+        st.warning(f"⚠️ Não foi possível carregar o rascunho salvo: {e}")
+    st.session_state[chave_rascunho] = novo_rascunho(salvas)
+    st.session_state[chave_autosave] = Autosalvamento(salvas)
+    if salvas:
+        st.toast(f"📂 Rascunho restaurado: {len(salvas)} ocorrência(s).")
+
+
+def _gravar_rascunho(alteradas: list, removidas: list):
+    salvar_rascunho_incremental(usuario["id"], parada_id, alteradas, removidas)
+
+
+@st.fragment(run_every=AUTOSAVE_INTERVALO)
+def _autosalvar():
+    autosave = st.session_state[chave_autosave]
+    if autosave.deve_salvar():
+        try:
+            autosave.salvar(_gravar_rascunho)
+        except Exception as e:
+            st.caption(f"⚠️ Autosave falhou, nova tentativa em instantes: {e}")
+            return
+    if autosave.pendente():
+        st.caption("✏️ Alterações ainda não salvas...")
+    else:
+        st.caption(f"💾 Rascunho salvo às {datetime.fromtimestamp(autosave.ultimo_salvamento):%H:%M:%S}")
+
+with st.expander("📥 Importar planilha (CSV/XLSX)"):
+    st.caption("Colunas: Área/Setor, Fase, Ocorrência, Impacto, Lição Aprendida. "
+               "As linhas são validadas com as mesmas regras do envio e gravadas em lotes; "
+               "linhas com erro são puladas e listadas abaixo.")
+    st.download_button("⬇️ Baixar modelo", modelo_csv(), file_name="modelo_ocorrencias.csv", mime="text/csv")
+    arquivo = st.file_uploader("Planilha", type=["csv","xlsx"], key=f"importacao_{parada_id}")
+    if arquivo and st.button("📥 Importar e enviar ao PMO", type="primary"):
+        # o total de linhas só é conhecido no fim da leitura: o progresso é contado em linhas
+        progresso = st.status("Importando...")
+        try:
+            resultado = importar_ocorrencias(
+                arquivo, arquivo.name, parada_id, usuario["id"], inserir=inserir_ocorrencias,
+                ao_progredir=lambda lidas, inseridas: progresso.update(
+                    label=f"Importando... {lidas} linha(s) lida(s), {inseridas} inserida(s)",
+                ),
+            )
+        except ValueError as e:
+            progresso.update(label="Importação interrompida.", state="error")
+            st.error(str(e))
+        except ErroGravacaoEmLote as e:
+            progresso.update(label="Importação interrompida.", state="error")
+            st.error(f"❌ {e}. Importe o mesmo arquivo novamente — as linhas já gravadas "
+                     "não serão duplicadas.")
+        else:
+            progresso.update(label=f"Importação concluída: {resultado['lidas']} linha(s) lida(s).",
+                             state="complete")
+            if resultado["inseridas"]:
+                notificar_pmo_envio_formulario_lote(
+                    destinatarios   = listar_usuarios(perfil=["pmo","admin"]),
+                    setor           = usuario.get("setor","Setor"),
+                    parada          = parada["nome"],
+                    qtd_ocorrencias = resultado["inseridas"],
+                )
+                st.success(f"✅ {resultado['inseridas']} ocorrência(s) importada(s) e enviada(s) ao PMO!")
+            if resultado["invalidas"]:
+                st.warning(f"⚠️ {resultado['invalidas']} linha(s) com erro não foram importadas.")
+                st.code("\n".join(resultado["erros"]), language=None)
+
+base = st.session_state[chave_rascunho]
 st.markdown("### 📝 Ocorrências")
-
-indices_remover = []
-for i, linha in enumerate(linhas):
-    st.markdown(f"**Ocorrência #{i+1}**")
-    c1, c2, c3, c4, c5, c_del = st.columns([2,2,3,3,3,0.5])
-    with c1:
-        linha["area_setor"] = st.text_input("Área/Setor", value=linha["area_setor"],
-                                             key=f"setor_{i}", placeholder="Ex: Caldeiraria")
-    with c2:
-        linha["fase"] = st.selectbox("Fase", FASES,
-                                     index=FASES.index(linha["fase"]) if linha["fase"] in FASES else 0,
-                                     key=f"fase_{i}")
-    with c3:
-        linha["ocorrencia"] = st.text_area("Ocorrência", value=linha["ocorrencia"],
-                                            key=f"ocor_{i}", height=100)
-    with c4:
-        linha["impacto"] = st.text_area("Impacto", value=linha["impacto"],
-                                         key=f"imp_{i}", height=100)
-    with c5:
-        linha["licao_aprendida"] = st.text_area("Lição Aprendida", value=linha["licao_aprendida"],
-                                                  key=f"licao_{i}", height=100)
-    with c_del:
-        st.markdown("<br>", unsafe_allow_html=True)
-        if len(linhas) > 1 and st.button("🗑️", key=f"del_{i}"):
-            indices_remover.append(i)
-    st.divider()
-
-if indices_remover:
-    st.session_state[chave_rascunho] = [l for idx, l in enumerate(linhas) if idx not in indices_remover]
+st.caption("Edite direto na grade; use a última linha para adicionar e selecione linhas para excluir.")
+
+# a base fica fixa em session_state; o editor guarda só as edições sobre ela, então digitar
+# numa célula não recria widgets por linha e excluir uma linha não desloca as demais
+editado = st.data_editor(
+    base,
+    key                 = f"editor_{chave_rascunho}_{base.attrs['token']}",
+    num_rows            = "dynamic",
+    hide_index          = True,
+    use_container_width = True,
+    column_order        = ["area_setor","fase","ocorrencia","impacto","licao_aprendida"],
+    column_config       = {
+        "area_setor":      st.column_config.TextColumn("Área/Setor", width="small"),
+        "fase":            st.column_config.SelectboxColumn("Fase", options=FASES, default=FASES[0],
+                                                            width="small"),
+        "ocorrencia":      st.column_config.TextColumn("Ocorrência", width="large"),
+        "impacto":         st.column_config.TextColumn("Impacto", width="medium"),
+        "licao_aprendida": st.column_config.TextColumn("Lição Aprendida", width="large"),
+    },
+)
+linhas_atuais, novas = linhas_do_editor(editado)
+st.session_state[chave_autosave].registrar(linhas_atuais)
+if novas:
+    # fixa o id das linhas recém-adicionadas numa base nova (o editor é recriado sobre ela)
+    st.session_state[chave_rascunho] = novo_rascunho(linhas_atuais)
     st.rerun()
-
-col_add, _ = st.columns([2,8])
-with col_add:
-    if st.button("➕ Adicionar Ocorrência", use_container_width=True):
-        st.session_state[chave_rascunho].append(
-            {"area_setor":"","fase":"","ocorrencia":"","impacto":"","licao_aprendida":""}
-        )
-        st.rerun()
+_autosalvar()
 
 st.markdown("---")
 col_salvar, col_enviar, _ = st.columns([2,2,6])
 
 with col_salvar:
     if st.button("💾 Salvar Rascunho", use_container_width=True):
-        st.success("Rascunho salvo localmente.")
+        try:
+            n = st.session_state[chave_autosave].salvar(_gravar_rascunho)
+            st.success(f"Rascunho salvo ({n} linha(s) alterada(s)).")
+        except Exception as e:
+            st.error(f"❌ Falha ao salvar o rascunho: {e}")
 
 with col_enviar:
     if st.button("✅ Enviar para PMO", use_container_width=True, type="primary"):
-        linhas_atuais = st.session_state[chave_rascunho]
-        erros = []
-        for i, l in enumerate(linhas_atuais):
-            if not l["area_setor"].strip():    erros.append(f"Linha {i+1}: Área/Setor em branco.")
-            if not l["ocorrencia"].strip():    erros.append(f"Linha {i+1}: Ocorrência em branco.")
-            if not l["impacto"].strip():       erros.append(f"Linha {i+1}: Impacto em branco.")
-            if not l["licao_aprendida"].strip():erros.append(f"Linha {i+1}: Lição Aprendida em branco.")
+        erros = [e for i, l in enumerate(linhas_atuais) for e in validar_linha(l, i+1)]
+        if not linhas_atuais:
+            erros.append("Adicione ao menos uma ocorrência.")
         if erros:
             for e in erros: st.error(e)
         else:
-            payload = [
+            envio_id = st.session_state.setdefault(chave_envio, uuid.uuid4().hex)
+            payload  = [
                 {
-                    "parada_id":       parada_id,
-                    "area_setor":      l["area_setor"].strip(),
-                    "fase":            l["fase"],
-                    "ocorrencia":      l["ocorrencia"].strip(),
-                    "impacto":         l["impacto"].strip(),
-                    "licao_aprendida": l["licao_aprendida"].strip(),
-                    "enviado_por":     usuario["id"],
+                    "parada_id":          parada_id,
+                    "area_setor":         l["area_setor"].strip(),
+                    "fase":               l["fase"],
+                    "ocorrencia":         l["ocorrencia"].strip(),
+                    "impacto":            l["impacto"].strip(),
+                    "licao_aprendida":    l["licao_aprendida"].strip(),
+                    "enviado_por":        usuario["id"],
+                    "chave_idempotencia": f"formulario:{envio_id}:{l['id']}",
                 }
                 for l in linhas_atuais
             ]
             with st.spinner("Enviando..."):
-                inserir_ocorrencias(payload)
-                usuarios_pmo = listar_usuarios(perfil=["pmo","admin"])
-                for u in usuarios_pmo:
-                    notificar_pmo_envio_formulario(
-                        email_pmo       = u["email"],
-                        nome_pmo        = u["nome"],
-                        setor           = usuario.get("setor","Setor"),
-                        parada          = parada["nome"],
-                        qtd_ocorrencias = len(payload),
-                    )
-                st.session_state[chave_enviado] = True
-            st.success(f"✅ {len(payload)} ocorrência(s) enviada(s) ao PMO!")
+                try:
+                    inseridas = inserir_ocorrencias(payload)
+                except ErroGravacaoEmLote as e:
+                    st.error(f"❌ {e}. Tente enviar novamente — as ocorrências já gravadas não serão duplicadas.")
+                    st.stop()
+                notificar_pmo_envio_formulario_lote(
+                    destinatarios   = listar_usuarios(perfil=["pmo","admin"]),
+                    setor           = usuario.get("setor","Setor"),
+                    parada          = parada["nome"],
+                    qtd_ocorrencias = len(payload),
+                )
+                descartar_rascunho(usuario["id"], parada_id)
+                st.session_state.pop(chave_envio, None)
+                st.session_state[chave_enviado] = {"enviadas": len(payload), "inseridas": len(inseridas)}
             st.rerun()
@@ -2,10 +2,14 @@ import streamlit as st
 from utils.auth import verificar_permissao, usuario_logado
 from utils.db_queries import (
     listar_paradas, listar_ocorrencias_por_parada,
-    classificar_ocorrencia, atualizar_status_parada, listar_usuarios
+    classificar_ocorrencias_em_lote, atualizar_status_parada, listar_usuarios
+)
+from utils.gut_calculator import (
+    calcular_gut, get_descricao_gravidade, get_descricao_urgencia, get_descricao_tendencia,
+    AJUDA_GRAVIDADE, AJUDA_URGENCIA, AJUDA_TENDENCIA, limites_do_contrato, legenda_limites,
 )
-from utils.gut_calculator import calcular_gut, get_descricao_gravidade, get_descricao_urgencia, get_descricao_tendencia
 from utils.notifications import notificar_avanco_fase
+from utils.instrumentacao import instrumentar_pagina
 
 STYLE = """
 <style>
@@ -24,6 +28,7 @@ STYLE = """
 """
 
 st.set_page_config(page_title="Classificação GUT", page_icon="🔬", layout="wide")
+instrumentar_pagina("classificacao_pmo")
 st.markdown(STYLE, unsafe_allow_html=True)
 verificar_permissao(["pmo","admin"])
 
@@ -39,6 +44,7 @@ with st.sidebar:
     opcoes = {p["nome"]: p for p in paradas}
     parada = opcoes[st.selectbox("🏗️ Selecione a Parada", list(opcoes.keys()))]
     parada_id = parada["id"]
+    limites   = limites_do_contrato(parada.get("contratos"))
 
 st.markdown("""
 <div class="page-header">
@@ -58,52 +64,102 @@ with st.expander("ℹ️ Guia de Classificação GUT", expanded=False):
     with c3:
         st.markdown("**Tendência (T)**")
         for n in range(1,6): st.markdown(f"**{n}** — {get_descricao_tendencia(n)}")
-    st.info("**GUT = G × U × T** | 🟢 1–25 Baixo | 🟡 26–74 Médio | 🔴 75–125 Alto")
+    st.info(f"**GUT = G × U × T** | {legenda_limites(limites)}")
 
 ocorrencias = listar_ocorrencias_por_parada(parada_id)
 if not ocorrencias:
     st.warning("Esta parada não possui ocorrências registradas.")
     st.stop()
 
-st.markdown(f"**{len(ocorrencias)} ocorrência(s) para classificar**")
-st.markdown("---")
-
 chave_gut = f"gut_{parada_id}"
 if chave_gut not in st.session_state:
     st.session_state[chave_gut] = {}
-
+valores_gut = st.session_state[chave_gut]
 for occ in ocorrencias:
-    oid = occ["id"]
-    if oid not in st.session_state[chave_gut]:
-        st.session_state[chave_gut][oid] = {
-            "g": occ.get("gravidade") or 1,
-            "u": occ.get("urgencia") or 1,
-            "t": occ.get("tendencia") or 1,
-        }
-    vals = st.session_state[chave_gut][oid]
-
-    with st.expander(
-        f"📌 [{occ['area_setor']}] {occ['ocorrencia'][:80]}{'...' if len(occ['ocorrencia'])>80 else ''}",
-        expanded=(occ.get("classificacao") is None)
-    ):
-        c_info, c_gut = st.columns([3,2])
-        with c_info:
-            st.markdown(f"**Área/Setor:** {occ['area_setor']}")
-            st.markdown(f"**Fase:** {occ['fase']}")
-            st.markdown(f"**Ocorrência:** {occ['ocorrencia']}")
-            st.markdown(f"**Impacto:** {occ['impacto']}")
-            st.markdown(f"**Lição Aprendida:** {occ['licao_aprendida']}")
-        with c_gut:
-            st.markdown("#### Classificação GUT")
-            g = st.selectbox("Gravidade", list(range(1,6)), index=vals["g"]-1, key=f"g_{oid}",
-                             help="\n".join([f"{n}: {get_descricao_gravidade(n)}" for n in range(1,6)]))
-            u = st.selectbox("Urgência",  list(range(1,6)), index=vals["u"]-1, key=f"u_{oid}",
-                             help="\n".join([f"{n}: {get_descricao_urgencia(n)}" for n in range(1,6)]))
-            t = st.selectbox("Tendência", list(range(1,6)), index=vals["t"]-1, key=f"t_{oid}",
-                             help="\n".join([f"{n}: {get_descricao_tendencia(n)}" for n in range(1,6)]))
-            st.session_state[chave_gut][oid] = {"g": g, "u": u, "t": t}
-            r = calcular_gut(g, u, t)
-            st.markdown(f"**Resultado:** {r['cor']} **{r['resultado']}** — {r['label']}")
+    valores_gut.setdefault(occ["id"], {
+        "g": occ.get("gravidade") or 1,
+        "u": occ.get("urgencia")  or 1,
+        "t": occ.get("tendencia") or 1,
+    })
+
+pendentes = sum(1 for o in ocorrencias if o.get("classificacao") is None)
+st.markdown(f"**{len(ocorrencias)} ocorrência(s)** · {pendentes} ainda sem classificação")
+st.markdown("---")
+
+
+@st.fragment
+def area_de_classificacao():
+    """Filtros, paginação e os expanders da página atual.
+
+    Roda como fragment: mudar um selectbox ou de página reexecuta só este trecho, e só as
+    ocorrências da página visível são renderizadas. Os valores ficam em `valores_gut`, então
+    sobrevivem à troca de página.
+    """
+    cf1, cf2, cf3, cf4 = st.columns([2,3,3,1])
+    situacao = cf1.selectbox("Situação", ["Não classificadas primeiro", "Só não classificadas", "Só classificadas"],
+                             key=f"gut_situacao_{parada_id}")
+    areas    = cf2.multiselect("Área/Setor", sorted({o["area_setor"] for o in ocorrencias}),
+                               key=f"gut_areas_{parada_id}")
+    busca    = cf3.text_input("🔎 Buscar na ocorrência", key=f"gut_busca_{parada_id}").strip().lower()
+    tam      = cf4.selectbox("Por página", [10, 25, 50], key=f"gut_tam_{parada_id}")
+
+    visiveis = [
+        o for o in ocorrencias
+        if (situacao != "Só não classificadas" or o.get("classificacao") is None)
+        and (situacao != "Só classificadas" or o.get("classificacao") is not None)
+        and (not areas or o["area_setor"] in areas)
+        and (not busca or busca in o["ocorrencia"].lower())
+    ]
+    visiveis.sort(key=lambda o: o.get("classificacao") is not None)   # estável: não classificadas primeiro
+
+    # filtros novos voltam para a primeira página
+    chave_pagina = f"gut_pagina_{parada_id}"
+    assinatura   = repr((situacao, areas, busca, tam))
+    if st.session_state.get(f"gut_assinatura_{parada_id}") != assinatura:
+        st.session_state[f"gut_assinatura_{parada_id}"] = assinatura
+        st.session_state[chave_pagina] = 1
+    total_paginas = max(1, -(-len(visiveis) // tam))
+    pagina = min(st.session_state.get(chave_pagina, 1), total_paginas)
+
+    c_info, c_ant, c_prox = st.columns([8,1,1])
+    c_info.markdown(f"Página **{pagina}** de **{total_paginas}** · {len(visiveis)} ocorrência(s) no filtro")
+    c_ant.button("◀️", disabled=pagina == 1, use_container_width=True, key=f"gut_ant_{parada_id}",
+                 on_click=st.session_state.__setitem__, args=(chave_pagina, pagina - 1))
+    c_prox.button("▶️", disabled=pagina == total_paginas, use_container_width=True, key=f"gut_prox_{parada_id}",
+                  on_click=st.session_state.__setitem__, args=(chave_pagina, pagina + 1))
+
+    if not visiveis:
+        st.info("Nenhuma ocorrência para os filtros selecionados.")
+        return
+
+    for occ in visiveis[(pagina - 1) * tam : pagina * tam]:
+        oid  = occ["id"]
+        vals = valores_gut[oid]
+        with st.expander(
+            f"📌 [{occ['area_setor']}] {occ['ocorrencia'][:80]}{'...' if len(occ['ocorrencia'])>80 else ''}",
+            expanded=(occ.get("classificacao") is None)
+        ):
+            c_info, c_gut = st.columns([3,2])
+            with c_info:
+                st.markdown(f"**Área/Setor:** {occ['area_setor']}")
+                st.markdown(f"**Fase:** {occ['fase']}")
+                st.markdown(f"**Ocorrência:** {occ['ocorrencia']}")
+                st.markdown(f"**Impacto:** {occ['impacto']}")
+                st.markdown(f"**Lição Aprendida:** {occ['licao_aprendida']}")
+            with c_gut:
+                st.markdown("#### Classificação GUT")
+                g = st.selectbox("Gravidade", list(range(1,6)), index=vals["g"]-1, key=f"g_{oid}",
+                                 help=AJUDA_GRAVIDADE)
+                u = st.selectbox("Urgência",  list(range(1,6)), index=vals["u"]-1, key=f"u_{oid}",
+                                 help=AJUDA_URGENCIA)
+                t = st.selectbox("Tendência", list(range(1,6)), index=vals["t"]-1, key=f"t_{oid}",
+                                 help=AJUDA_TENDENCIA)
+                valores_gut[oid] = {"g": g, "u": u, "t": t}
+                r = calcular_gut(g, u, t, limites)
+                st.markdown(f"**Resultado:** {r['cor']} **{r['resultado']}** — {r['label']}")
+
+
+area_de_classificacao()
 
 st.markdown("---")
 c1, c2, _ = st.columns([2,2,6])
@@ -111,15 +167,13 @@ c1, c2, _ = st.columns([2,2,6])
 with c1:
     if st.button("💾 Salvar Classificações", use_container_width=True, type="primary"):
         with st.spinner("Salvando..."):
-            for oid, vals in st.session_state[chave_gut].items():
-                classificar_ocorrencia(oid, vals["g"], vals["u"], vals["t"])
-        st.success("✅ Classificações salvas!")
+            gravadas = classificar_ocorrencias_em_lote(st.session_state[chave_gut], ocorrencias, limites)
+        st.success(f"✅ Classificações salvas! {gravadas} ocorrência(s) atualizada(s).")
 
 with c2:
     if st.button("▶️ Avançar para Plano de Ação", use_container_width=True):
         with st.spinner("Salvando e avançando..."):
-            for oid, vals in st.session_state[chave_gut].items():
-                classificar_ocorrencia(oid, vals["g"], vals["u"], vals["t"])
+            classificar_ocorrencias_em_lote(st.session_state[chave_gut], ocorrencias, limites)
             atualizar_status_parada(parada_id, "plano_acao")
             todos_emails = [u["email"] for u in listar_usuarios()]
             notificar_avanco_fase(
@@ -2,11 +2,12 @@ import streamlit as st
 from datetime import date, timedelta
 from utils.auth import verificar_permissao, usuario_logado
 from utils.db_queries import (
-    listar_paradas, listar_ocorrencias_por_parada, listar_acoes_por_ocorrencia,
-    criar_acao, deletar_acao, atualizar_status_parada, listar_usuarios, get_ocorrencia
+    listar_paradas, listar_ocorrencias_por_parada, criar_acao, deletar_acao, atualizar_status_parada
 )
-from utils.gut_calculator import calcular_gut
-from utils.notifications import notificar_responsavel_acao, notificar_avanco_fase
+from utils import db_async
+from utils.gut_calculator import calcular_gut, limites_do_contrato
+from utils.notifications import notificar_responsaveis_acao_lote, notificar_avanco_fase
+from utils.instrumentacao import instrumentar_pagina
 
 STYLE = """
 <style>
@@ -25,6 +26,7 @@ STYLE = """
 """
 
 st.set_page_config(page_title="Plano de Ação", page_icon="📝", layout="wide")
+instrumentar_pagina("plano_de_acao")
 st.markdown(STYLE, unsafe_allow_html=True)
 verificar_permissao(["pmo","admin"])
 
@@ -40,6 +42,7 @@ with st.sidebar:
     opcoes = {p["nome"]: p for p in paradas}
     parada = opcoes[st.selectbox("🏗️ Selecione a Parada", list(opcoes.keys()))]
     parada_id = parada["id"]
+    limites   = limites_do_contrato(parada.get("contratos"))
 
 st.markdown("""
 <div class="page-header">
@@ -48,21 +51,40 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-ocorrencias = listar_ocorrencias_por_parada(parada_id)
-ocorrencias_ordenadas = sorted(
-    ocorrencias,
-    key=lambda o: (o.get("gravidade") or 0) * (o.get("urgencia") or 0) * (o.get("tendencia") or 0),
-    reverse=True
-)
+# a ordem por prioridade vem do banco (resultado_gut + índice); só a página visível é carregada
+c_tam, c_info, c_ant, c_prox = st.columns([2,4,1,1])
+tam_pagina = c_tam.selectbox("Ocorrências por página", [10, 20, 50], index=1, key="plano_tam")
+chave_pag  = f"plano_pagina_{parada_id}_{tam_pagina}"
+pagina_num = st.session_state.get(chave_pag, 0)
 
-todos_usuarios = listar_usuarios()
+# usuários, ações e a página de ocorrências não dependem umas das outras: uma ida ao banco só
+leituras = db_async.ler_em_paralelo(
+    usuarios = db_async.listar_usuarios(),
+    acoes    = db_async.listar_acoes_por_parada(parada_id),
+    pagina   = db_async.listar_ocorrencias_priorizadas(parada_id, limite=tam_pagina, offset=pagina_num * tam_pagina),
+)
+todos_usuarios  = leituras["usuarios"]
+usuarios_por_id = {u["id"]: u for u in todos_usuarios}
 opcoes_usuarios = {f"{u['nome']} ({u['email']})": u for u in todos_usuarios}
+acoes_por_occ   = leituras["acoes"]
+pagina          = leituras["pagina"]
+ocorrencias_ordenadas = pagina["ocorrencias"]
 
-if not ocorrencias_ordenadas:
+if not pagina["total"]:
     st.warning("Nenhuma ocorrência encontrada para esta parada.")
     st.stop()
 
-st.markdown(f"**{len(ocorrencias_ordenadas)} ocorrência(s) — ordenadas por prioridade GUT**")
+total_paginas = -(-pagina["total"] // tam_pagina)
+c_info.markdown(f"<br>**{pagina['total']} ocorrência(s) — ordenadas por prioridade GUT** · "
+                f"página {pagina_num + 1} de {total_paginas}", unsafe_allow_html=True)
+with c_ant:
+    st.markdown("<br>", unsafe_allow_html=True)
+    st.button("◀️", disabled=pagina_num == 0, use_container_width=True,
+              on_click=st.session_state.__setitem__, args=(chave_pag, pagina_num - 1))
+with c_prox:
+    st.markdown("<br>", unsafe_allow_html=True)
+    st.button("▶️", disabled=pagina_num + 1 >= total_paginas, use_container_width=True,
+              on_click=st.session_state.__setitem__, args=(chave_pag, pagina_num + 1))
 st.markdown("---")
 
 for occ in ocorrencias_ordenadas:
@@ -70,7 +92,7 @@ for occ in ocorrencias_ordenadas:
     g       = occ.get("gravidade") or 1
     u_val   = occ.get("urgencia")  or 1
     t       = occ.get("tendencia") or 1
-    gut_info = calcular_gut(g, u_val, t)
+    gut_info = calcular_gut(g, u_val, t, limites)
     badge    = f'<span class="gut-{gut_info["nivel"]}">{gut_info["cor"]} {gut_info["label"]} — GUT {gut_info["resultado"]}</span>'
 
     with st.expander(
@@ -108,7 +130,7 @@ for occ in ocorrencias_ordenadas:
                     st.success("✅ Ação criada!")
                     st.rerun()
 
-        acoes = listar_acoes_por_ocorrencia(oid)
+        acoes = acoes_por_occ.get(oid, [])
         if acoes:
             st.markdown("**Ações criadas:**")
             for acao in acoes:
@@ -128,21 +150,26 @@ with c1:
         with st.spinner("Publicando e notificando responsáveis..."):
             atualizar_status_parada(parada_id, "monitoramento")
             emails_notificados = set()
-            for occ in ocorrencias_ordenadas:
-                acoes = listar_acoes_por_ocorrencia(occ["id"])
-                for acao in acoes:
-                    resp = next((u for u in todos_usuarios if u["id"] == acao.get("responsavel_id")), None)
+            avisos             = []
+            # todas as ocorrências da parada (não só a página), da mais para a menos crítica;
+            # cada responsável recebe um e-mail, sobre a sua ação mais crítica
+            todas = sorted(listar_ocorrencias_por_parada(parada_id),
+                           key=lambda o: o.get("resultado_gut") or 0, reverse=True)
+            for occ in todas:
+                for acao in acoes_por_occ.get(occ["id"], []):
+                    resp = usuarios_por_id.get(acao.get("responsavel_id"))
                     if resp and resp["email"] not in emails_notificados:
-                        notificar_responsavel_acao(
-                            email      = resp["email"],
-                            nome       = resp["nome"],
-                            acao       = acao["descricao"],
-                            prazo      = acao["prazo"],
-                            projeto    = parada["nome"],
-                            ocorrencia = occ.get("ocorrencia",""),
-                            nivel_gut  = occ.get("classificacao","baixo"),
-                        )
+                        avisos.append({
+                            "email":      resp["email"],
+                            "nome":       resp["nome"],
+                            "acao":       acao["descricao"],
+                            "prazo":      acao["prazo"],
+                            "projeto":    parada["nome"],
+                            "ocorrencia": occ.get("ocorrencia",""),
+                            "nivel_gut":  occ.get("classificacao","baixo"),
+                        })
                         emails_notificados.add(resp["email"])
+            notificar_responsaveis_acao_lote(avisos)
             todos_emails = [u["email"] for u in todos_usuarios]
             notificar_avanco_fase(
                 emails           = todos_emails,
@@ -3,8 +3,13 @@ import pandas as pd
 import plotly.express as px
 from datetime import date, timedelta
 from utils.auth import verificar_permissao, usuario_logado, get_perfil_atual
-from utils.db_queries import listar_acoes, listar_paradas, listar_usuarios, atualizar_acao
-from utils.notifications import notificar_atualizacao_status
+from utils.db_queries import (
+    listar_acoes_pagina, listar_usuarios, atualizar_acao,
+)
+from utils import db_async
+from utils.notifications import notificar_atualizacao_status_agrupado
+from utils.painel_dados import preparar_acoes, preparar_exibicao, estilos_linhas, STATUS_LABEL
+from utils.instrumentacao import instrumentar_pagina
 
 STYLE = """
 <style>
@@ -20,6 +25,7 @@ STYLE = """
 """
 
 st.set_page_config(page_title="Painel", page_icon="📊", layout="wide")
+instrumentar_pagina("painel")
 st.markdown(STYLE, unsafe_allow_html=True)
 verificar_permissao(["admin","pmo","setor","gestor"])
 
@@ -36,8 +42,9 @@ st.markdown("""
 with st.sidebar:
     st.markdown("### 🔍 Filtros")
     st.markdown("---")
-    todas_paradas  = listar_paradas()
-    todos_usuarios = listar_usuarios()
+    filtros_base   = db_async.ler_em_paralelo(paradas=db_async.listar_paradas(), usuarios=db_async.listar_usuarios())
+    todas_paradas  = filtros_base["paradas"]
+    todos_usuarios = filtros_base["usuarios"]
     opcoes_paradas = {p["nome"]: p["id"] for p in todas_paradas}
     opcoes_users   = {u["nome"]: u["id"] for u in todos_usuarios}
 
@@ -63,41 +70,25 @@ if sel_gut:      filtros["gut_niveis"]      = sel_gut
 if d1:           filtros["prazo_inicio"]    = d1
 if d2:           filtros["prazo_fim"]       = d2
 
-acoes_raw = listar_acoes(filtros)
-
-rows = []
-for a in acoes_raw:
-    occ  = a.get("ocorrencias") or {}
-    para = a.get("paradas")     or {}
-    rows.append({
-        "id":             a["id"],
-        "Projeto":        para.get("nome",""),
-        "Área/Setor":     occ.get("area_setor",""),
-        "Ocorrência":     (occ.get("ocorrencia") or "")[:60],
-        "GUT_nivel":      occ.get("classificacao",""),
-        "Ação":           a["descricao"],
-        "Responsável":    a["responsavel_nome"],
-        "Prazo":          a["prazo"],
-        "Status":         a["status"],
-        "Comentários":    a.get("comentarios",""),
-        "Data Conclusão": a.get("data_conclusao",""),
-    })
-
-df = pd.DataFrame(rows)
-if df.empty:
+COLUNAS_PAINEL = (
+    "id, descricao, responsavel_nome, prazo, status, comentarios, data_conclusao, "
+    "ocorrencias(area_setor, ocorrencia, classificacao), paradas(nome)"
+)
+# os agregados dependem dos filtros, a evolução semanal não: as duas leituras vão juntas
+leituras  = db_async.ler_em_paralelo(agregados=db_async.painel_agregados(filtros),
+                                     resumos=db_async.listar_resumos_semanais())
+agregados = leituras["agregados"]
+
+total = agregados.get("total", 0)
+if not total:
     st.info("Nenhuma ação encontrada com os filtros aplicados.")
     st.stop()
 
-df["Prazo"]          = pd.to_datetime(df["Prazo"]).dt.date
-df["dias_restantes"] = df["Prazo"].apply(lambda p: (p - date.today()).days)
-df["vencida"]        = (df["dias_restantes"] < 0)  & (df["Status"].isin(["pendente","em_andamento"]))
-df["vence_em_breve"] = (df["dias_restantes"] >= 0) & (df["dias_restantes"] <= 3) & (df["Status"].isin(["pendente","em_andamento"]))
-
-total        = len(df)
-pendentes    = len(df[df["Status"] == "pendente"])
-em_andamento = len(df[df["Status"] == "em_andamento"])
-concluidas   = len(df[df["Status"] == "concluido"])
-vencidas     = len(df[df["vencida"]])
+por_status   = agregados.get("por_status") or {}
+pendentes    = por_status.get("pendente", 0)
+em_andamento = por_status.get("em_andamento", 0)
+concluidas   = por_status.get("concluido", 0)
+vencidas     = agregados.get("vencidas", 0)
 
 c1, c2, c3, c4, c5 = st.columns(5)
 for col, label, valor, cor in [
@@ -121,15 +112,14 @@ STATUS_MAP = {"pendente":"Pendente","em_andamento":"Em Andamento",
 
 cg1, cg2 = st.columns(2)
 with cg1:
-    df_s = df["Status"].value_counts().reset_index()
-    df_s.columns = ["Status","Qtd"]
+    df_s = pd.DataFrame(list(por_status.items()), columns=["Status","Qtd"])
     df_s["Status"] = df_s["Status"].map(STATUS_MAP).fillna(df_s["Status"])
     fig = px.pie(df_s, names="Status", values="Qtd", title="Distribuição por Status",
                  color_discrete_sequence=["#1565C0","#E65100","#2E7D32","#616161"])
     st.plotly_chart(fig, use_container_width=True)
 
 with cg2:
-    df_p = df["Projeto"].value_counts().reset_index()
+    df_p = pd.DataFrame(agregados.get("por_projeto") or [], columns=["projeto","qtd"])
     df_p.columns = ["Projeto","Ações"]
     fig = px.bar(df_p, x="Projeto", y="Ações", title="Ações por Projeto",
                  color_discrete_sequence=["#1B3A6B"])
@@ -137,18 +127,17 @@ with cg2:
 
 cg3, cg4 = st.columns(2)
 with cg3:
-    df_r = df["Responsável"].value_counts().reset_index()
+    df_r = pd.DataFrame(agregados.get("por_responsavel") or [], columns=["responsavel","qtd"])
     df_r.columns = ["Responsável","Ações"]
     fig = px.bar(df_r, x="Ações", y="Responsável", orientation="h",
                  title="Ações por Responsável", color_discrete_sequence=["#E87722"])
     st.plotly_chart(fig, use_container_width=True)
 
 with cg4:
-    df_c = df[df["Status"] == "concluido"].copy()
+    df_c = pd.DataFrame(agregados.get("conclusoes") or [], columns=["data","qtd","acumulado"])
     if not df_c.empty:
-        df_c["Data Conclusão"] = pd.to_datetime(df_c["Data Conclusão"], errors="coerce")
-        df_c = df_c.dropna(subset=["Data Conclusão"]).sort_values("Data Conclusão")
-        df_c["Acumulado"] = range(1, len(df_c)+1)
+        df_c["data"] = pd.to_datetime(df_c["data"])
+        df_c.columns = ["Data Conclusão","Qtd","Acumulado"]
         fig = px.line(df_c, x="Data Conclusão", y="Acumulado",
                       title="Conclusões ao Longo do Tempo",
                       color_discrete_sequence=["#28A745"])
@@ -156,28 +145,55 @@ with cg4:
     else:
         st.info("Nenhuma ação concluída ainda.")
 
+resumos = leituras["resumos"]
+if resumos:
+    with st.expander("📈 Evolução Semanal (todas as paradas)", expanded=False):
+        df_t = pd.DataFrame([{"Semana": r["semana"], **r["dados"]} for r in resumos])
+        df_t = df_t.rename(columns={"pendentes":"Pendentes","em_andamento":"Em Andamento",
+                                    "concluidas_semana":"Concluídas na Semana","vencidas":"Vencidas"})
+        fig = px.line(df_t, x="Semana",
+                      y=["Pendentes","Em Andamento","Concluídas na Semana","Vencidas"],
+                      markers=True, color_discrete_sequence=["#1565C0","#E65100","#28A745","#DC3545"])
+        st.plotly_chart(fig, use_container_width=True)
+
 st.markdown("---")
 st.markdown("### 📋 Tabela de Ações")
 
-GUT_BADGE    = {"alto":"🔴 Alto","medio":"🟡 Médio","baixo":"🟢 Baixo","":  "—", None: "—"}
-STATUS_LABEL = {"pendente":"🔵 Pendente","em_andamento":"🟠 Em Andamento",
-                "concluido":"🟢 Concluído","cancelado":"⚫ Cancelado"}
-
-def highlight_row(row):
-    if row["vencida"]:        return ["background-color:#FFEAEA"] * len(row)
-    elif row["vence_em_breve"]:return ["background-color:#FFF8E1"] * len(row)
-    return [""] * len(row)
+c_tam, c_info, c_ant, c_prox = st.columns([2,4,1,1])
+tam_pagina = c_tam.selectbox("Linhas por página", [25, 50, 100], index=1, key="painel_tam")
+
+# keyset: guardamos o cursor de início de cada página visitada; mudar filtros/tamanho volta ao início
+assinatura = repr((sorted(filtros.items()), tam_pagina))
+if st.session_state.get("painel_assinatura") != assinatura:
+    st.session_state["painel_assinatura"] = assinatura
+    st.session_state["painel_cursores"]   = [None]
+cursores = st.session_state["painel_cursores"]
+
+pagina  = listar_acoes_pagina(filtros, colunas=COLUNAS_PAINEL, cursor=cursores[-1], limite=tam_pagina)
+df_exib = preparar_acoes(pagina["acoes"])
+if df_exib.empty and len(cursores) > 1:
+    st.session_state["painel_cursores"] = [None]
+    st.rerun()
+c_info.markdown(f"<br>Página **{len(cursores)}** · {len(df_exib)} de {total} ação(ões)", unsafe_allow_html=True)
+with c_ant:
+    st.markdown("<br>", unsafe_allow_html=True)
+    if st.button("◀️", disabled=len(cursores) == 1, use_container_width=True):
+        cursores.pop()
+        st.rerun()
+with c_prox:
+    st.markdown("<br>", unsafe_allow_html=True)
+    if st.button("▶️", disabled=pagina["proximo_cursor"] is None, use_container_width=True):
+        cursores.append(pagina["proximo_cursor"])
+        st.rerun()
 
-df_exib = df.copy()
-df_exib["GUT"]           = df_exib["GUT_nivel"].map(GUT_BADGE).fillna("—")
-df_exib["Dias Restantes"]= df_exib["dias_restantes"].apply(lambda d: f"{'⚠️ ' if d<0 else ''}{d}d")
-df_exib["Status_label"]  = df_exib["Status"].map(STATUS_LABEL).fillna(df_exib["Status"])
+df_exib = preparar_exibicao(df_exib)
 
 colunas = ["Projeto","Área/Setor","Ocorrência","GUT","Ação","Responsável",
            "Prazo","Dias Restantes","Status_label","vencida","vence_em_breve"]
-df_styled = df_exib[colunas].style.apply(highlight_row, axis=1)
+df_styled = df_exib[colunas].style.apply(estilos_linhas, axis=None)
 st.dataframe(df_styled, use_container_width=True, hide_index=True,
              column_config={"vencida": None, "vence_em_breve": None,
+                            "Prazo": st.column_config.DateColumn("Prazo", format="DD/MM/YYYY"),
                             "Status_label": st.column_config.TextColumn("Status")})
 
 st.markdown("---")
@@ -186,38 +202,43 @@ st.markdown("### ✏️ Atualizar Status de Ação")
 if perfil == "gestor":
     st.info("👁️ Perfil Gestor: acesso somente leitura.")
 else:
-    opcoes_acoes = {
-        f"{r['Ação'][:60]} — {r['Responsável']}": r["id"]
-        for _, r in df_exib.iterrows()
-    }
-    acao_sel_label = st.selectbox("Selecione a ação", list(opcoes_acoes.keys()))
-    acao_id_sel    = opcoes_acoes[acao_sel_label]
-    acao_atual     = df[df["id"] == acao_id_sel].iloc[0]
-
-    with st.form("form_atualizar"):
-        cs, cc = st.columns([2,4])
-        novo_status = cs.selectbox(
-            "Novo Status",
-            ["pendente","em_andamento","concluido","cancelado"],
-            index=["pendente","em_andamento","concluido","cancelado"].index(acao_atual["Status"]),
-            format_func=lambda x: STATUS_LABEL.get(x, x),
-        )
-        comentario  = cc.text_area("Comentário (opcional)")
-        submitted   = st.form_submit_button("💾 Salvar Atualização", type="primary")
-
-    if submitted:
-        atualizar_acao(acao_id_sel, novo_status, comentario.strip() or None)
-        usuarios_pmo = listar_usuarios(perfil=["pmo","admin"])
-        for u in usuarios_pmo:
-            notificar_atualizacao_status(
-                email_pmo        = u["email"],
-                nome_pmo         = u["nome"],
+    busca = st.text_input("🔎 Buscar ação", placeholder="Digite parte da descrição da ação")
+    encontradas = listar_acoes_pagina(filtros, colunas=COLUNAS_PAINEL,
+                                      busca=busca.strip() or None, limite=50)["acoes"]
+    if not encontradas:
+        st.info("Nenhuma ação encontrada para a busca.")
+    else:
+        opcoes_acoes = {
+            f"{a['descricao'][:60]} — {a['responsavel_nome']}": a
+            for a in encontradas
+        }
+        acao_sel_label = st.selectbox("Selecione a ação", list(opcoes_acoes.keys()),
+                                      help="Mostra até 50 ações; refine a busca para encontrar outras.")
+        acao_atual     = opcoes_acoes[acao_sel_label]
+        acao_id_sel    = acao_atual["id"]
+
+        with st.form("form_atualizar"):
+            cs, cc = st.columns([2,4])
+            novo_status = cs.selectbox(
+                "Novo Status",
+                ["pendente","em_andamento","concluido","cancelado"],
+                index=["pendente","em_andamento","concluido","cancelado"].index(acao_atual["status"]),
+                format_func=lambda x: STATUS_LABEL.get(x, x),
+            )
+            comentario  = cc.text_area("Comentário (opcional)")
+            submitted   = st.form_submit_button("💾 Salvar Atualização", type="primary")
+
+        if submitted:
+            atualizar_acao(acao_id_sel, novo_status, comentario.strip() or None)
+            notificar_atualizacao_status_agrupado(
+                destinatarios    = listar_usuarios(perfil=["pmo","admin"]),
+                acao_id          = acao_id_sel,
                 responsavel_nome = usuario["nome"],
-                acao             = acao_atual["Ação"],
-                status_anterior  = acao_atual["Status"],
+                acao             = acao_atual["descricao"],
+                status_anterior  = acao_atual["status"],
                 novo_status      = novo_status,
                 comentario       = comentario.strip(),
-                projeto          = acao_atual["Projeto"],
+                projeto          = (acao_atual.get("paradas") or {}).get("nome",""),
             )
-        st.success("✅ Status atualizado e PMO notificado!")
-        st.rerun()
+            st.success("✅ Status atualizado! O PMO receberá as mudanças no próximo resumo de status.")
+            st.rerun()
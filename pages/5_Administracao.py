@@ -2,8 +2,12 @@ import streamlit as st
 from datetime import date
 from utils.auth import verificar_permissao, usuario_logado
 from utils.supabase_client import get_supabase, get_supabase_admin
-from utils.db_queries import listar_contratos, listar_paradas, listar_usuarios
+from utils.db_queries import listar_contratos, listar_paradas, listar_usuarios, reclassificar_contrato
+from utils.gut_calculator import limites_do_contrato
+from utils.cache import invalidar
 from utils.notifications import notificar_avanco_fase
+from utils.fila_email import get_fila_email
+from utils.instrumentacao import instrumentar_pagina
 
 STYLE = """
 <style>
@@ -16,6 +20,7 @@ STYLE = """
 """
 
 st.set_page_config(page_title="Administração", page_icon="⚙️", layout="wide")
+instrumentar_pagina("administracao")
 st.markdown(STYLE, unsafe_allow_html=True)
 verificar_permissao(["admin","pmo"])
 
@@ -25,7 +30,7 @@ perfil  = usuario.get("perfil")
 with st.sidebar:
     st.markdown("### ⚙️ Administração")
     st.markdown("---")
-    aba = st.radio("Módulo", ["👤 Usuários","📄 Contratos","🏗️ Paradas"],
+    aba = st.radio("Módulo", ["👤 Usuários","📄 Contratos","🏗️ Paradas","📬 Fila de E-mails"],
                    label_visibility="collapsed")
 
 st.markdown("""
@@ -100,6 +105,7 @@ if aba == "👤 Usuários":
                             "setor":  setor_nome.strip() or None,
                             "ativo":  True,
                         }).execute()
+                        invalidar("perfis_usuarios")
                         st.success(f"✅ Usuário **{nome}** criado! Perfil: **{perfil_novo.upper()}**")
                     except Exception as e:
                         st.error(f"❌ Erro ao criar usuário: {e}")
@@ -129,6 +135,7 @@ if aba == "👤 Usuários":
                     get_supabase().table("perfis_usuarios").update(
                         {"ativo": not u["ativo"]}
                     ).eq("id", u["id"]).execute()
+                    invalidar("perfis_usuarios")
                     st.rerun()
             st.divider()
 
@@ -154,6 +161,7 @@ if aba == "👤 Usuários":
                             "perfil": novo_perfil,
                             "setor":  novo_setor.strip() or None,
                         }).eq("id", u_edit["id"]).execute()
+                        invalidar("perfis_usuarios")
                         if nova_senha.strip():
                             if len(nova_senha) < 6:
                                 st.error("Senha deve ter no mínimo 6 caracteres.")
@@ -197,6 +205,7 @@ elif aba == "📄 Contratos":
                         "nome":        nome_c.strip(),
                         "responsavel": responsavel.strip(),
                     }).execute()
+                    invalidar("contratos")
                     st.success(f"✅ Contrato **{codigo.upper()}** cadastrado!")
                 except Exception as e:
                     if "unique" in str(e).lower():
@@ -215,13 +224,25 @@ elif aba == "📄 Contratos":
                 c2.markdown(f"**Responsável:** {c['responsavel']}")
                 c3.markdown(f"**Cadastrado em:** {str(c['criado_em'])[:10]}")
                 if perfil == "admin":
+                    limites_atuais = limites_do_contrato(c)
                     with st.form(f"edit_c_{c['id']}"):
                         e_nome = st.text_input("Nome",        value=c["nome"])
                         e_resp = st.text_input("Responsável", value=c["responsavel"])
+                        cl1, cl2 = st.columns(2)
+                        e_baixo = cl1.number_input("GUT: limite Baixo (até)", 1, 123, limites_atuais[0])
+                        e_medio = cl2.number_input("GUT: limite Médio (até)", 2, 124, limites_atuais[1])
                         if st.form_submit_button("💾 Salvar"):
+                            if e_baixo >= e_medio:
+                                st.error("O limite Baixo deve ser menor que o limite Médio.")
+                                st.stop()
                             get_supabase().table("contratos").update({
-                                "nome": e_nome.strip(), "responsavel": e_resp.strip()
+                                "nome": e_nome.strip(), "responsavel": e_resp.strip(),
+                                "gut_limite_baixo": int(e_baixo), "gut_limite_medio": int(e_medio),
                             }).eq("id", c["id"]).execute()
+                            invalidar("contratos", "paradas")
+                            if (e_baixo, e_medio) != limites_atuais:
+                                n = reclassificar_contrato(c["id"], (int(e_baixo), int(e_medio)))
+                                st.toast(f"🔬 {n} ocorrência(s) reclassificada(s) com os novos limites.")
                             st.success("✅ Atualizado!")
                             st.rerun()
 
@@ -272,6 +293,7 @@ elif aba == "🏗️ Paradas":
                         "status":      status_i,
                         "criado_por":  usuario["id"],
                     }).execute()
+                    invalidar("paradas")
                     st.success(f"✅ Parada **{nome_p}** cadastrada!")
                 except Exception as e:
                     st.error(f"❌ Erro: {e}")
@@ -307,6 +329,7 @@ elif aba == "🏗️ Paradas":
                             get_supabase().table("paradas").update(
                                 {"status": ant}
                             ).eq("id", p["id"]).execute()
+                            invalidar("paradas")
                             st.rerun()
 
                 with c_next:
@@ -317,6 +340,7 @@ elif aba == "🏗️ Paradas":
                             get_supabase().table("paradas").update(
                                 {"status": prox}
                             ).eq("id", p["id"]).execute()
+                            invalidar("paradas")
                             todos_emails = [u["email"] for u in listar_usuarios()]
                             notificar_avanco_fase(
                                 emails           = todos_emails,
@@ -342,5 +366,39 @@ elif aba == "🏗️ Paradas":
                                     "data_inicio": str(e_ini),
                                     "data_fim":    str(e_fim),
                                 }).eq("id", p["id"]).execute()
+                                invalidar("paradas")
                                 st.success("✅ Atualizado!")
                                 st.rerun()
+
+
+# ================================================================
+# FILA DE E-MAILS
+# ================================================================
+elif aba == "📬 Fila de E-mails":
+    verificar_permissao(["admin"])
+    st.markdown("## 📬 Fila de E-mails")
+    fila = get_fila_email()
+    m    = fila.metricas()
+
+    c1, c2, c3, c4, c5 = st.columns(5)
+    c1.metric("Na fila",             m["pendentes"])
+    c2.metric("Enviados (24h)",      m["enviados_janela"])
+    c3.metric("Com erro (24h)",      m["erros_janela"])
+    c4.metric("Latência média",      f"{m['latencia_media']:.1f}s")
+    c5.metric("Latência p95",        f"{m['latencia_p95']:.1f}s")
+
+    st.markdown("---")
+    st.markdown(f"### 🔴 Falhas definitivas ({m['falhas']})")
+    falhas = fila.listar_falhas()
+    if not falhas:
+        st.info("Nenhum e-mail na lista de falhas.")
+    else:
+        import pandas as pd
+        df_f = pd.DataFrame(falhas)
+        df_f["criado_em"] = pd.to_datetime(df_f["criado_em"], unit="s").dt.strftime("%d/%m/%Y %H:%M")
+        df_f.columns = ["ID","Destinatário","Assunto","Tentativas","Enfileirado em","Último Erro"]
+        st.dataframe(df_f, use_container_width=True, hide_index=True)
+        if st.button("🔁 Reenfileirar todas", type="primary"):
+            n = fila.reenfileirar()
+            st.success(f"✅ {n} e-mail(s) devolvido(s) à fila.")
+            st.rerun()
@@ -0,0 +1,27 @@
+-- Classificação GUT em lote: recebe [{id, gravidade, urgencia, tendencia, classificacao}, ...]
+-- e atualiza todas as ocorrências em um único round-trip. Retorna a quantidade de linhas escritas.
+create or replace function public.classificar_ocorrencias_lote(itens jsonb)
+returns integer
+language sql
+security invoker
+as $$
+  with dados as (
+    select (x->>'id')::uuid           as id,
+           (x->>'gravidade')::int     as gravidade,
+           (x->>'urgencia')::int      as urgencia,
+           (x->>'tendencia')::int     as tendencia,
+           x->>'classificacao'        as classificacao
+      from jsonb_array_elements(itens) as x
+  ),
+  atualizadas as (
+    update public.ocorrencias o
+       set gravidade     = d.gravidade,
+           urgencia      = d.urgencia,
+           tendencia     = d.tendencia,
+           classificacao = d.classificacao
+      from dados d
+     where o.id = d.id
+    returning 1
+  )
+  select count(*)::int from atualizadas;
+$$;
@@ -0,0 +1,2 @@
+-- Paginação keyset do Painel: ORDER BY prazo, id com cursor (prazo, id).
+create index if not exists acoes_prazo_id_idx on public.acoes (prazo, id);
@@ -0,0 +1,59 @@
+-- KPIs e séries do Painel agregados no banco. Os parâmetros espelham `filtros` de listar_acoes;
+-- nulo = sem filtro. Retorna um único jsonb com contagens e a série diária de conclusões.
+create or replace function public.painel_agregados(
+  p_parada_ids      uuid[] default null,
+  p_responsavel_ids uuid[] default null,
+  p_status          text[] default null,
+  p_gut_niveis      text[] default null,
+  p_prazo_inicio    date   default null,
+  p_prazo_fim       date   default null,
+  p_hoje            date   default current_date
+)
+returns jsonb
+language sql
+stable
+security invoker
+as $$
+  with base as (
+    select a.status, a.prazo, a.data_conclusao, a.responsavel_nome, p.nome as projeto
+      from public.acoes a
+      left join public.paradas     p on p.id = a.parada_id
+      left join public.ocorrencias o on o.id = a.ocorrencia_id
+     where (p_parada_ids      is null or a.parada_id      = any(p_parada_ids))
+       and (p_responsavel_ids is null or a.responsavel_id = any(p_responsavel_ids))
+       and (p_status          is null or a.status         = any(p_status))
+       and (p_gut_niveis      is null or o.classificacao  = any(p_gut_niveis))
+       and (p_prazo_inicio    is null or a.prazo         >= p_prazo_inicio)
+       and (p_prazo_fim       is null or a.prazo         <= p_prazo_fim)
+  ),
+  por_status as (
+    select status, count(*) as qtd from base group by status
+  ),
+  por_projeto as (
+    select coalesce(projeto, '') as projeto, count(*) as qtd from base group by 1
+  ),
+  por_responsavel as (
+    select coalesce(responsavel_nome, '') as responsavel, count(*) as qtd from base group by 1
+  ),
+  conclusoes as (
+    select data_conclusao as data, count(*) as qtd,
+           sum(count(*)) over (order by data_conclusao) as acumulado
+      from base
+     where status = 'concluido' and data_conclusao is not null
+     group by data_conclusao
+  )
+  select jsonb_build_object(
+    'total',           (select count(*) from base),
+    'vencidas',        (select count(*) from base
+                         where prazo < p_hoje and status in ('pendente', 'em_andamento')),
+    'vence_em_breve',  (select count(*) from base
+                         where prazo between p_hoje and p_hoje + 3 and status in ('pendente', 'em_andamento')),
+    'por_status',      coalesce((select jsonb_object_agg(status, qtd) from por_status), '{}'::jsonb),
+    'por_projeto',     coalesce((select jsonb_agg(jsonb_build_object('projeto', projeto, 'qtd', qtd)
+                                                  order by qtd desc) from por_projeto), '[]'::jsonb),
+    'por_responsavel', coalesce((select jsonb_agg(jsonb_build_object('responsavel', responsavel, 'qtd', qtd)
+                                                  order by qtd desc) from por_responsavel), '[]'::jsonb),
+    'conclusoes',      coalesce((select jsonb_agg(jsonb_build_object('data', data, 'qtd', qtd, 'acumulado', acumulado)
+                                                  order by data) from conclusoes), '[]'::jsonb)
+  );
+$$;
@@ -0,0 +1,57 @@
+-- Snapshot materializado do resumo semanal enviado ao PMO. Uma linha por semana
+-- (segunda-feira de início); o histórico alimenta os gráficos de tendência.
+create table if not exists public.resumos_semanais (
+  semana    date        primary key,
+  dados     jsonb       not null,
+  gerado_em timestamptz not null default now()
+);
+
+-- Calcula o resumo da semana que começa em p_semana com uma única varredura de acoes
+-- (mais as 10 ações mais atrasadas e as paradas ativas) e grava o snapshot.
+create or replace function public.gerar_resumo_semanal(p_semana date, p_hoje date default current_date)
+returns jsonb
+language plpgsql
+security invoker
+as $$
+declare
+  v_dados jsonb;
+begin
+  select jsonb_build_object(
+           'total_acoes',       count(*),
+           'pendentes',         count(*) filter (where status = 'pendente'),
+           'em_andamento',      count(*) filter (where status = 'em_andamento'),
+           'concluidas_semana', count(*) filter (where status = 'concluido'
+                                                   and data_conclusao >= p_semana
+                                                   and data_conclusao <  p_semana + 7),
+           'vencidas',          count(*) filter (where status in ('pendente', 'em_andamento')
+                                                   and prazo < p_hoje)
+         )
+    into v_dados
+    from public.acoes;
+
+  v_dados := v_dados || jsonb_build_object(
+    'acoes_vencidas', coalesce((
+      select jsonb_agg(jsonb_build_object('descricao',   a.descricao,
+                                          'projeto',     coalesce(p.nome, ''),
+                                          'dias_atraso', p_hoje - a.prazo) order by a.prazo)
+        from (select descricao, prazo, parada_id
+                from public.acoes
+               where status in ('pendente', 'em_andamento') and prazo < p_hoje
+               order by prazo
+               limit 10) a
+        left join public.paradas p on p.id = a.parada_id
+    ), '[]'::jsonb),
+    'paradas_ativas', coalesce((
+      select jsonb_agg(nome order by nome)
+        from public.paradas
+       where status in ('coleta', 'classificacao', 'plano_acao', 'monitoramento')
+    ), '[]'::jsonb)
+  );
+
+  insert into public.resumos_semanais (semana, dados)
+  values (p_semana, v_dados)
+  on conflict (semana) do update set dados = excluded.dados, gerado_em = now();
+
+  return v_dados;
+end;
+$$;
@@ -0,0 +1,13 @@
+-- Chave de idempotência das gravações em lote (db_queries.inserir_em_lotes).
+-- O insert é feito como upsert "on conflict do nothing" sobre a chave: reenviar um lote
+-- que já foi gravado (retentativa após timeout, duplo clique) não duplica linhas.
+-- NULLs não conflitam entre si, então as linhas antigas e as gravadas sem chave seguem valendo.
+alter table public.ocorrencias add column if not exists chave_idempotencia text;
+alter table public.acoes       add column if not exists chave_idempotencia text;
+
+-- índice único (e não constraint) para o arquivo poder rodar de novo; o "on conflict" do upsert
+-- o usa do mesmo jeito
+create unique index if not exists ocorrencias_chave_idempotencia_key
+    on public.ocorrencias (chave_idempotencia);
+create unique index if not exists acoes_chave_idempotencia_key
+    on public.acoes (chave_idempotencia);
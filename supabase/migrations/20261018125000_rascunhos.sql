@@ -0,0 +1,23 @@
+-- Rascunho do formulário do setor persistido no servidor, uma linha do banco por linha do
+-- rascunho: o autosave grava só as linhas alteradas (upsert) e apaga as removidas.
+create table if not exists public.rascunhos (
+  usuario_id      uuid        not null references public.perfis_usuarios (id) on delete cascade,
+  parada_id       uuid        not null references public.paradas (id) on delete cascade,
+  linha_id        text        not null,
+  ordem           integer     not null,
+  area_setor      text        not null default '',
+  fase            text        not null default '',
+  ocorrencia      text        not null default '',
+  impacto         text        not null default '',
+  licao_aprendida text        not null default '',
+  atualizado_em   timestamptz not null default now(),
+  primary key (usuario_id, parada_id, linha_id)
+);
+
+alter table public.rascunhos enable row level security;
+
+-- cada usuário só enxerga e grava o próprio rascunho
+create policy rascunhos_dono on public.rascunhos
+  for all
+  using (usuario_id = auth.uid())
+  with check (usuario_id = auth.uid());
@@ -0,0 +1,10 @@
+-- Limites GUT por contrato (utils/gut_calculator.LIMITES_PADRAO = 25/74 é o padrão):
+-- resultado <= gut_limite_baixo é "baixo", <= gut_limite_medio é "medio", acima é "alto".
+-- A classificação é calculada na aplicação (classificar_gut) e gravada em ocorrencias.classificacao.
+alter table public.contratos
+  add column if not exists gut_limite_baixo integer not null default 25,
+  add column if not exists gut_limite_medio integer not null default 74;
+
+alter table public.contratos
+  add constraint contratos_limites_gut_check
+  check (gut_limite_baixo >= 1 and gut_limite_baixo < gut_limite_medio and gut_limite_medio < 125);
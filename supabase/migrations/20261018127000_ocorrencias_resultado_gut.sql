@@ -0,0 +1,9 @@
+-- resultado_gut passa a ser mantido pelo banco (G × U × T; nulo enquanto não classificada),
+-- em vez de depender de quem grava a classificação. O índice atende a listagem priorizada
+-- por parada (db_queries.listar_ocorrencias_priorizadas) já na ordem, sem sort.
+alter table public.ocorrencias drop column if exists resultado_gut;
+alter table public.ocorrencias
+  add column resultado_gut integer generated always as (gravidade * urgencia * tendencia) stored;
+
+create index if not exists ocorrencias_parada_resultado_gut_idx
+  on public.ocorrencias (parada_id, resultado_gut desc nulls last, id);
@@ -0,0 +1,120 @@
+-- Resumo semanal incremental: contagens de acoes mantidas por trigger a cada
+-- insert/update/delete, agrupadas por (status, prazo, data_conclusao). O snapshot da
+-- semana soma essas contagens (uma linha por combinação, não por ação) em vez de varrer
+-- acoes; só as 10 ações mais atrasadas ainda vêm da tabela, pelo índice (prazo, id).
+create table if not exists public.resumo_acoes_contagens (
+  status         text    not null,
+  prazo          date,
+  data_conclusao date,
+  quantidade     integer not null,
+  unique nulls not distinct (status, prazo, data_conclusao)
+);
+
+create or replace function public.contar_acoes_resumo()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  if tg_op in ('UPDATE', 'DELETE') then
+    update public.resumo_acoes_contagens
+       set quantidade = quantidade - 1
+     where status = old.status
+       and prazo          is not distinct from old.prazo
+       and data_conclusao is not distinct from old.data_conclusao;
+  end if;
+  if tg_op in ('INSERT', 'UPDATE') then
+    insert into public.resumo_acoes_contagens (status, prazo, data_conclusao, quantidade)
+    values (new.status, new.prazo, new.data_conclusao, 1)
+    on conflict (status, prazo, data_conclusao)
+    do update set quantidade = resumo_acoes_contagens.quantidade + 1;
+  end if;
+  return null;
+end;
+$$;
+
+-- carga inicial e trigger sob o mesmo lock, para nenhuma escrita em acoes escapar da contagem
+lock table public.acoes in share row exclusive mode;
+
+truncate public.resumo_acoes_contagens;
+insert into public.resumo_acoes_contagens (status, prazo, data_conclusao, quantidade)
+select status, prazo, data_conclusao, count(*)
+  from public.acoes
+ group by status, prazo, data_conclusao;
+
+drop trigger if exists acoes_contagens_resumo on public.acoes;
+create trigger acoes_contagens_resumo
+  after insert or delete or update of status, prazo, data_conclusao on public.acoes
+  for each row execute function public.contar_acoes_resumo();
+
+create or replace function public.gerar_resumo_semanal(p_semana date, p_hoje date default current_date)
+returns jsonb
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  v_dados jsonb;
+begin
+  delete from public.resumo_acoes_contagens where quantidade = 0;
+
+  select jsonb_build_object(
+           'total_acoes',       coalesce(sum(quantidade), 0),
+           'pendentes',         coalesce(sum(quantidade) filter (where status = 'pendente'), 0),
+           'em_andamento',      coalesce(sum(quantidade) filter (where status = 'em_andamento'), 0),
+           'concluidas_semana', coalesce(sum(quantidade) filter (where status = 'concluido'
+                                                                   and data_conclusao >= p_semana
+                                                                   and data_conclusao <  p_semana + 7), 0),
+           'vencidas',          coalesce(sum(quantidade) filter (where status in ('pendente', 'em_andamento')
+                                                                   and prazo < p_hoje), 0)
+         )
+    into v_dados
+    from public.resumo_acoes_contagens;
+
+  v_dados := v_dados || jsonb_build_object(
+    'acoes_vencidas', coalesce((
+      select jsonb_agg(jsonb_build_object('descricao',   a.descricao,
+                                          'projeto',     coalesce(p.nome, ''),
+                                          'dias_atraso', p_hoje - a.prazo) order by a.prazo)
+        from (select descricao, prazo, parada_id
+                from public.acoes
+               where status in ('pendente', 'em_andamento') and prazo < p_hoje
+               order by prazo
+               limit 10) a
+        left join public.paradas p on p.id = a.parada_id
+    ), '[]'::jsonb),
+    'paradas_ativas', coalesce((
+      select jsonb_agg(nome order by nome)
+        from public.paradas
+       where status in ('coleta', 'classificacao', 'plano_acao', 'monitoramento')
+    ), '[]'::jsonb)
+  );
+
+  insert into public.resumos_semanais (semana, dados)
+  values (p_semana, v_dados)
+  on conflict (semana) do update set dados = excluded.dados, gerado_em = now();
+
+  return v_dados;
+end;
+$$;
+
+-- as funções security definer não ficam expostas por RPC: o trigger dispara sem depender de
+-- EXECUTE, e o snapshot só é gerado pelo agendador, com a service role
+revoke execute on function public.contar_acoes_resumo()                from public, anon, authenticated;
+revoke execute on function public.gerar_resumo_semanal(date, date)     from public, anon, authenticated;
+grant  execute on function public.gerar_resumo_semanal(date, date)     to service_role;
+
+-- snapshots e contagens só são gravados pelas funções acima; o histórico é lido só por PMO/admin
+alter table public.resumos_semanais       enable row level security;
+alter table public.resumo_acoes_contagens enable row level security;
+
+drop policy if exists resumos_semanais_leitura on public.resumos_semanais;
+create policy resumos_semanais_leitura on public.resumos_semanais
+  for select
+  to authenticated
+  using (exists (select 1
+                   from public.perfis_usuarios u
+                  where u.id = auth.uid()
+                    and u.perfil in ('pmo', 'admin')
+                    and u.ativo));
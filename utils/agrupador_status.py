@@ -0,0 +1,186 @@
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS eventos_status (
+    id                INTEGER PRIMARY KEY AUTOINCREMENT,
+    destinatario      TEXT NOT NULL,
+    nome              TEXT NOT NULL,
+    acao_id           TEXT NOT NULL,
+    acao              TEXT NOT NULL,
+    projeto           TEXT NOT NULL,
+    responsavel       TEXT NOT NULL,
+    status_anterior   TEXT NOT NULL,
+    novo_status       TEXT NOT NULL,
+    comentario        TEXT,
+    criado_em         REAL NOT NULL,
+    dono              TEXT,
+    reservado_ate     REAL
+);
+CREATE INDEX IF NOT EXISTS ix_eventos_status_dest ON eventos_status (destinatario, criado_em);
+"""
+
+# colunas acrescentadas depois da criação da tabela (arquivos SQLite já existentes)
+_COLUNAS_NOVAS = {"dono": "TEXT", "reservado_ate": "REAL"}
+
+
+def consolidar(eventos: list) -> list:
+    """Reduz os eventos (em ordem) a uma alteração por ação: primeiro status anterior → último status.
+
+    Ações que voltaram ao status de origem dentro da janela (ex.: pendente → em_andamento →
+    pendente) sem nenhum comentário são descartadas.
+    """
+    por_acao = {}
+    for ev in eventos:
+        alt = por_acao.get(ev["acao_id"])
+        if alt is None:
+            por_acao[ev["acao_id"]] = alt = {
+                "acao_id":         ev["acao_id"],
+                "status_anterior": ev["status_anterior"],
+                "responsaveis":    [],
+                "comentario":      None,
+            }
+        alt["acao"]        = ev["acao"]
+        alt["projeto"]     = ev["projeto"]
+        alt["novo_status"] = ev["novo_status"]
+        alt["comentario"]  = ev["comentario"] or alt["comentario"]
+        if ev["responsavel"] not in alt["responsaveis"]:
+            alt["responsaveis"].append(ev["responsavel"])
+    return [a for a in por_acao.values() if a["novo_status"] != a["status_anterior"] or a["comentario"]]
+
+
+class AgrupadorStatus:
+    """Acumula mudanças de status por destinatário e envia um único e-mail consolidado.
+
+    O primeiro evento pendente de um destinatário abre a janela; passados `janela` segundos,
+    todos os eventos dele são consolidados (`consolidar`) e entregues a
+    `enviar(destinatario, nome, alteracoes)`. Os eventos ficam em SQLite e sobrevivem a um
+    reinício do processo.
+
+    Antes do envio, os eventos do destinatário são reservados numa transação (dono e validade,
+    como em `FilaEmail`), então o app e o agendador descarregando o mesmo arquivo não enviam
+    o mesmo resumo duas vezes; uma reserva vencida (processo morreu no meio) volta a valer.
+    """
+
+    def __init__(self, caminho: str, enviar, janela: float = 300, iniciar: bool = True,
+                 validade_reserva: float = 300):
+        self.caminho          = caminho
+        self.janela           = janela
+        self.validade_reserva = validade_reserva
+        self.dono             = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._enviar          = enviar
+        self._lock            = threading.Lock()
+        self._parar           = threading.Event()
+        with self._conectar() as conn:
+            conn.executescript(_SCHEMA)
+            colunas = {r["name"] for r in conn.execute("PRAGMA table_info(eventos_status)")}
+            for coluna, tipo in _COLUNAS_NOVAS.items():
+                if coluna not in colunas:
+                    conn.execute(f"ALTER TABLE eventos_status ADD COLUMN {coluna} {tipo}")
+        self._thread = threading.Thread(target=self._loop, name="agrupador-status", daemon=True)
+        if iniciar:
+            self._thread.start()
+
+    @contextmanager
+    def _conectar(self):
+        conn = sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+        try:
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def registrar(self, destinatarios: list, acao_id: str, acao: str, projeto: str,
+                  responsavel: str, status_anterior: str, novo_status: str, comentario: str = None) -> int:
+        """Registra a mudança para cada `{"email", "nome"}`; retorna quantos eventos entraram."""
+        if status_anterior == novo_status and not comentario:
+            return 0
+        agora = time.time()
+        with self._lock, self._conectar() as conn:
+            conn.executemany(
+                "INSERT INTO eventos_status (destinatario, nome, acao_id, acao, projeto, responsavel, "
+                "status_anterior, novo_status, comentario, criado_em) VALUES (?,?,?,?,?,?,?,?,?,?)",
+                [(u["email"], u["nome"], str(acao_id), acao, projeto or "", responsavel,
+                  status_anterior, novo_status, comentario or None, agora) for u in destinatarios],
+            )
+        return len(destinatarios)
+
+    def descarregar(self, forcar: bool = False) -> int:
+        """Envia os resumos das janelas vencidas (ou de todas, com `forcar`); retorna quantos e-mails saíram."""
+        limite = float("inf") if forcar else time.time() - self.janela
+        with self._lock, self._conectar() as conn:
+            vencidos = [r[0] for r in conn.execute(
+                "SELECT destinatario FROM eventos_status WHERE reservado_ate IS NULL OR reservado_ate<? "
+                "GROUP BY destinatario HAVING MIN(criado_em)<=?",
+                (time.time(), limite),
+            ).fetchall()]
+        enviados = 0
+        for destinatario in vencidos:
+            eventos = self._reservar(destinatario)
+            if not eventos:
+                continue
+            ids        = [e["id"] for e in eventos]
+            alteracoes = consolidar(eventos)
+            if alteracoes:
+                try:
+                    self._enviar(destinatario, eventos[-1]["nome"], alteracoes)
+                except Exception:
+                    log.exception("Falha ao enviar o resumo de status para %s", destinatario)
+                    self._liberar(ids)
+                    continue
+                enviados += 1
+            with self._lock, self._conectar() as conn:
+                conn.execute(f"DELETE FROM eventos_status WHERE dono=? AND id IN ({','.join('?' * len(ids))})",
+                             [self.dono] + ids)
+        return enviados
+
+    def _reservar(self, destinatario: str) -> list:
+        """Marca como deste processo os eventos livres (ou com reserva vencida) do destinatário."""
+        agora = time.time()
+        with self._lock, self._conectar() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            eventos = [dict(r) for r in conn.execute(
+                "SELECT * FROM eventos_status WHERE destinatario=? "
+                "AND (reservado_ate IS NULL OR reservado_ate<?) ORDER BY id",
+                (destinatario, agora),
+            ).fetchall()]
+            if eventos:
+                conn.execute(
+                    "UPDATE eventos_status SET dono=?, reservado_ate=? "
+                    f"WHERE id IN ({','.join('?' * len(eventos))})",
+                    [self.dono, agora + self.validade_reserva] + [e["id"] for e in eventos],
+                )
+            conn.execute("COMMIT")
+        return eventos
+
+    def _liberar(self, ids: list):
+        with self._lock, self._conectar() as conn:
+            conn.execute("UPDATE eventos_status SET dono=NULL, reservado_ate=NULL "
+                         f"WHERE dono=? AND id IN ({','.join('?' * len(ids))})", [self.dono] + ids)
+
+    def pendentes(self) -> int:
+        with self._conectar() as conn:
+            return conn.execute("SELECT COUNT(*) FROM eventos_status").fetchone()[0]
+
+    def _loop(self):
+        while not self._parar.wait(timeout=min(self.janela, 30)):
+            try:
+                self.descarregar()
+            except Exception:
+                log.exception("Erro no agrupador de status")
+
+    def parar(self):
+        self._parar.set()
@@ -0,0 +1,140 @@
+import inspect
+import threading
+import time
+from functools import wraps
+from utils import supabase_client
+
+# TTL (segundos) por tabela; uma leitura que depende de várias tabelas usa o menor TTL entre elas.
+TTL_POR_TABELA = {
+    "contratos":        600,
+    "perfis_usuarios":  300,
+    "paradas":          120,
+    "ocorrencias":      60,
+    "acoes":            30,
+    "resumos_semanais": 3600,
+}
+TTL_PADRAO = 60
+MAX_ENTRADAS = 1024
+
+_lock       = threading.RLock()
+_entradas   = {}   # chave -> (expira_em, valor)
+_por_tabela = {}   # tabela -> {chave, ...}
+_contadores = {}   # nome da função -> {"hits": n, "misses": n}
+_geracao    = {}   # tabela -> nº de invalidações; evita gravar um resultado lido antes de uma escrita
+
+
+def _contar(nome: str, campo: str):
+    _contadores.setdefault(nome, {"hits": 0, "misses": 0})[campo] += 1
+
+
+def _identidade() -> str:
+    """Quem lê: o `Authorization` do cliente Supabase da sessão (o anônimo, fora de uma sessão).
+
+    As leituras passam pelas políticas RLS de quem está logado, então o mesmo argumento pode
+    ter resultados diferentes por usuário; a identidade entra na chave do cache.
+    """
+    return supabase_client.get_supabase().options.headers.get("Authorization", "")
+
+
+def cache_leitura(*tabelas: str, ttl: float = None):
+    """Decora uma função de leitura de `db_queries`, cacheando o resultado por argumentos.
+
+    `tabelas` são todas as tabelas lidas (inclusive as embutidas no select) — qualquer
+    `invalidar` em uma delas descarta a entrada. A chave inclui o usuário (`_identidade`):
+    sessões do mesmo usuário compartilham o valor cacheado, que não deve ser modificado por
+    quem o recebe. Funciona também com funções `async` (`utils.db_async`): a chave é montada
+    na chamada, na thread da sessão, e é o nome da função, então a variante async de uma
+    leitura compartilha as entradas da versão síncrona de mesmo nome.
+    """
+    validade = ttl if ttl is not None else min(TTL_POR_TABELA.get(t, TTL_PADRAO) for t in tabelas)
+
+    def decorador(func):
+        nome = func.__name__
+
+        def consultar(args, kwargs):
+            chave = (nome, _identidade(), repr(args), repr(sorted(kwargs.items())))
+            agora = time.monotonic()
+            with _lock:
+                entrada = _entradas.get(chave)
+                if entrada and entrada[0] > agora:
+                    _contar(nome, "hits")
+                    return True, entrada[1], None
+                _contar(nome, "misses")
+                return False, None, (chave, agora, [_geracao.get(t, 0) for t in tabelas])
+
+        def guardar(estado, valor):
+            chave, agora, geracao = estado
+            with _lock:
+                if geracao == [_geracao.get(t, 0) for t in tabelas]:
+                    if len(_entradas) >= MAX_ENTRADAS:
+                        _podar(agora)
+                    _entradas[chave] = (agora + validade, valor)
+                    for t in tabelas:
+                        _por_tabela.setdefault(t, set()).add(chave)
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                achou, valor, estado = consultar(args, kwargs)
+
+                async def ler():
+                    if achou:
+                        return valor
+                    lido = await func(*args, **kwargs)
+                    guardar(estado, lido)
+                    return lido
+                return ler()
+        else:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                achou, valor, estado = consultar(args, kwargs)
+                if achou:
+                    return valor
+                valor = func(*args, **kwargs)
+                guardar(estado, valor)
+                return valor
+
+        wrapper.tabelas = tabelas
+        return wrapper
+    return decorador
+
+
+def _podar(agora: float):
+    vencidas = [k for k, (expira, _) in _entradas.items() if expira <= agora]
+    if not vencidas:
+        vencidas = sorted(_entradas, key=lambda k: _entradas[k][0])[:len(_entradas) // 4]
+    for k in vencidas:
+        del _entradas[k]
+    for chaves in _por_tabela.values():
+        chaves.difference_update(vencidas)
+
+
+def invalidar(*tabelas: str):
+    """Descarta as leituras cacheadas que dependem de qualquer uma das tabelas."""
+    with _lock:
+        for t in tabelas:
+            _geracao[t] = _geracao.get(t, 0) + 1
+            for chave in _por_tabela.pop(t, set()):
+                _entradas.pop(chave, None)
+
+
+def limpar():
+    with _lock:
+        _entradas.clear()
+        _por_tabela.clear()
+        _geracao.clear()
+
+
+def estatisticas() -> dict:
+    """Hits/misses por função de leitura, mais o total de entradas vivas."""
+    with _lock:
+        por_funcao = {nome: dict(c) for nome, c in _contadores.items()}
+        hits   = sum(c["hits"]   for c in por_funcao.values())
+        misses = sum(c["misses"] for c in por_funcao.values())
+        return {
+            "hits":       hits,
+            "misses":     misses,
+            "taxa_acerto": hits / (hits + misses) if hits + misses else 0.0,
+            "entradas":   len(_entradas),
+            "por_funcao": por_funcao,
+        }
@@ -0,0 +1,116 @@
+import asyncio
+import contextvars
+import threading
+import httpx
+import streamlit as st
+from supabase import AsyncClient
+from utils import supabase_client
+from utils.cache import cache_leitura
+from utils.instrumentacao import execucao_atual, vincular
+from utils.db_queries import (
+    _consulta_paradas, _consulta_usuarios, _consulta_ocorrencias_priorizadas,
+    _consulta_acoes_por_parada, _agrupar_por_ocorrencia, _consulta_painel_agregados,
+    _consulta_resumos_semanais,
+)
+
+# Variantes assíncronas das leituras de `utils.db_queries` que as páginas fazem juntas.
+# Mesmas consultas (`_consulta_*`), mesmo cache (`cache_leitura` com o mesmo nome) — só o
+# `.execute()` é aguardado. As páginas não usam asyncio diretamente: `ler_em_paralelo` roda
+# as corrotinas num laço de eventos próprio, numa thread, e devolve todos os resultados.
+
+_CHAVE_CLIENTE = "_supabase_async_cliente"
+
+# cliente da sessão que chamou `ler_em_paralelo`, visto pelas leituras que rodam no laço
+_CLIENTE = contextvars.ContextVar("supabase_async_cliente", default=None)
+
+
+@st.cache_resource
+def _laco() -> asyncio.AbstractEventLoop:
+    laco = asyncio.new_event_loop()
+    threading.Thread(target=laco.run_forever, name="supabase-async", daemon=True).start()
+    return laco
+
+
+@st.cache_resource
+def _http() -> httpx.AsyncClient:
+    """Pool de conexões dos clientes assíncronos de todas as sessões, usado só no laço de `_laco`."""
+    return supabase_client.criar_http_async()
+
+
+def get_supabase() -> AsyncClient:
+    """Cliente assíncrono desta sessão, criado no laço de `_laco` e guardado em `st.session_state`.
+
+    Como no síncrono (`supabase_client.get_supabase`), é um cliente por sessão: a cada chamada
+    ele recebe o `Authorization` atual do cliente síncrono da mesma sessão, então as leituras
+    seguem as políticas RLS do usuário logado nela, e não as de outra sessão.
+    """
+    cliente = st.session_state.get(_CHAVE_CLIENTE)
+    if cliente is None:
+        cliente = st.session_state[_CHAVE_CLIENTE] = asyncio.run_coroutine_threadsafe(
+            supabase_client.criar_supabase_async(_http()), _laco()).result()
+    autorizacao = supabase_client.get_supabase().options.headers.get("Authorization")
+    if autorizacao and cliente.postgrest.headers.get("Authorization") != autorizacao:
+        cliente.postgrest.headers["Authorization"] = autorizacao
+    return cliente
+
+
+def _cliente() -> AsyncClient:
+    return _CLIENTE.get()
+
+
+def ler_em_paralelo(**leituras) -> dict:
+    """Executa leituras independentes ao mesmo tempo; retorna `{nome: resultado}`.
+
+        r = ler_em_paralelo(paradas=db_async.listar_paradas(), usuarios=db_async.listar_usuarios())
+
+    O tempo total é o da leitura mais lenta, não a soma. Se alguma falhar, a exceção é
+    levantada aqui (as demais já terão terminado).
+    """
+    execucao = execucao_atual()
+    cliente  = get_supabase()
+
+    async def juntar():
+        vincular(execucao)
+        _CLIENTE.set(cliente)
+        resultados = await asyncio.gather(*leituras.values(), return_exceptions=True)
+        return dict(zip(leituras, resultados))
+
+    resultados = asyncio.run_coroutine_threadsafe(juntar(), _laco()).result()
+    for r in resultados.values():
+        if isinstance(r, BaseException):
+            raise r
+    return resultados
+
+
+# ================================================================
+# LEITURAS
+# ================================================================
+@cache_leitura("paradas", "contratos")
+async def listar_paradas(status=None) -> list:
+    return (await _consulta_paradas(_cliente(), status).execute()).data or []
+
+
+@cache_leitura("perfis_usuarios")
+async def listar_usuarios(perfil=None) -> list:
+    return (await _consulta_usuarios(_cliente(), perfil).execute()).data or []
+
+
+@cache_leitura("ocorrencias")
+async def listar_ocorrencias_priorizadas(parada_id: str, limite: int = 20, offset: int = 0) -> dict:
+    resp = await _consulta_ocorrencias_priorizadas(_cliente(), parada_id, limite, offset).execute()
+    return {"ocorrencias": resp.data or [], "total": resp.count or 0}
+
+
+@cache_leitura("acoes")
+async def listar_acoes_por_parada(parada_id: str) -> dict:
+    return _agrupar_por_ocorrencia((await _consulta_acoes_por_parada(_cliente(), parada_id).execute()).data)
+
+
+@cache_leitura("acoes", "ocorrencias", "paradas")
+async def painel_agregados(filtros: dict = None) -> dict:
+    return (await _consulta_painel_agregados(_cliente(), filtros).execute()).data or {}
+
+
+@cache_leitura("resumos_semanais")
+async def listar_resumos_semanais(limite: int = 52) -> list:
+    return list(reversed((await _consulta_resumos_semanais(_cliente(), limite).execute()).data or []))
@@ -1,10 +1,98 @@
-from utils.supabase_client import get_supabase
-from datetime import date
+from utils.supabase_client import get_supabase, get_supabase_admin
+from utils.gut_calculator import calcular_gut, classificar_gut, classificar_dataframe, LIMITES_PADRAO
+from utils.cache import cache_leitura, invalidar
+from datetime import date, datetime, timedelta, timezone
+import re
+import time
+import uuid
+import httpx
+import pandas as pd
+from postgrest.exceptions import APIError
+
+
+# ================================================================
+# GRAVAÇÃO EM LOTES
+# ================================================================
+# erros do Postgres/PostgREST que valem nova tentativa: timeout de statement, conflito de
+# serialização, deadlock, conexões esgotadas e falha do PostgREST em alcançar o banco
+CODIGOS_TRANSITORIOS = {"57014", "40001", "40P01", "53300", "08000", "08003", "08006",
+                        "PGRST000", "PGRST001", "PGRST003"}
+
+
+class ErroGravacaoEmLote(Exception):
+    """Um lote falhou após todas as tentativas; `inseridas`/`lotes` trazem o que já foi gravado.
+
+    Como cada linha leva uma chave de idempotência, repetir a chamada com a mesma `chave` (ou as
+    mesmas chaves por linha) completa a gravação sem duplicar o que já entrou.
+    """
+
+    def __init__(self, mensagem: str, inseridas: list, lotes: list):
+        super().__init__(mensagem)
+        self.inseridas = inseridas
+        self.lotes     = lotes
+
+
+def _erro_transitorio(e: Exception) -> bool:
+    if isinstance(e, httpx.TransportError):
+        return True
+    if isinstance(e, APIError):
+        return str(e.code) in CODIGOS_TRANSITORIOS or str(e.code).startswith("5")
+    return False
+
+
+def inserir_em_lotes(tabela: str, linhas: list, chave: str = None, tamanho_lote: int = 500,
+                     tentativas: int = 4, backoff: float = 0.5) -> dict:
+    """Insere `linhas` em lotes de `tamanho_lote`, com nova tentativa e backoff exponencial.
+
+    Cada linha recebe `chave_idempotencia` (`"{chave}:{i}"`; linhas que já trazem a sua são
+    mantidas) e o lote é gravado como upsert que ignora chaves existentes — uma retentativa após
+    timeout não duplica nada. Sem `chave`, ela é gerada para esta chamada: linhas iguais nunca
+    se descartam entre si, mas só a mesma chamada é idempotente; para repetir um envio após uma
+    falha, passe a mesma `chave` (ex.: guardada em `st.session_state` até o envio dar certo).
+    Retorna `{"inseridas": [...], "lotes": [{"linhas", "inseridas", "tentativas", "segundos"}, ...]}`
+    — `inseridas` só traz as linhas novas, não as que já estavam gravadas.
+    """
+    sb        = get_supabase()
+    chave     = chave or uuid.uuid4().hex
+    inseridas = []
+    lotes     = []
+    try:
+        for inicio in range(0, len(linhas), tamanho_lote):
+            lote = [
+                {**l, "chave_idempotencia": l.get("chave_idempotencia") or f"{chave}:{inicio + i}"}
+                for i, l in enumerate(linhas[inicio:inicio + tamanho_lote])
+            ]
+            t0 = time.perf_counter()
+            for tentativa in range(1, tentativas + 1):
+                try:
+                    resp = sb.table(tabela).upsert(
+                        lote, on_conflict="chave_idempotencia", ignore_duplicates=True,
+                    ).execute()
+                    break
+                except Exception as e:
+                    if tentativa == tentativas or not _erro_transitorio(e):
+                        raise ErroGravacaoEmLote(
+                            f"Falha ao gravar {tabela} (linhas {inicio + 1}–{inicio + len(lote)}): {e}",
+                            inseridas, lotes,
+                        ) from e
+                    time.sleep(backoff * 2 ** (tentativa - 1))
+            inseridas.extend(resp.data or [])
+            lotes.append({
+                "linhas":     len(lote),
+                "inseridas":  len(resp.data or []),
+                "tentativas": tentativa,
+                "segundos":   time.perf_counter() - t0,
+            })
+    finally:
+        if lotes:
+            invalidar(tabela)
+    return {"inseridas": inseridas, "lotes": lotes}
 
 
 # ================================================================
 # CONTRATOS
 # ================================================================
+@cache_leitura("contratos")
 def listar_contratos() -> list:
     sb = get_supabase()
     return sb.table("contratos").select("*").order("criado_em", desc=True).execute().data or []
@@ -13,33 +101,43 @@ def listar_contratos() -> list:
 def criar_contrato(dados: dict) -> dict:
     sb = get_supabase()
     resp = sb.table("contratos").insert(dados).execute()
+    invalidar("contratos")
     return resp.data[0] if resp.data else {}
 
 
 # ================================================================
 # PARADAS
 # ================================================================
-def listar_paradas(status=None) -> list:
-    sb = get_supabase()
-    q  = sb.table("paradas").select("*, contratos(codigo, nome)")
+# As consultas `_consulta_*` montam a requisição sem executá-la: servem ao cliente síncrono
+# daqui e ao assíncrono de `utils.db_async`, que só trocam o `.execute()`.
+def _consulta_paradas(sb, status=None):
+    q = sb.table("paradas").select("*, contratos(codigo, nome, gut_limite_baixo, gut_limite_medio)")
     if status:
         if isinstance(status, list):
             q = q.in_("status", status)
         else:
             q = q.eq("status", status)
-    return q.order("criado_em", desc=True).execute().data or []
+    return q.order("criado_em", desc=True)
+
+
+@cache_leitura("paradas", "contratos")
+def listar_paradas(status=None) -> list:
+    return _consulta_paradas(get_supabase(), status).execute().data or []
 
 
 def criar_parada(dados: dict) -> dict:
     sb = get_supabase()
     resp = sb.table("paradas").insert(dados).execute()
+    invalidar("paradas")
     return resp.data[0] if resp.data else {}
 
 
 def atualizar_status_parada(parada_id: str, novo_status: str):
     get_supabase().table("paradas").update({"status": novo_status}).eq("id", parada_id).execute()
+    invalidar("paradas")
 
 
+@cache_leitura("paradas", "contratos")
 def get_parada(parada_id: str) -> dict:
     resp = get_supabase().table("paradas").select("*, contratos(codigo, nome)").eq("id", parada_id).single().execute()
     return resp.data or {}
@@ -48,24 +146,107 @@ def get_parada(parada_id: str) -> dict:
 # ================================================================
 # OCORRÊNCIAS
 # ================================================================
-def inserir_ocorrencias(ocorrencias: list) -> list:
-    resp = get_supabase().table("ocorrencias").insert(ocorrencias).execute()
-    return resp.data or []
+def inserir_ocorrencias(ocorrencias: list, chave: str = None) -> list:
+    """Insere em lotes idempotentes (ver `inserir_em_lotes`); retorna as linhas novas."""
+    return inserir_em_lotes("ocorrencias", ocorrencias, chave=chave)["inseridas"]
 
 
+@cache_leitura("ocorrencias")
 def listar_ocorrencias_por_parada(parada_id: str) -> list:
     resp = get_supabase().table("ocorrencias").select("*").eq("parada_id", parada_id).order("criado_em").execute()
     return resp.data or []
 
 
-def classificar_ocorrencia(ocorrencia_id: str, g: int, u: int, t: int):
-    resultado = g * u * t
-    classificacao = "baixo" if resultado <= 25 else "medio" if resultado <= 74 else "alto"
+def classificar_ocorrencia(ocorrencia_id: str, g: int, u: int, t: int, limites: tuple = LIMITES_PADRAO):
+    classificacao = calcular_gut(g, u, t, limites)["nivel"]
     get_supabase().table("ocorrencias").update(
         {"gravidade": g, "urgencia": u, "tendencia": t, "classificacao": classificacao}
     ).eq("id", ocorrencia_id).execute()
-
-
+    invalidar("ocorrencias")
+
+
+def classificar_ocorrencias_em_lote(valores: dict, ocorrencias: list, limites: tuple = LIMITES_PADRAO) -> int:
+    """Grava só as classificações alteradas em relação a `ocorrencias` (como carregadas), em uma chamada.
+
+    `valores` é `{ocorrencia_id: {"g": int, "u": int, "t": int}}`; `limites` vem do contrato da
+    parada (`limites_do_contrato`). Retorna quantas linhas foram escritas.
+    """
+    originais = {o["id"]: o for o in ocorrencias}
+    alterados = {}
+    for oid, v in valores.items():
+        o = originais.get(oid)
+        if o is None:
+            continue
+        inalterada = (o.get("gravidade"), o.get("urgencia"), o.get("tendencia")) == (v["g"], v["u"], v["t"])
+        if inalterada and o.get("classificacao"):
+            continue
+        alterados[oid] = v
+    if not alterados:
+        return 0
+    _, niveis = classificar_gut([v["g"] for v in alterados.values()], [v["u"] for v in alterados.values()],
+                                [v["t"] for v in alterados.values()], limites)
+    itens = [
+        {"id": oid, "gravidade": v["g"], "urgencia": v["u"], "tendencia": v["t"], "classificacao": str(nivel)}
+        for (oid, v), nivel in zip(alterados.items(), niveis)
+    ]
+    return _gravar_classificacoes(itens)
+
+
+def _gravar_classificacoes(itens: list) -> int:
+    resp = get_supabase().rpc("classificar_ocorrencias_lote", {"itens": itens}).execute()
+    invalidar("ocorrencias")
+    return resp.data or 0
+
+
+def reclassificar_contrato(contrato_id: str, limites: tuple, tamanho_pagina: int = 1000) -> int:
+    """Reaplica os limites GUT do contrato às ocorrências já classificadas dele (vetorizado por página).
+
+    As ocorrências são lidas em páginas de `tamanho_pagina` por keyset (id), para o limite de
+    linhas do PostgREST (max-rows) não cortar a leitura; só as cujo nível muda são regravadas,
+    uma chamada por página. Retorna quantas foram.
+    """
+    gravadas = 0
+    ultimo   = None
+    while True:
+        q = get_supabase().table("ocorrencias").select(
+            "id, gravidade, urgencia, tendencia, classificacao, paradas!inner(contrato_id)"
+        ).eq("paradas.contrato_id", contrato_id).not_.is_("classificacao", "null")
+        if ultimo:
+            q = q.gt("id", ultimo)
+        pagina = q.order("id").limit(tamanho_pagina).execute().data or []
+        if pagina:
+            ultimo = pagina[-1]["id"]
+            df = pd.DataFrame(pagina).drop(columns="paradas").rename(columns={"classificacao": "anterior"})
+            df = classificar_dataframe(df, limites)
+            mudou = df[df["classificacao"].notna() & (df["classificacao"] != df["anterior"])]
+            if not mudou.empty:
+                gravadas += _gravar_classificacoes([
+                    {"id": r.id, "gravidade": int(r.gravidade), "urgencia": int(r.urgencia),
+                     "tendencia": int(r.tendencia), "classificacao": r.classificacao}
+                    for r in mudou.itertuples()
+                ])
+        if len(pagina) < tamanho_pagina:
+            return gravadas
+
+
+@cache_leitura("ocorrencias")
+def listar_ocorrencias_priorizadas(parada_id: str, limite: int = 20, offset: int = 0) -> dict:
+    """Ocorrências da parada por `resultado_gut` decrescente (não classificadas por último), paginadas.
+
+    Retorna `{"ocorrencias": [...], "total": n}`; a ordem vem do índice
+    (parada_id, resultado_gut desc nulls last, id).
+    """
+    resp = _consulta_ocorrencias_priorizadas(get_supabase(), parada_id, limite, offset).execute()
+    return {"ocorrencias": resp.data or [], "total": resp.count or 0}
+
+
+def _consulta_ocorrencias_priorizadas(sb, parada_id: str, limite: int, offset: int):
+    q = sb.table("ocorrencias").select("*", count="exact").eq("parada_id", parada_id)
+    q = q.order("resultado_gut", desc=True, nullsfirst=False).order("id")
+    return q.range(offset, offset + limite - 1)
+
+
+@cache_leitura("ocorrencias")
 def get_ocorrencia(ocorrencia_id: str) -> dict:
     resp = get_supabase().table("ocorrencias").select("*").eq("id", ocorrencia_id).single().execute()
     return resp.data or {}
@@ -74,32 +255,101 @@ def get_ocorrencia(ocorrencia_id: str) -> dict:
 # ================================================================
 # AÇÕES
 # ================================================================
-def criar_acao(dados: dict) -> dict:
-    resp = get_supabase().table("acoes").insert(dados).execute()
-    return resp.data[0] if resp.data else {}
-
-
-def listar_acoes(filtros: dict = None) -> list:
-    sb = get_supabase()
-    q  = sb.table("acoes").select(
-        "*, ocorrencias(area_setor, ocorrencia, resultado_gut, classificacao), paradas(nome)"
-    )
-    if filtros:
-        if filtros.get("parada_ids"):
-            q = q.in_("parada_id", filtros["parada_ids"])
-        if filtros.get("responsavel_ids"):
-            q = q.in_("responsavel_id", filtros["responsavel_ids"])
-        if filtros.get("status"):
-            q = q.in_("status", filtros["status"])
-        if filtros.get("prazo_inicio"):
-            q = q.gte("prazo", str(filtros["prazo_inicio"]))
-        if filtros.get("prazo_fim"):
-            q = q.lte("prazo", str(filtros["prazo_fim"]))
-    data = q.order("prazo").execute().data or []
-    if filtros and filtros.get("gut_niveis"):
-        niveis = filtros["gut_niveis"]
-        data = [a for a in data if (a.get("ocorrencias") or {}).get("classificacao") in niveis]
-    return data
+def criar_acao(dados: dict, chave: str = None) -> dict:
+    criadas = criar_acoes([dados], chave=chave)
+    return criadas[0] if criadas else {}
+
+
+def criar_acoes(acoes: list, chave: str = None) -> list:
+    return inserir_em_lotes("acoes", acoes, chave=chave)["inseridas"]
+
+
+COLUNAS_ACOES = "*, ocorrencias(area_setor, ocorrencia, resultado_gut, classificacao), paradas(nome)"
+
+
+def _select_acoes(colunas: str, filtros: dict) -> str:
+    if filtros.get("gut_niveis"):
+        # o filtro de nível GUT é aplicado no banco, sobre o recurso embutido: `!inner`
+        # descarta as ações cuja ocorrência não casa com o filtro
+        if "ocorrencias(" in colunas:
+            return colunas.replace("ocorrencias(", "ocorrencias!inner(", 1)
+        return f"{colunas}, ocorrencias!inner(classificacao)"
+    return colunas
+
+
+def _filtrar_acoes(q, filtros: dict):
+    if filtros.get("parada_ids"):
+        q = q.in_("parada_id", filtros["parada_ids"])
+    if filtros.get("responsavel_ids"):
+        q = q.in_("responsavel_id", filtros["responsavel_ids"])
+    if filtros.get("status"):
+        q = q.in_("status", filtros["status"])
+    if filtros.get("prazo_inicio"):
+        q = q.gte("prazo", str(filtros["prazo_inicio"]))
+    if filtros.get("prazo_fim"):
+        q = q.lte("prazo", str(filtros["prazo_fim"]))
+    if filtros.get("gut_niveis"):
+        q = q.in_("ocorrencias.classificacao", filtros["gut_niveis"])
+    return q
+
+
+@cache_leitura("acoes", "ocorrencias", "paradas")
+def listar_acoes(filtros: dict = None, colunas: str = COLUNAS_ACOES) -> list:
+    """Ações filtradas, ordenadas por prazo; `colunas` é o select do PostgREST (projeção)."""
+    filtros = filtros or {}
+    q = get_supabase().table("acoes").select(_select_acoes(colunas, filtros))
+    return _filtrar_acoes(q, filtros).order("prazo").execute().data or []
+
+
+def _escapar_like(texto: str) -> str:
+    """`%`, `_` e `\\` digitados pelo usuário são literais, não curingas do LIKE."""
+    return re.sub(r"([\\%_])", r"\\\1", texto)
+
+
+@cache_leitura("acoes", "ocorrencias", "paradas")
+def listar_acoes_pagina(filtros: dict = None, colunas: str = COLUNAS_ACOES,
+                        cursor: tuple = None, limite: int = 50, busca: str = None) -> dict:
+    """Uma página de ações ordenada por (prazo, id), paginada por keyset.
+
+    `cursor` é o `(prazo, id)` da última linha da página anterior; `colunas` precisa incluir
+    `id` e `prazo`. Ações sem prazo vêm por último. `busca` é um trecho literal da descrição.
+    Retorna `{"acoes": [...], "proximo_cursor": (prazo, id) | None}`.
+    """
+    filtros = filtros or {}
+    q = _filtrar_acoes(get_supabase().table("acoes").select(_select_acoes(colunas, filtros)), filtros)
+    if cursor:
+        prazo, acao_id = cursor
+        if prazo is None:
+            q = q.is_("prazo", "null").gt("id", acao_id)
+        else:
+            q = q.or_(f"prazo.gt.{prazo},and(prazo.eq.{prazo},id.gt.{acao_id}),prazo.is.null")
+    if busca:
+        q = q.ilike("descricao", f"%{_escapar_like(busca)}%")
+    data = q.order("prazo", nullsfirst=False).order("id").limit(limite + 1).execute().data or []
+    proximo = (data[limite - 1]["prazo"], data[limite - 1]["id"]) if len(data) > limite else None
+    return {"acoes": data[:limite], "proximo_cursor": proximo}
+
+
+@cache_leitura("acoes", "ocorrencias", "paradas")
+def painel_agregados(filtros: dict = None) -> dict:
+    """Contagens do Painel (por status/projeto/responsável, vencidas, vencendo em 3 dias e a
+    série diária de conclusões) calculadas pela RPC `painel_agregados` com os mesmos `filtros`
+    de `listar_acoes`."""
+    return _consulta_painel_agregados(get_supabase(), filtros).execute().data or {}
+
+
+def _consulta_painel_agregados(sb, filtros: dict = None):
+    filtros = filtros or {}
+    params  = {
+        "p_parada_ids":      filtros.get("parada_ids") or None,
+        "p_responsavel_ids": filtros.get("responsavel_ids") or None,
+        "p_status":          filtros.get("status") or None,
+        "p_gut_niveis":      filtros.get("gut_niveis") or None,
+        "p_prazo_inicio":    str(filtros["prazo_inicio"]) if filtros.get("prazo_inicio") else None,
+        "p_prazo_fim":       str(filtros["prazo_fim"])    if filtros.get("prazo_fim")    else None,
+        "p_hoje":            str(date.today()),
+    }
+    return sb.rpc("painel_agregados", params)
 
 
 def atualizar_acao(acao_id: str, status: str, comentario: str = None):
@@ -109,12 +359,15 @@ def atualizar_acao(acao_id: str, status: str, comentario: str = None):
     if status == "concluido":
         payload["data_conclusao"] = str(date.today())
     get_supabase().table("acoes").update(payload).eq("id", acao_id).execute()
+    invalidar("acoes")
 
 
 def deletar_acao(acao_id: str):
     get_supabase().table("acoes").delete().eq("id", acao_id).execute()
+    invalidar("acoes")
 
 
+@cache_leitura("acoes", "paradas")
 def listar_acoes_vencidas() -> list:
     resp = get_supabase().table("acoes").select("*, paradas(nome)").lt(
         "prazo", str(date.today())
@@ -122,25 +375,120 @@ def listar_acoes_vencidas() -> list:
     return resp.data or []
 
 
+def listar_acoes_para_lembrete(dias_antecedencia: int = 3, dias_atraso_max: int = 30,
+                               tamanho_pagina: int = 1000) -> list:
+    """Ações abertas com prazo entre `dias_atraso_max` dias atrás e `dias_antecedencia` dias à frente.
+
+    Lidas em páginas de `tamanho_pagina` por keyset (prazo, id), como em `listar_acoes_pagina`,
+    para o limite de linhas do PostgREST (max-rows) não cortar a lista em silêncio.
+    """
+    hoje   = date.today()
+    acoes  = []
+    cursor = None
+    while True:
+        q = get_supabase().table("acoes").select(
+            "id, descricao, prazo, status, responsavel_id, responsavel_nome, paradas(nome)"
+        ).gte("prazo", str(hoje - timedelta(days=dias_atraso_max))).lte(
+            "prazo", str(hoje + timedelta(days=dias_antecedencia))
+        ).in_("status", ["pendente","em_andamento"])
+        if cursor:
+            q = q.or_(f"prazo.gt.{cursor[0]},and(prazo.eq.{cursor[0]},id.gt.{cursor[1]})")
+        pagina = q.order("prazo").order("id").limit(tamanho_pagina).execute().data or []
+        acoes += pagina
+        if len(pagina) < tamanho_pagina:
+            return acoes
+        cursor = (pagina[-1]["prazo"], pagina[-1]["id"])
+
+
+@cache_leitura("acoes")
 def listar_acoes_por_ocorrencia(ocorrencia_id: str) -> list:
     resp = get_supabase().table("acoes").select("*").eq("ocorrencia_id", ocorrencia_id).order("criado_em").execute()
     return resp.data or []
 
 
+@cache_leitura("acoes")
+def listar_acoes_por_parada(parada_id: str) -> dict:
+    """Todas as ações da parada em uma consulta, agrupadas por `ocorrencia_id`."""
+    return _agrupar_por_ocorrencia(_consulta_acoes_por_parada(get_supabase(), parada_id).execute().data)
+
+
+def _consulta_acoes_por_parada(sb, parada_id: str):
+    return sb.table("acoes").select("*").eq("parada_id", parada_id).order("criado_em")
+
+
+def _agrupar_por_ocorrencia(acoes: list) -> dict:
+    por_ocorrencia = {}
+    for acao in acoes or []:
+        por_ocorrencia.setdefault(acao["ocorrencia_id"], []).append(acao)
+    return por_ocorrencia
+
+
+# ================================================================
+# RASCUNHOS DO FORMULÁRIO DO SETOR
+# ================================================================
+# sem cache_leitura: o rascunho é privado de cada usuário e muda a cada autosave
+def carregar_rascunho(usuario_id: str, parada_id: str) -> list:
+    q = get_supabase().table("rascunhos").select("*").eq("usuario_id", usuario_id).eq("parada_id", parada_id)
+    return q.order("ordem").execute().data or []
+
+
+def listar_rascunhos(usuario_id: str) -> dict:
+    """Todos os rascunhos do usuário em uma consulta, como `{parada_id: [linhas em ordem]}` (usado no login)."""
+    q = get_supabase().table("rascunhos").select("*").eq("usuario_id", usuario_id)
+    por_parada = {}
+    for linha in q.order("parada_id").order("ordem").execute().data or []:
+        por_parada.setdefault(linha["parada_id"], []).append(linha)
+    return por_parada
+
+
+def salvar_rascunho_incremental(usuario_id: str, parada_id: str, alteradas: list, removidas: list):
+    """Grava só o que mudou: upsert de `alteradas` (linhas com `id` e `ordem`) e delete de `removidas` (ids)."""
+    sb    = get_supabase()
+    agora = datetime.now(timezone.utc).isoformat()
+    if alteradas:
+        sb.table("rascunhos").upsert([
+            {
+                "usuario_id":      usuario_id,
+                "parada_id":       parada_id,
+                "linha_id":        l["id"],
+                "ordem":           l["ordem"],
+                "area_setor":      l["area_setor"],
+                "fase":            l["fase"],
+                "ocorrencia":      l["ocorrencia"],
+                "impacto":         l["impacto"],
+                "licao_aprendida": l["licao_aprendida"],
+                "atualizado_em":   agora,
+            }
+            for l in alteradas
+        ], on_conflict="usuario_id,parada_id,linha_id").execute()
+    if removidas:
+        q = sb.table("rascunhos").delete().eq("usuario_id", usuario_id).eq("parada_id", parada_id)
+        q.in_("linha_id", removidas).execute()
+
+
+def descartar_rascunho(usuario_id: str, parada_id: str):
+    get_supabase().table("rascunhos").delete().eq("usuario_id", usuario_id).eq("parada_id", parada_id).execute()
+
+
 # ================================================================
 # USUÁRIOS
 # ================================================================
-def listar_usuarios(perfil=None) -> list:
-    sb = get_supabase()
-    q  = sb.table("perfis_usuarios").select("*").eq("ativo", True)
+def _consulta_usuarios(sb, perfil=None):
+    q = sb.table("perfis_usuarios").select("*").eq("ativo", True)
     if perfil:
         if isinstance(perfil, list):
             q = q.in_("perfil", perfil)
         else:
             q = q.eq("perfil", perfil)
-    return q.order("nome").execute().data or []
+    return q.order("nome")
+
 
+@cache_leitura("perfis_usuarios")
+def listar_usuarios(perfil=None) -> list:
+    return _consulta_usuarios(get_supabase(), perfil).execute().data or []
 
+
+@cache_leitura("perfis_usuarios")
 def get_usuario(user_id: str) -> dict:
     resp = get_supabase().table("perfis_usuarios").select("*").eq("id", user_id).single().execute()
     return resp.data or {}
@@ -148,3 +496,32 @@ def get_usuario(user_id: str) -> dict:
 
 def listar_emails_pmo() -> list:
     return [u["email"] for u in listar_usuarios(perfil=["pmo","admin"])]
+
+
+# ================================================================
+# RESUMOS SEMANAIS
+# ================================================================
+# snapshot semanal: gerado e lido pelo agendador com a service role (a RPC não é exposta a
+# anon/authenticated e a leitura de resumos_semanais é só de PMO/admin logados)
+def get_resumo_semanal(semana: date) -> dict:
+    resp = get_supabase_admin().table("resumos_semanais").select("*").eq("semana", str(semana)).execute()
+    return resp.data[0] if resp.data else {}
+
+
+def gerar_resumo_semanal(semana: date) -> dict:
+    """Calcula no banco, a partir das contagens mantidas por trigger, e grava o snapshot da semana;
+    retorna os `dados`."""
+    resp = get_supabase_admin().rpc(
+        "gerar_resumo_semanal", {"p_semana": str(semana), "p_hoje": str(date.today())}
+    ).execute()
+    invalidar("resumos_semanais")
+    return resp.data or {}
+
+
+def _consulta_resumos_semanais(sb, limite: int = 52):
+    return sb.table("resumos_semanais").select("semana, dados").order("semana", desc=True).limit(limite)
+
+
+@cache_leitura("resumos_semanais")
+def listar_resumos_semanais(limite: int = 52) -> list:
+    return list(reversed(_consulta_resumos_semanais(get_supabase(), limite).execute().data or []))
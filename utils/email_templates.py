@@ -0,0 +1,52 @@
+import re
+from html import unescape
+
+
+class Modelo:
+    """Modelo de texto pré-compilado.
+
+    O texto é quebrado uma única vez nos marcadores `{{campo}}`; renderizar é só juntar os
+    pedaços estáticos com os valores. `parcial` preenche parte dos campos e devolve um novo
+    modelo — útil para montar o e-mail uma vez e trocar só os dados de cada destinatário.
+    """
+
+    _MARCADOR = re.compile(r"\{\{(\w+)\}\}")
+
+    def __init__(self, texto: str):
+        partes = self._MARCADOR.split(texto)
+        self._literais = partes[0::2]
+        self._campos   = partes[1::2]
+
+    @property
+    def campos(self) -> set:
+        return set(self._campos)
+
+    def render(self, **valores) -> str:
+        """Substitui os campos informados; marcadores sem valor permanecem no texto."""
+        saida = [self._literais[0]]
+        for campo, literal in zip(self._campos, self._literais[1:]):
+            saida.append(str(valores[campo]) if campo in valores else "{{" + campo + "}}")
+            saida.append(literal)
+        return "".join(saida)
+
+    def parcial(self, **valores) -> "Modelo":
+        return Modelo(self.render(**valores))
+
+
+_RE_REMOVER   = re.compile(r"<(head|style|script)\b.*?</\1>", re.S | re.I)
+_RE_QUEBRA    = re.compile(r"<br\s*/?>|</(p|div|tr|li|h\d|table|thead|tbody)>", re.I)
+_RE_ITEM      = re.compile(r"<li\b[^>]*>", re.I)
+_RE_CELULA    = re.compile(r"</t[dh]>", re.I)
+_RE_TAG       = re.compile(r"<[^>]+>")
+_RE_LINHAS    = re.compile(r"\n{3,}")
+
+
+def html_para_texto(html: str) -> str:
+    """Versão texto simples de um e-mail HTML (parte `text/plain` da mensagem)."""
+    texto = _RE_REMOVER.sub("", html)
+    texto = _RE_QUEBRA.sub("\n", texto)
+    texto = _RE_ITEM.sub("\n• ", texto)
+    texto = _RE_CELULA.sub("  ", texto)
+    texto = unescape(_RE_TAG.sub("", texto))
+    texto = "\n".join(" ".join(linha.split()) for linha in texto.split("\n"))
+    return _RE_LINHAS.sub("\n\n", texto).strip() + "\n"
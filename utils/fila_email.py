@@ -0,0 +1,297 @@
+import hashlib
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+import streamlit as st
+from utils.smtp_client import enviar_lote
+
+log = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fila_email (
+    id                INTEGER PRIMARY KEY AUTOINCREMENT,
+    chave             TEXT    NOT NULL,
+    destinatario      TEXT    NOT NULL,
+    assunto           TEXT    NOT NULL,
+    html              TEXT    NOT NULL,
+    status            TEXT    NOT NULL DEFAULT 'pendente',
+    tentativas        INTEGER NOT NULL DEFAULT 0,
+    proxima_tentativa REAL    NOT NULL,
+    criado_em         REAL    NOT NULL,
+    enviado_em        REAL,
+    ultimo_erro       TEXT,
+    dono              TEXT,
+    reservado_ate     REAL
+);
+CREATE INDEX IF NOT EXISTS ix_fila_email_status ON fila_email (status, proxima_tentativa);
+CREATE INDEX IF NOT EXISTS ix_fila_email_chave  ON fila_email (chave, criado_em);
+CREATE TABLE IF NOT EXISTS execucoes (
+    tarefa       TEXT NOT NULL,
+    chave        TEXT NOT NULL,
+    executado_em REAL NOT NULL,
+    PRIMARY KEY (tarefa, chave)
+);
+"""
+
+# colunas acrescentadas depois da criação da tabela (arquivos SQLite já existentes)
+_COLUNAS_NOVAS = {"dono": "TEXT", "reservado_ate": "REAL"}
+
+
+def _chave_padrao(destinatario: str, assunto: str, html: str) -> str:
+    return hashlib.sha256(f"{destinatario}\0{assunto}\0{html}".encode("utf-8")).hexdigest()
+
+
+class FilaEmail:
+    """Fila de saída de e-mails persistida em SQLite, drenada por um pool de workers.
+
+    Status: `pendente` → `enviando` → `enviado`; após `max_tentativas` falhas o item vai
+    para `falha` (dead-letter) e só volta à fila via `reenfileirar`.
+
+    Cada reserva (`enviando`) registra o processo dono e vale por `validade_reserva` segundos;
+    vencida — o dono morreu ou falhou antes de gravar o resultado —, o item pode ser reservado
+    de novo por qualquer processo que compartilhe o arquivo (app e agendador).
+    """
+
+    def __init__(self, caminho: str, workers: int = 2, lote: int = 50, max_tentativas: int = 5,
+                 backoff_base: float = 30, validade_reserva: float = 600,
+                 enviar=enviar_lote):
+        self.caminho          = caminho
+        self.lote             = lote
+        self.max_tentativas   = max_tentativas
+        self.backoff_base     = backoff_base
+        self.validade_reserva = validade_reserva
+        self.dono             = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._enviar          = enviar
+        self._lock          = threading.Lock()
+        self._evento        = threading.Event()
+        self._parar         = threading.Event()
+        with self._conectar() as conn:
+            conn.executescript(_SCHEMA)
+            colunas = {r["name"] for r in conn.execute("PRAGMA table_info(fila_email)")}
+            for coluna, tipo in _COLUNAS_NOVAS.items():
+                if coluna not in colunas:
+                    conn.execute(f"ALTER TABLE fila_email ADD COLUMN {coluna} {tipo}")
+        self._threads = [
+            threading.Thread(target=self._loop, name=f"fila-email-{i}", daemon=True)
+            for i in range(max(0, workers))
+        ]
+        for t in self._threads:
+            t.start()
+
+    @contextmanager
+    def _conectar(self):
+        conn = sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+        try:
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------
+    # Produção
+    # ------------------------------------------------------------
+    def enfileirar_muitos(self, envios: list, chave: str = None, janela_dedup: float = None) -> int:
+        """Enfileira `[(to_email, subject, html_body), ...]`; retorna quantos itens entraram.
+
+        Sem `chave` nem `janela_dedup`, tudo entra — dois envios iguais são dois eventos.
+        `chave`, quando informada, é combinada com o destinatário e funciona como chave de
+        idempotência: um item com a mesma chave já enfileirado (fora do dead-letter) dentro de
+        `janela_dedup` segundos — sem janela, em qualquer tempo — é descartado. Sem `chave`, uma
+        `janela_dedup` liga a deduplicação pelo hash de destinatário+assunto+corpo. Descartes
+        são registrados no log.
+        """
+        agora  = time.time()
+        if janela_dedup is not None:
+            janela = janela_dedup
+        else:
+            janela = float("inf") if chave else 0
+        novos  = 0
+        with self._lock, self._conectar() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for to_email, assunto, html in envios:
+                k = f"{chave}:{to_email}" if chave else _chave_padrao(to_email, assunto, html)
+                existe = janela > 0 and conn.execute(
+                    "SELECT 1 FROM fila_email WHERE chave=? AND criado_em>=? AND status!='falha' LIMIT 1",
+                    (k, agora - janela if janela != float("inf") else 0),
+                ).fetchone()
+                if existe:
+                    continue
+                conn.execute(
+                    "INSERT INTO fila_email (chave, destinatario, assunto, html, proxima_tentativa, criado_em) "
+                    "VALUES (?,?,?,?,?,?)",
+                    (k, to_email, assunto, html, agora, agora),
+                )
+                novos += 1
+            conn.execute("COMMIT")
+        if novos < len(envios):
+            log.info("%s de %s e-mail(s) descartado(s) como duplicata (chave %s)",
+                     len(envios) - novos, len(envios), chave or "hash do conteúdo")
+        if novos:
+            self._evento.set()
+        return novos
+
+    def reenfileirar(self, ids: list = None) -> int:
+        """Devolve itens do dead-letter (`falha`) para a fila."""
+        with self._lock, self._conectar() as conn:
+            sql    = "UPDATE fila_email SET status='pendente', tentativas=0, proxima_tentativa=? WHERE status='falha'"
+            params = [time.time()]
+            if ids:
+                sql += f" AND id IN ({','.join('?' * len(ids))})"
+                params += list(ids)
+            n = conn.execute(sql, params).rowcount
+        if n:
+            self._evento.set()
+        return n
+
+    # ------------------------------------------------------------
+    # Consumo
+    # ------------------------------------------------------------
+    def _reservar(self) -> list:
+        """Reserva um lote de itens vencidos, incluindo reservas de outros donos já expiradas."""
+        agora = time.time()
+        with self._lock, self._conectar() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            itens = conn.execute(
+                "SELECT id, destinatario, assunto, html, tentativas, criado_em FROM fila_email "
+                "WHERE (status='pendente' AND proxima_tentativa<=?) "
+                "   OR (status='enviando' AND (reservado_ate IS NULL OR reservado_ate<?)) "
+                "ORDER BY id LIMIT ?",
+                (agora, agora, self.lote),
+            ).fetchall()
+            if itens:
+                conn.execute(
+                    "UPDATE fila_email SET status='enviando', dono=?, reservado_ate=? "
+                    f"WHERE id IN ({','.join('?' * len(itens))})",
+                    [self.dono, agora + self.validade_reserva] + [i["id"] for i in itens],
+                )
+            conn.execute("COMMIT")
+        return itens
+
+    def processar_lote(self) -> int:
+        """Envia um lote de itens vencidos; retorna quantos foram processados."""
+        itens = self._reservar()
+        if not itens:
+            return 0
+        try:
+            resultados = self._enviar([(i["destinatario"], i["assunto"], i["html"]) for i in itens])
+        except Exception as e:
+            resultados = [e] * len(itens)
+        agora = time.time()
+        with self._lock, self._conectar() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for item, erro in zip(itens, resultados):
+                # `dono=?`: se a reserva expirou e outro processo assumiu o item, o resultado é dele
+                if erro is None:
+                    conn.execute("UPDATE fila_email SET status='enviado', enviado_em=?, ultimo_erro=NULL, "
+                                 "dono=NULL, reservado_ate=NULL WHERE id=? AND dono=?",
+                                 (agora, item["id"], self.dono))
+                    continue
+                tentativas = item["tentativas"] + 1
+                status     = "falha" if tentativas >= self.max_tentativas else "pendente"
+                proxima    = agora + self.backoff_base * (2 ** (tentativas - 1))
+                conn.execute("UPDATE fila_email SET status=?, tentativas=?, proxima_tentativa=?, ultimo_erro=?, "
+                             "dono=NULL, reservado_ate=NULL WHERE id=? AND dono=?",
+                             (status, tentativas, proxima, str(erro)[:500], item["id"], self.dono))
+                log.warning("Falha ao enviar e-mail para %s (tentativa %s): %s",
+                            item["destinatario"], tentativas, erro)
+            conn.execute("COMMIT")
+        return len(itens)
+
+    def drenar(self, timeout: float = 60) -> bool:
+        """Processa a fila no thread atual até esvaziar os itens vencidos (uso fora do Streamlit)."""
+        limite = time.time() + timeout
+        while time.time() < limite:
+            if not self.processar_lote():
+                return True
+        return False
+
+    def _loop(self):
+        while not self._parar.is_set():
+            try:
+                if self.processar_lote():
+                    continue
+            except Exception:
+                log.exception("Erro no worker da fila de e-mails")
+            self._evento.wait(timeout=5)
+            self._evento.clear()
+
+    def parar(self, aguardar: bool = False):
+        """Sinaliza os workers para pararem; com `aguardar`, espera cada um concluir o lote em andamento."""
+        self._parar.set()
+        self._evento.set()
+        if aguardar:
+            for t in self._threads:
+                t.join()
+
+    # ------------------------------------------------------------
+    # Registro de execuções (idempotência das tarefas agendadas)
+    # ------------------------------------------------------------
+    def ja_executado(self, tarefa: str, chave: str) -> bool:
+        with self._conectar() as conn:
+            return conn.execute(
+                "SELECT 1 FROM execucoes WHERE tarefa=? AND chave=?", (tarefa, chave)
+            ).fetchone() is not None
+
+    def registrar_execucao(self, tarefa: str, chave: str):
+        with self._conectar() as conn:
+            conn.execute("INSERT OR REPLACE INTO execucoes (tarefa, chave, executado_em) VALUES (?,?,?)",
+                         (tarefa, chave, time.time()))
+
+    # ------------------------------------------------------------
+    # Monitoramento
+    # ------------------------------------------------------------
+    def metricas(self, janela: float = 86400) -> dict:
+        desde = time.time() - janela
+        with self._conectar() as conn:
+            por_status = dict(conn.execute(
+                "SELECT status, COUNT(*) FROM fila_email GROUP BY status"
+            ).fetchall())
+            latencias = [r[0] for r in conn.execute(
+                "SELECT enviado_em - criado_em FROM fila_email "
+                "WHERE status='enviado' AND enviado_em>=? ORDER BY 1", (desde,)
+            ).fetchall()]
+            enviados_janela = len(latencias)
+            falhas_janela = conn.execute(
+                "SELECT COUNT(*) FROM fila_email WHERE ultimo_erro IS NOT NULL AND criado_em>=?",
+                (desde,),
+            ).fetchone()[0]
+        return {
+            "pendentes":       por_status.get("pendente", 0) + por_status.get("enviando", 0),
+            "enviados":        por_status.get("enviado", 0),
+            "falhas":          por_status.get("falha", 0),
+            "enviados_janela": enviados_janela,
+            "erros_janela":    falhas_janela,
+            "latencia_media":  sum(latencias) / enviados_janela if enviados_janela else 0.0,
+            "latencia_p95":    latencias[int(0.95 * (enviados_janela - 1))] if enviados_janela else 0.0,
+        }
+
+    def listar_falhas(self, limite: int = 100) -> list:
+        with self._conectar() as conn:
+            rows = conn.execute(
+                "SELECT id, destinatario, assunto, tentativas, criado_em, ultimo_erro FROM fila_email "
+                "WHERE status='falha' ORDER BY id DESC LIMIT ?", (limite,)
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+
+@st.cache_resource
+def get_fila_email() -> FilaEmail:
+    cfg = st.secrets.get("fila_email", {})
+    return FilaEmail(
+        caminho          = cfg.get("caminho", "fila_email.sqlite3"),
+        workers          = int(cfg.get("workers", 2)),
+        lote             = int(cfg.get("lote", 50)),
+        max_tentativas   = int(cfg.get("max_tentativas", 5)),
+        backoff_base     = float(cfg.get("backoff_base", 30)),
+        validade_reserva = float(cfg.get("validade_reserva", 600)),
+    )
@@ -1,12 +1,63 @@
-def calcular_gut(gravidade: int, urgencia: int, tendencia: int) -> dict:
-    resultado = gravidade * urgencia * tendencia
-    if resultado <= 25:
-        nivel, cor, label = "baixo", "🟢", "Baixo"
-    elif resultado <= 74:
-        nivel, cor, label = "medio", "🟡", "Médio"
-    else:
-        nivel, cor, label = "alto",  "🔴", "Alto"
-    return {"resultado": resultado, "nivel": nivel, "cor": cor, "label": label}
+import numpy as np
+import pandas as pd
+
+# limites superiores (inclusivos) de "baixo" e "medio"; acima de `medio` é "alto".
+# Cada contrato pode sobrescrever com contratos.gut_limite_baixo / gut_limite_medio.
+LIMITES_PADRAO = (25, 74)
+
+NIVEIS  = np.array(["baixo", "medio", "alto"])
+_VISUAL = {"baixo": ("🟢", "Baixo"), "medio": ("🟡", "Médio"), "alto": ("🔴", "Alto")}
+
+
+def limites_do_contrato(contrato: dict = None) -> tuple:
+    """`(baixo, medio)` do contrato (ex.: `parada["contratos"]`), caindo no padrão quando não definidos."""
+    contrato = contrato or {}
+    return (contrato.get("gut_limite_baixo") or LIMITES_PADRAO[0],
+            contrato.get("gut_limite_medio") or LIMITES_PADRAO[1])
+
+
+def classificar_gut(gravidade, urgencia, tendencia, limites=LIMITES_PADRAO) -> tuple:
+    """Pontuação e nível GUT vetorizados: `(resultado, nivel)` como arrays NumPy.
+
+    Aceita escalares, listas, arrays ou Series (com broadcast). `limites` é `(baixo, medio)`
+    — escalares ou arrays por linha, para classificar ocorrências de contratos diferentes numa
+    única passada.
+    """
+    resultado = (np.asarray(gravidade, dtype=np.int64)
+                 * np.asarray(urgencia, dtype=np.int64)
+                 * np.asarray(tendencia, dtype=np.int64))
+    baixo, medio = (np.asarray(l) for l in limites)
+    nivel = NIVEIS[(resultado > baixo).astype(np.int8) + (resultado > medio).astype(np.int8)]
+    return resultado, nivel
+
+
+def classificar_dataframe(df: pd.DataFrame, limites=LIMITES_PADRAO) -> pd.DataFrame:
+    """Acrescenta `resultado_gut` e `classificacao` a um DataFrame com gravidade/urgencia/tendencia.
+
+    Linhas sem os três valores ficam com `resultado_gut` nulo e sem classificação. Se o
+    DataFrame tiver `gut_limite_baixo`/`gut_limite_medio`, eles valem por linha (nulos usam `limites`).
+    """
+    df = df.copy()
+    notas    = df[["gravidade", "urgencia", "tendencia"]]
+    completa = notas.notna().all(axis=1).to_numpy()
+    baixo = df["gut_limite_baixo"].fillna(limites[0]).to_numpy() if "gut_limite_baixo" in df else limites[0]
+    medio = df["gut_limite_medio"].fillna(limites[1]).to_numpy() if "gut_limite_medio" in df else limites[1]
+    resultado, nivel = classificar_gut(*(notas[c].fillna(1).to_numpy() for c in notas), limites=(baixo, medio))
+    df["resultado_gut"] = pd.Series(resultado, index=df.index, dtype="Int64").where(completa)
+    df["classificacao"] = pd.Series(np.where(completa, nivel, None), index=df.index, dtype=object)
+    return df
+
+
+def calcular_gut(gravidade: int, urgencia: int, tendencia: int, limites=LIMITES_PADRAO) -> dict:
+    resultado, nivel = classificar_gut(gravidade, urgencia, tendencia, limites)
+    nivel      = str(nivel)
+    cor, label = _VISUAL[nivel]
+    return {"resultado": int(resultado), "nivel": nivel, "cor": cor, "label": label}
+
+
+def legenda_limites(limites=LIMITES_PADRAO) -> str:
+    baixo, medio = limites
+    return f"🟢 1–{baixo} Baixo | 🟡 {baixo + 1}–{medio} Médio | 🔴 {medio + 1}–125 Alto"
 
 
 _DESC_GRAVIDADE = {
@@ -40,3 +91,9 @@ def get_descricao_urgencia(nivel: int) -> str:
 
 def get_descricao_tendencia(nivel: int) -> str:
     return _DESC_TENDENCIA.get(nivel, "")
+
+
+# textos de ajuda dos selectboxes, montados uma vez na importação
+AJUDA_GRAVIDADE = "\n".join(f"{n}: {d}" for n, d in _DESC_GRAVIDADE.items())
+AJUDA_URGENCIA  = "\n".join(f"{n}: {d}" for n, d in _DESC_URGENCIA.items())
+AJUDA_TENDENCIA = "\n".join(f"{n}: {d}" for n, d in _DESC_TENDENCIA.items())
@@ -0,0 +1,164 @@
+import csv
+import hashlib
+import io
+import re
+import unicodedata
+from itertools import islice
+
+FASES = ["Planejamento","Mobilização","Desmontagem","Manutenção",
+         "Montagem","Comissionamento","Desmobilização","Encerramento"]
+
+CAMPOS = ["area_setor","fase","ocorrencia","impacto","licao_aprendida"]
+
+# cabeçalho normalizado (sem acento, minúsculo, só letras) -> campo
+_CABECALHOS = {
+    "areasetor":      "area_setor",
+    "area":           "area_setor",
+    "setor":          "area_setor",
+    "fase":           "fase",
+    "ocorrencia":     "ocorrencia",
+    "impacto":        "impacto",
+    "licaoaprendida": "licao_aprendida",
+    "licao":          "licao_aprendida",
+}
+
+MAX_ERROS = 500
+
+
+def _normalizar(texto) -> str:
+    texto = unicodedata.normalize("NFKD", str(texto or "")).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z]", "", texto.lower())
+
+
+_FASES_NORM = {_normalizar(f): f for f in FASES}   # fase normalizada -> fase canônica
+
+
+def validar_linha(linha: dict, numero: int) -> list:
+    """Mesmas regras do "Enviar para PMO"; retorna as mensagens de erro da linha."""
+    erros = []
+    if not (linha.get("area_setor") or "").strip():      erros.append(f"Linha {numero}: Área/Setor em branco.")
+    if not (linha.get("ocorrencia") or "").strip():      erros.append(f"Linha {numero}: Ocorrência em branco.")
+    if not (linha.get("impacto") or "").strip():         erros.append(f"Linha {numero}: Impacto em branco.")
+    if not (linha.get("licao_aprendida") or "").strip(): erros.append(f"Linha {numero}: Lição Aprendida em branco.")
+    if linha.get("fase") not in FASES:                   erros.append(f"Linha {numero}: Fase inválida ({linha.get('fase') or 'em branco'}).")
+    return erros
+
+
+def modelo_csv() -> bytes:
+    """Planilha modelo (só o cabeçalho) para download."""
+    return "Área/Setor;Fase;Ocorrência;Impacto;Lição Aprendida\n".encode("utf-8-sig")
+
+
+# ================================================================
+# LEITURA EM STREAMING
+# ================================================================
+def _mapear_cabecalho(cabecalho: list) -> dict:
+    """`{indice_coluna: campo}`; levanta ValueError se faltar alguma coluna obrigatória."""
+    mapa = {}
+    for i, nome in enumerate(cabecalho):
+        campo = _CABECALHOS.get(_normalizar(nome))
+        if campo and campo not in mapa.values():
+            mapa[i] = campo
+    faltando = [c for c in CAMPOS if c not in mapa.values()]
+    if faltando:
+        raise ValueError(f"Coluna(s) obrigatória(s) ausente(s) na planilha: {', '.join(faltando)}.")
+    return mapa
+
+
+def _linhas_csv(arquivo):
+    texto = io.TextIOWrapper(arquivo, encoding="utf-8-sig", errors="replace", newline="")
+    amostra = texto.read(4096)
+    texto.seek(0)
+    try:
+        dialeto = csv.Sniffer().sniff(amostra, delimiters=";,\t")
+    except csv.Error:
+        dialeto = csv.excel
+    try:
+        yield from csv.reader(texto, dialeto)
+    finally:
+        texto.detach()
+
+
+def _linhas_xlsx(arquivo):
+    from openpyxl import load_workbook   # dependência só da importação de .xlsx
+
+    wb = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        yield from wb.active.iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def ler_planilha(arquivo, nome: str):
+    """Gera `(numero_linha, {campo: valor})` da planilha sem carregá-la inteira em memória.
+
+    `numero_linha` é o da planilha (o cabeçalho é a linha 1). Linhas totalmente vazias são
+    ignoradas; a fase é casada com `FASES` sem diferenciar acentos e maiúsculas.
+    """
+    linhas = _linhas_xlsx(arquivo) if nome.lower().endswith(".xlsx") else _linhas_csv(arquivo)
+    mapa = None
+    for numero, valores in enumerate(linhas, start=1):
+        if mapa is None:
+            mapa = _mapear_cabecalho(list(valores or []))
+            continue
+        if not valores or all(v is None or str(v).strip() == "" for v in valores):
+            continue
+        linha = {campo: ("" if i >= len(valores) or valores[i] is None else str(valores[i]).strip())
+                 for i, campo in mapa.items()}
+        linha["fase"] = _FASES_NORM.get(_normalizar(linha["fase"]), linha["fase"])
+        yield numero, linha
+    if mapa is None:
+        raise ValueError("Planilha vazia.")
+
+
+def _impressao(arquivo) -> str:
+    """Hash do conteúdo do arquivo, lido em blocos de 64 KiB; volta ao início ao terminar."""
+    h = hashlib.sha256()
+    arquivo.seek(0)
+    for bloco in iter(lambda: arquivo.read(1 << 16), b""):
+        if not bloco:   # arquivo em modo texto: o fim é "" e não b""
+            break
+        h.update(bloco.encode("utf-8") if isinstance(bloco, str) else bloco)
+    arquivo.seek(0)
+    return h.hexdigest()[:32]
+
+
+def em_lotes(iteravel, tamanho: int):
+    it = iter(iteravel)
+    while lote := list(islice(it, tamanho)):
+        yield lote
+
+
+# ================================================================
+# IMPORTAÇÃO
+# ================================================================
+def importar_ocorrencias(arquivo, nome: str, parada_id: str, enviado_por: str,
+                         inserir, lote: int = 200, ao_progredir=None) -> dict:
+    """Valida e insere as ocorrências da planilha em lotes de até `lote` linhas.
+
+    `inserir` recebe cada lote de payloads (ex.: `db_queries.inserir_ocorrencias`). Cada linha
+    leva a chave de idempotência `importacao:{parada}:{hash do arquivo}:{nº da linha}`:
+    reimportar o mesmo arquivo após uma falha não duplica as linhas já gravadas, e linhas
+    iguais em posições diferentes continuam sendo linhas distintas. Linhas inválidas são
+    puladas e relatadas; no máximo `MAX_ERROS` mensagens são guardadas.
+    `inserir` deve devolver as linhas gravadas; `ao_progredir(lidas, inseridas)` é chamado após
+    cada lote.
+    """
+    resultado = {"lidas": 0, "inseridas": 0, "invalidas": 0, "erros": []}
+    chave     = f"importacao:{parada_id}:{_impressao(arquivo)}"
+    for bloco in em_lotes(ler_planilha(arquivo, nome), lote):
+        payload = []
+        for numero, linha in bloco:
+            erros = validar_linha(linha, numero)
+            if erros:
+                resultado["invalidas"] += 1
+                resultado["erros"].extend(erros[:MAX_ERROS - len(resultado["erros"])])
+                continue
+            payload.append({"parada_id": parada_id, **linha, "enviado_por": enviado_por,
+                            "chave_idempotencia": f"{chave}:{numero}"})
+        novas = inserir(payload) if payload else []
+        resultado["lidas"]     += len(bloco)
+        resultado["inseridas"] += len(novas)
+        if ao_progredir:
+            ao_progredir(resultado["lidas"], resultado["inseridas"])
+    return resultado
@@ -0,0 +1,282 @@
+"""Instrumentação por execução (rerun) das páginas: chamadas ao Supabase e envios de e-mail.
+
+Cada chamada externa — pelos ganchos httpx (`GANCHOS_HTTPX`/`GANCHOS_HTTPX_ASYNC`) ou por
+`medir` — vira um evento com alvo, operação, duração, bytes e a função de origem, somado ao
+registro da execução atual. `painel_debug` mostra na sidebar o resumo da execução anterior
+(com as prováveis N+1 marcadas) e `exportar_jsonl` exporta o histórico da sessão. Desligada,
+não registra nada.
+"""
+import contextvars
+import json
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from urllib.parse import urlparse
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+HISTORICO      = 20     # execuções guardadas por sessão para o painel/exportação
+SEGUNDO_PLANO  = 1000   # eventos de threads sem sessão (workers da fila de e-mails)
+LIMIAR_REPETIDO = 5     # mesma chamada (tipo, alvo, operação) mais vezes que isso numa execução: provável N+1
+
+_lock          = threading.Lock()
+_segundo_plano = deque(maxlen=SEGUNDO_PLANO)
+
+# execução a que pertencem as chamadas feitas fora da thread do script (ex.: `utils.db_async`)
+_EXECUCAO = contextvars.ContextVar("instrumentacao_execucao", default=None)
+
+# perfis que podem ligar a instrumentação só para a própria sessão com `?debug=1`
+PERFIS_DEBUG = ("pmo", "admin")
+
+_CHAVE_EXECUCAO  = "_instrumentacao_execucao"
+_CHAVE_HISTORICO = "_instrumentacao_historico"
+
+_OPERACOES_HTTP = {"GET": "select", "POST": "insert", "PATCH": "update", "PUT": "upsert", "DELETE": "delete"}
+
+
+def _config() -> dict:
+    try:
+        return st.secrets.get("instrumentacao", {})
+    except Exception:
+        return {}
+
+
+def ativo() -> bool:
+    """Liga para todos com `[instrumentacao] ativo = true` nos secrets; `?debug=1` na URL liga só
+    para a sessão de um usuário logado com perfil em `PERFIS_DEBUG`."""
+    if _config().get("ativo"):
+        return True
+    return st.query_params.get("debug") == "1" and st.session_state.get("user_perfil") in PERFIS_DEBUG
+
+
+# ================================================================
+# REGISTRO
+# ================================================================
+def iniciar_execucao(pagina: str):
+    """Abre o registro desta execução (rerun) da página e fecha o da anterior.
+
+    Chamado no topo de cada página, logo após `st.set_page_config`. Sem instrumentação ativa
+    não registra nada.
+    """
+    anterior = st.session_state.pop(_CHAVE_EXECUCAO, None)
+    if anterior is not None:
+        _finalizar(anterior)
+    if not ativo():
+        return
+    ctx = get_script_run_ctx(suppress_warning=True)
+    st.session_state[_CHAVE_EXECUCAO] = {
+        "id":      uuid.uuid4().hex,
+        "sessao":  ctx.session_id if ctx else None,
+        "pagina":  pagina,
+        "inicio":  time.time(),
+        "eventos": [],
+    }
+
+
+def _finalizar(execucao: dict):
+    execucao["duracao"] = time.time() - execucao["inicio"]
+    historico = st.session_state.setdefault(_CHAVE_HISTORICO, deque(maxlen=HISTORICO))
+    historico.append(execucao)
+    arquivo = _config().get("arquivo")
+    if arquivo:
+        with _lock, open(arquivo, "a", encoding="utf-8") as f:
+            f.write(json.dumps(execucao, default=str, ensure_ascii=False) + "\n")
+
+
+def _execucao_atual():
+    execucao = _EXECUCAO.get()
+    if execucao is not None:
+        return execucao
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None
+    try:
+        return st.session_state.get(_CHAVE_EXECUCAO)
+    except Exception:
+        return None
+
+
+def _origem() -> str:
+    """Função de `utils.db_queries`/`utils.db_async` (ou de notificação) que originou a chamada, se houver."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        modulo = frame.f_globals.get("__name__", "")
+        if modulo in ("utils.db_queries", "utils.db_async", "utils.notifications"):
+            return frame.f_code.co_name
+        frame = frame.f_back
+    return ""
+
+
+def _rerun_de_fragmento() -> bool:
+    """Se a chamada vem de um rerun só de fragmento (ex.: o autosave com `run_every`), que não
+    passa por `iniciar_execucao` e cai no registro da última execução completa."""
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return bool(ctx and ctx.fragment_ids_this_run)
+
+
+def registrar(tipo: str, alvo: str, operacao: str, segundos: float, bytes_enviados: int = 0,
+              bytes_recebidos: int = 0, erro: str = None):
+    """Registra uma chamada externa na execução atual (ou no buffer de segundo plano, fora de uma sessão)."""
+    execucao = _execucao_atual()
+    evento = {
+        "tipo":            tipo,
+        "alvo":            alvo,
+        "operacao":        operacao,
+        "origem":          _origem(),
+        "ms":              round(segundos * 1000, 2),
+        "bytes_enviados":  bytes_enviados,
+        "bytes_recebidos": bytes_recebidos,
+        "erro":            erro,
+        "em":              time.time(),
+        "fragmento":       _rerun_de_fragmento(),
+    }
+    if execucao is not None:
+        execucao["eventos"].append(evento)
+    elif _config().get("ativo"):
+        with _lock:
+            _segundo_plano.append(evento)
+
+
+# ================================================================
+# GANCHOS
+# ================================================================
+def _ao_enviar_requisicao(request):
+    request.extensions["instrumentacao_t0"] = time.perf_counter()
+
+
+def _ao_receber_resposta(response):
+    t0 = response.request.extensions.get("instrumentacao_t0")
+    if t0 is None or (_execucao_atual() is None and not _config().get("ativo")):
+        return
+    response.read()
+    partes = urlparse(str(response.request.url)).path.split("/rest/v1/", 1)[-1].split("/")
+    if partes[0] == "rpc":
+        alvo, operacao = partes[1] if len(partes) > 1 else "rpc", "rpc"
+    else:
+        alvo, operacao = partes[0], _OPERACOES_HTTP.get(response.request.method, response.request.method)
+        if "resolution=" in response.request.headers.get("prefer", ""):
+            operacao = "upsert"
+    registrar(
+        "supabase", alvo, operacao, time.perf_counter() - t0,
+        bytes_enviados  = len(response.request.content or b""),
+        bytes_recebidos = len(response.content or b""),
+        erro            = f"HTTP {response.status_code}" if response.status_code >= 400 else None,
+    )
+
+
+GANCHOS_HTTPX = {"request": [_ao_enviar_requisicao], "response": [_ao_receber_resposta]}
+
+
+async def _ao_enviar_requisicao_async(request):
+    _ao_enviar_requisicao(request)
+
+
+async def _ao_receber_resposta_async(response):
+    if "instrumentacao_t0" in response.request.extensions:
+        await response.aread()
+    _ao_receber_resposta(response)
+
+
+GANCHOS_HTTPX_ASYNC = {"request": [_ao_enviar_requisicao_async], "response": [_ao_receber_resposta_async]}
+
+
+def execucao_atual():
+    """Registro da execução corrente, para repassar a `vincular` em outra thread/laço."""
+    return _execucao_atual()
+
+
+def vincular(execucao):
+    """Faz as chamadas deste contexto (thread ou task asyncio) contarem para `execucao`."""
+    _EXECUCAO.set(execucao)
+
+
+class medir:
+    """`with medir("smtp", host, "send", bytes_enviados=n): ...` — registra duração e erro do bloco."""
+
+    def __init__(self, tipo: str, alvo: str, operacao: str, bytes_enviados: int = 0):
+        self.tipo, self.alvo, self.operacao, self.bytes_enviados = tipo, alvo, operacao, bytes_enviados
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo_exc, exc, tb):
+        registrar(self.tipo, self.alvo, self.operacao, time.perf_counter() - self.t0,
+                  bytes_enviados=self.bytes_enviados, erro=repr(exc) if exc else None)
+        return False
+
+
+# ================================================================
+# RESUMO, PAINEL E EXPORTAÇÃO
+# ================================================================
+def resumir(execucao: dict) -> dict:
+    """Totais da execução e agregação por (tipo, alvo, operação), com as prováveis N+1 marcadas.
+
+    Eventos de reruns de fragmento ficam fora dos totais; `fragmentos` conta quantos foram.
+    """
+    eventos = [ev for ev in execucao["eventos"] if not ev.get("fragmento")]
+    grupos  = {}
+    for ev in eventos:
+        g = grupos.setdefault((ev["tipo"], ev["alvo"], ev["operacao"]),
+                              {"chamadas": 0, "ms": 0.0, "bytes": 0, "origens": set()})
+        g["chamadas"] += 1
+        g["ms"]       += ev["ms"]
+        g["bytes"]    += ev["bytes_enviados"] + ev["bytes_recebidos"]
+        if ev["origem"]:
+            g["origens"].add(ev["origem"])
+    linhas = [
+        {"tipo": t, "alvo": a, "operacao": o, "chamadas": g["chamadas"], "ms": round(g["ms"], 1),
+         "kb": round(g["bytes"] / 1024, 1), "origens": ", ".join(sorted(g["origens"])),
+         "n+1?": g["chamadas"] > LIMIAR_REPETIDO}
+        for (t, a, o), g in grupos.items()
+    ]
+    linhas.sort(key=lambda l: l["ms"], reverse=True)
+    return {
+        "pagina":     execucao["pagina"],
+        "chamadas":   len(eventos),
+        "ms":         round(sum(ev["ms"] for ev in eventos), 1),
+        "fragmentos": len(execucao["eventos"]) - len(eventos),
+        "duracao":    execucao.get("duracao"),
+        "grupos":     linhas,
+    }
+
+
+def exportar_jsonl() -> str:
+    """Execuções guardadas desta sessão mais os eventos de segundo plano, uma linha JSON por registro."""
+    linhas = [json.dumps(e, default=str, ensure_ascii=False) for e in st.session_state.get(_CHAVE_HISTORICO, [])]
+    with _lock:
+        linhas += [json.dumps({"segundo_plano": True, **ev}, default=str, ensure_ascii=False) for ev in _segundo_plano]
+    return "\n".join(linhas) + ("\n" if linhas else "")
+
+
+def painel_debug():
+    """Painel opcional na sidebar com o perfil da execução anterior desta página."""
+    if not ativo():
+        return
+    historico = st.session_state.get(_CHAVE_HISTORICO) or []
+    with st.sidebar.expander("🛠️ Instrumentação", expanded=False):
+        if not historico:
+            st.caption("Nenhuma execução concluída ainda — interaja com a página.")
+        else:
+            r = resumir(historico[-1])
+            st.markdown(f"**Execução anterior** ({r['pagina']}): {r['chamadas']} chamada(s), "
+                        f"{r['ms']:.0f} ms em I/O de {1000 * (r['duracao'] or 0):.0f} ms")
+            if r["fragmentos"]:
+                st.caption(f"Fora dos totais: {r['fragmentos']} chamada(s) de reruns de fragmento "
+                           "(ex.: autosave) — marcadas com `fragmento` no JSONL.")
+            if r["grupos"]:
+                st.dataframe(r["grupos"], hide_index=True, use_container_width=True)
+            suspeitas = [g for g in r["grupos"] if g["n+1?"]]
+            if suspeitas:
+                st.warning("Possível N+1: " + "; ".join(
+                    f"{g['alvo']} ({g['operacao']}) × {g['chamadas']}" for g in suspeitas))
+        st.download_button("⬇️ Exportar JSONL", exportar_jsonl(), file_name="instrumentacao.jsonl",
+                           mime="application/json", use_container_width=True)
+
+
+def instrumentar_pagina(pagina: str):
+    """Atalho para o topo das páginas: abre a execução e desenha o painel (se ativo)."""
+    iniciar_execucao(pagina)
+    painel_debug()
@@ -1,31 +1,39 @@
-import smtplib
 import streamlit as st
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from datetime import date
-
-
-def _send_email(to_email: str, subject: str, html_body: str) -> bool:
+from datetime import date, timedelta
+from functools import lru_cache
+from utils.email_templates import Modelo
+from utils.fila_email import get_fila_email
+from utils.agrupador_status import AgrupadorStatus
+from utils.instrumentacao import medir
+
+
+def _send_many(envios: list, chave: str = None, janela_dedup: float = None,
+               levantar_erros: bool = False) -> int:
+    """Enfileira `[(to_email, subject, html_body), ...]` para envio em segundo plano.
+
+    Retorna quantos e-mails entraram na fila; só há deduplicação com `chave` (idempotência de
+    tarefas agendadas) ou `janela_dedup` (ver `FilaEmail.enfileirar_muitos`). Uma falha ao enfileirar vira aviso na
+    página, ou é levantada com `levantar_erros` (tarefas agendadas, que precisam saber se
+    podem marcar a execução como feita); o lote entra inteiro ou nada entra.
+    """
+    if not envios:
+        return 0
     try:
-        cfg = st.secrets["smtp"]
-        msg = MIMEMultipart("alternative")
-        msg["Subject"] = subject
-        msg["From"]    = cfg["from"]
-        msg["To"]      = to_email
-        msg.attach(MIMEText(html_body, "html", "utf-8"))
-        with smtplib.SMTP(cfg["host"], int(cfg["port"])) as server:
-            server.ehlo()
-            server.starttls()
-            server.login(cfg["user"], cfg["password"])
-            server.sendmail(cfg["user"], to_email, msg.as_string())
-        return True
+        with medir("fila_email", "emails", "enfileirar", sum(len(html) for _, _, html in envios)):
+            return get_fila_email().enfileirar_muitos(envios, chave=chave, janela_dedup=janela_dedup)
     except Exception as e:
-        st.warning(f"⚠️ Falha ao enviar e-mail para {to_email}: {e}")
-        return False
+        if levantar_erros:
+            raise
+        st.warning(f"⚠️ Falha ao enfileirar {len(envios)} e-mail(s): {e}")
+        return 0
 
 
-def _base_template(titulo: str, subtitulo: str, corpo: str, rodape: str = "") -> str:
-    return f"""
+def _send_email(to_email: str, subject: str, html_body: str,
+                chave: str = None, janela_dedup: float = None) -> bool:
+    return _send_many([(to_email, subject, html_body)], chave=chave, janela_dedup=janela_dedup) > 0
+
+
+_MODELO_BASE = Modelo("""
     <!DOCTYPE html>
     <html lang="pt-BR">
     <head><meta charset="UTF-8"></head>
@@ -48,20 +56,20 @@ def _base_template(titulo: str, subtitulo: str, corpo: str, rodape: str = "") ->
             </tr>
             <tr>
               <td style="padding:30px 40px 10px;">
-                <div style="font-size:20px;font-weight:bold;color:#1B3A6B;">{titulo}</div>
-                <div style="font-size:14px;color:#666;margin-top:6px;">{subtitulo}</div>
+                <div style="font-size:20px;font-weight:bold;color:#1B3A6B;">{{titulo}}</div>
+                <div style="font-size:14px;color:#666;margin-top:6px;">{{subtitulo}}</div>
               </td>
             </tr>
             <tr>
-              <td style="padding:10px 40px 30px;">{corpo}</td>
+              <td style="padding:10px 40px 30px;">{{corpo}}</td>
             </tr>
             <tr>
               <td style="background:#F8F9FA;padding:20px 40px;
                          border-top:1px solid #E9ECEF;text-align:center;">
                 <div style="font-size:12px;color:#999;">
-                  E-mail automático enviado por: <strong>{_remetente()}</strong><br>
+                  E-mail automático enviado por: <strong>{{remetente}}</strong><br>
                   Sistema de Lições Aprendidas — Contrex Engenharia<br>
-                  {rodape}
+                  {{rodape}}
                 </div>
               </td>
             </tr>
@@ -69,7 +77,47 @@ def _base_template(titulo: str, subtitulo: str, corpo: str, rodape: str = "") ->
         </td></tr>
       </table>
     </body></html>
-    """
+    """)
+
+_MODELO_INFO_BOX = Modelo("""
+    <div style="background:#F8F9FA;border-left:4px solid {{cor}};
+                border-radius:6px;padding:12px 16px;margin:8px 0;">
+      <div style="font-size:11px;color:#888;text-transform:uppercase;">{{label}}</div>
+      <div style="font-size:15px;color:#333;margin-top:4px;font-weight:500;">{{valor}}</div>
+    </div>
+    """)
+
+_MODELO_BOTAO = Modelo("""
+    <div style="text-align:center;margin:24px 0;">
+      <span style="background:#E87722;color:white;padding:12px 32px;
+                   border-radius:6px;font-size:15px;font-weight:bold;display:inline-block;">
+        {{texto}}
+      </span>
+    </div>
+    """)
+
+_MODELO_CARD_METRICA = Modelo("""
+    <td style="text-align:center;padding:0 6px;">
+      <div style="background:white;border-radius:8px;padding:16px;
+                  border-top:4px solid {{cor}};box-shadow:0 2px 8px rgba(0,0,0,0.08);">
+        <div style="font-size:28px;font-weight:bold;color:{{cor}};">{{valor}}</div>
+        <div style="font-size:12px;color:#888;margin-top:4px;">{{label}}</div>
+      </div>
+    </td>
+    """)
+
+# marcador do nome do destinatário: o e-mail é renderizado uma vez e só o nome muda por pessoa
+_MARCADOR_NOME = "{{nome_destinatario}}"
+
+
+@lru_cache(maxsize=1)
+def _modelo_base() -> Modelo:
+    """Casca HTML com o remetente já aplicado (lido de st.secrets uma única vez)."""
+    return _MODELO_BASE.parcial(remetente=_remetente())
+
+
+def _base_template(titulo: str, subtitulo: str, corpo: str, rodape: str = "") -> str:
+    return _modelo_base().render(titulo=titulo, subtitulo=subtitulo, corpo=corpo, rodape=rodape)
 
 
 def _remetente() -> str:
@@ -80,36 +128,25 @@ def _remetente() -> str:
 
 
 def _info_box(label: str, valor: str, cor: str = "#1B3A6B") -> str:
-    return f"""
-    <div style="background:#F8F9FA;border-left:4px solid {cor};
-                border-radius:6px;padding:12px 16px;margin:8px 0;">
-      <div style="font-size:11px;color:#888;text-transform:uppercase;">{label}</div>
-      <div style="font-size:15px;color:#333;margin-top:4px;font-weight:500;">{valor}</div>
-    </div>
-    """
+    return _MODELO_INFO_BOX.render(label=label, valor=valor, cor=cor)
 
 
 def _botao(texto: str) -> str:
-    return f"""
-    <div style="text-align:center;margin:24px 0;">
-      <span style="background:#E87722;color:white;padding:12px 32px;
-                   border-radius:6px;font-size:15px;font-weight:bold;display:inline-block;">
-        {texto}
-      </span>
-    </div>
-    """
+    return _MODELO_BOTAO.render(texto=texto)
 
 
 def _card_metrica(label: str, valor: int, cor: str) -> str:
-    return f"""
-    <td style="text-align:center;padding:0 6px;">
-      <div style="background:white;border-radius:8px;padding:16px;
-                  border-top:4px solid {cor};box-shadow:0 2px 8px rgba(0,0,0,0.08);">
-        <div style="font-size:28px;font-weight:bold;color:{cor};">{valor}</div>
-        <div style="font-size:12px;color:#888;margin-top:4px;">{label}</div>
-      </div>
-    </td>
-    """
+    return _MODELO_CARD_METRICA.render(label=label, valor=valor, cor=cor)
+
+
+def _send_para_todos(destinatarios: list, subject: str, html_body: str, chave: str = None,
+                     levantar_erros: bool = False) -> int:
+    """Envia o mesmo e-mail a `[{"email", "nome"}, ...]`, trocando só o `_MARCADOR_NOME`."""
+    modelo = Modelo(html_body)
+    return _send_many(
+        [(u["email"], subject, modelo.render(nome_destinatario=u["nome"])) for u in destinatarios],
+        chave=chave, levantar_erros=levantar_erros,
+    )
 
 
 def _formatar_data(data_str: str) -> str:
@@ -129,10 +166,7 @@ def _prazo_urgente(prazo_str: str) -> bool:
 # ================================================================
 # 1. PMO — setor enviou formulário
 # ================================================================
-def notificar_pmo_envio_formulario(
-    email_pmo: str, nome_pmo: str,
-    setor: str, parada: str, qtd_ocorrencias: int,
-):
+def _html_envio_formulario(nome_pmo: str, setor: str, parada: str, qtd_ocorrencias: int) -> str:
     corpo = f"""
     <p style="color:#333;font-size:15px;">Olá, <strong>{nome_pmo}</strong>!</p>
     <p style="color:#555;">Um novo formulário de lições aprendidas foi enviado e aguarda classificação GUT.</p>
@@ -142,21 +176,33 @@ def notificar_pmo_envio_formulario(
     {_info_box("Data do envio", date.today().strftime("%d/%m/%Y"), "#666")}
     {_botao("🔬 Acessar Classificação GUT")}
     """
-    html = _base_template(
+    return _base_template(
         titulo="📋 Novo Formulário Recebido",
         subtitulo=f"O setor {setor} enviou {qtd_ocorrencias} ocorrência(s).",
         corpo=corpo,
     )
+
+
+def notificar_pmo_envio_formulario(
+    email_pmo: str, nome_pmo: str,
+    setor: str, parada: str, qtd_ocorrencias: int,
+):
+    html = _html_envio_formulario(nome_pmo, setor, parada, qtd_ocorrencias)
     return _send_email(email_pmo, f"[Contrex] Novo Formulário Recebido — {parada}", html)
 
 
+def notificar_pmo_envio_formulario_lote(
+    destinatarios: list, setor: str, parada: str, qtd_ocorrencias: int,
+) -> int:
+    html = _html_envio_formulario(_MARCADOR_NOME, setor, parada, qtd_ocorrencias)
+    return _send_para_todos(destinatarios, f"[Contrex] Novo Formulário Recebido — {parada}", html)
+
+
 # ================================================================
 # 2. Responsável — ação atribuída
 # ================================================================
-def notificar_responsavel_acao(
-    email: str, nome: str, acao: str,
-    prazo: str, projeto: str, ocorrencia: str, nivel_gut: str,
-):
+def _html_responsavel_acao(nome: str, acao: str, prazo: str, projeto: str,
+                           ocorrencia: str, nivel_gut: str) -> str:
     gut_cores = {
         "alto":  ("#FFEAEA", "#DC3545", "🔴 Alto"),
         "medio": ("#FFF8E1", "#856404", "🟡 Médio"),
@@ -192,18 +238,35 @@ def notificar_responsavel_acao(
     </div>
     {_botao("📊 Acessar Painel de Acompanhamento")}
     """
-    html = _base_template(
+    return _base_template(
         titulo="📌 Nova Ação Atribuída a Você",
         subtitulo=f"Projeto: {projeto}",
         corpo=corpo,
     )
+
+
+def notificar_responsavel_acao(
+    email: str, nome: str, acao: str,
+    prazo: str, projeto: str, ocorrencia: str, nivel_gut: str,
+):
+    html = _html_responsavel_acao(nome, acao, prazo, projeto, ocorrencia, nivel_gut)
     return _send_email(email, f"[Contrex] Nova Ação Atribuída — {projeto}", html)
 
 
+def notificar_responsaveis_acao_lote(itens: list) -> int:
+    """Um e-mail por item (`{"email", "nome", "acao", "prazo", "projeto", "ocorrencia", "nivel_gut"}`),
+    enfileirados de uma vez; retorna quantos entraram na fila."""
+    return _send_many([
+        (i["email"], f"[Contrex] Nova Ação Atribuída — {i['projeto']}",
+         _html_responsavel_acao(i["nome"], i["acao"], i["prazo"], i["projeto"], i["ocorrencia"], i["nivel_gut"]))
+        for i in itens
+    ])
+
+
 # ================================================================
 # 3. Responsável — prazo vencendo (≤ 3 dias)
 # ================================================================
-def notificar_prazo_vencendo(email: str, nome: str, acoes_proximas: list):
+def _tabela_prazo_vencendo(acoes_proximas: list) -> str:
     linhas = ""
     for a in acoes_proximas:
         dias = a["dias_restantes"]
@@ -220,9 +283,7 @@ def notificar_prazo_vencendo(email: str, nome: str, acoes_proximas: list):
           </td>
         </tr>
         """
-    corpo = f"""
-    <p style="color:#333;font-size:15px;">Olá, <strong>{nome}</strong>!</p>
-    <p style="color:#555;">Você tem ações com prazo se encerrando nos próximos dias.</p>
+    return f"""
     <table width="100%" cellpadding="0" cellspacing="0"
            style="border-collapse:collapse;border:1px solid #EEE;border-radius:8px;margin:16px 0;">
       <thead>
@@ -234,21 +295,33 @@ def notificar_prazo_vencendo(email: str, nome: str, acoes_proximas: list):
       </thead>
       <tbody>{linhas}</tbody>
     </table>
+    """
+
+
+def _html_prazo_vencendo(nome: str, acoes_proximas: list) -> str:
+    corpo = f"""
+    <p style="color:#333;font-size:15px;">Olá, <strong>{nome}</strong>!</p>
+    <p style="color:#555;">Você tem ações com prazo se encerrando nos próximos dias.</p>
+    {_tabela_prazo_vencendo(acoes_proximas)}
     {_botao("✏️ Atualizar Status das Ações")}
     """
-    html = _base_template(
+    return _base_template(
         titulo="⚠️ Ações com Prazo se Encerrando",
         subtitulo=f"Você tem {len(acoes_proximas)} ação(ões) que vencem em breve.",
         corpo=corpo,
         rodape="Lembrete automático enviado quando prazos estão próximos.",
     )
-    return _send_email(email, "[Contrex] ⚠️ Ações com Prazo se Encerrando", html)
+
+
+def notificar_prazo_vencendo(email: str, nome: str, acoes_proximas: list, chave: str = None):
+    html = _html_prazo_vencendo(nome, acoes_proximas)
+    return _send_email(email, "[Contrex] ⚠️ Ações com Prazo se Encerrando", html, chave=chave)
 
 
 # ================================================================
 # 4. Responsável — ação vencida
 # ================================================================
-def notificar_acao_vencida(email: str, nome: str, acoes_vencidas: list):
+def _tabela_vencidas(acoes_vencidas: list) -> str:
     linhas = ""
     for a in acoes_vencidas:
         linhas += f"""
@@ -261,17 +334,7 @@ def notificar_acao_vencida(email: str, nome: str, acoes_vencidas: list):
           </td>
         </tr>
         """
-    corpo = f"""
-    <p style="color:#333;font-size:15px;">Olá, <strong>{nome}</strong>!</p>
-    <div style="background:#FFEAEA;border:1px solid #DC3545;border-radius:8px;
-                padding:16px;margin:16px 0;text-align:center;">
-      <div style="font-size:18px;font-weight:bold;color:#DC3545;">
-        🔴 {len(acoes_vencidas)} ação(ões) com prazo vencido
-      </div>
-      <div style="color:#B71C1C;font-size:14px;margin-top:6px;">
-        Atualize o status ou entre em contato com o PMO imediatamente.
-      </div>
-    </div>
+    return f"""
     <table width="100%" cellpadding="0" cellspacing="0"
            style="border-collapse:collapse;border:1px solid #EEE;border-radius:8px;margin:16px 0;">
       <thead>
@@ -283,24 +346,50 @@ def notificar_acao_vencida(email: str, nome: str, acoes_vencidas: list):
       </thead>
       <tbody>{linhas}</tbody>
     </table>
+    """
+
+
+def _alerta_vencidas(qtd: int) -> str:
+    return f"""
+    <div style="background:#FFEAEA;border:1px solid #DC3545;border-radius:8px;
+                padding:16px;margin:16px 0;text-align:center;">
+      <div style="font-size:18px;font-weight:bold;color:#DC3545;">
+        🔴 {qtd} ação(ões) com prazo vencido
+      </div>
+      <div style="color:#B71C1C;font-size:14px;margin-top:6px;">
+        Atualize o status ou entre em contato com o PMO imediatamente.
+      </div>
+    </div>
+    """
+
+
+def _html_acao_vencida(nome: str, acoes_vencidas: list) -> str:
+    corpo = f"""
+    <p style="color:#333;font-size:15px;">Olá, <strong>{nome}</strong>!</p>
+    {_alerta_vencidas(len(acoes_vencidas))}
+    {_tabela_vencidas(acoes_vencidas)}
     {_botao("✏️ Atualizar Status Agora")}
     """
-    html = _base_template(
+    return _base_template(
         titulo="🔴 Ações com Prazo Vencido",
         subtitulo="Regularize as pendências o quanto antes.",
         corpo=corpo,
     )
-    return _send_email(email, "[Contrex] 🔴 Ações com Prazo Vencido — Atenção Necessária", html)
+
+
+def notificar_acao_vencida(email: str, nome: str, acoes_vencidas: list, chave: str = None):
+    html = _html_acao_vencida(nome, acoes_vencidas)
+    return _send_email(email, "[Contrex] 🔴 Ações com Prazo Vencido — Atenção Necessária", html, chave=chave)
 
 
 # ================================================================
 # 5. PMO — responsável atualizou status
 # ================================================================
-def notificar_atualizacao_status(
-    email_pmo: str, nome_pmo: str, responsavel_nome: str,
+def _html_atualizacao_status(
+    nome_pmo: str, responsavel_nome: str,
     acao: str, status_anterior: str, novo_status: str,
     comentario: str, projeto: str,
-):
+) -> str:
     STATUS_LABEL = {
         "pendente":     ("🔵", "Pendente"),
         "em_andamento": ("🟠", "Em Andamento"),
@@ -344,14 +433,124 @@ def notificar_atualizacao_status(
     ''' if comentario else ''}
     {_botao("📊 Ver no Painel")}
     """
-    html = _base_template(
+    return _base_template(
         titulo="🔄 Status de Ação Atualizado",
         subtitulo=f"Atualizado por {responsavel_nome} em {date.today().strftime('%d/%m/%Y')}",
         corpo=corpo,
     )
+
+
+def notificar_atualizacao_status(
+    email_pmo: str, nome_pmo: str, responsavel_nome: str,
+    acao: str, status_anterior: str, novo_status: str,
+    comentario: str, projeto: str,
+):
+    html = _html_atualizacao_status(nome_pmo, responsavel_nome, acao,
+                                    status_anterior, novo_status, comentario, projeto)
     return _send_email(email_pmo, f"[Contrex] Status Atualizado — {projeto}", html)
 
 
+def notificar_atualizacao_status_lote(
+    destinatarios: list, responsavel_nome: str,
+    acao: str, status_anterior: str, novo_status: str,
+    comentario: str, projeto: str,
+) -> int:
+    html = _html_atualizacao_status(_MARCADOR_NOME, responsavel_nome, acao,
+                                    status_anterior, novo_status, comentario, projeto)
+    return _send_para_todos(destinatarios, f"[Contrex] Status Atualizado — {projeto}", html)
+
+
+def _html_status_consolidado(nome_pmo: str, alteracoes: list) -> str:
+    STATUS_LABEL = {
+        "pendente":     "🔵 Pendente",
+        "em_andamento": "🟠 Em Andamento",
+        "concluido":    "🟢 Concluído",
+        "cancelado":    "⚫ Cancelado",
+    }
+    linhas = ""
+    for a in alteracoes:
+        comentario = (f'<div style="font-size:12px;color:#856404;margin-top:4px;">💬 {a["comentario"]}</div>'
+                      if a["comentario"] else "")
+        linhas += f"""
+        <tr>
+          <td style="padding:8px;border-bottom:1px solid #EEE;color:#333;font-size:13px;">
+            {a['acao'][:60]}{'...' if len(a['acao'])>60 else ''}{comentario}
+          </td>
+          <td style="padding:8px;border-bottom:1px solid #EEE;color:#666;font-size:13px;">{a['projeto']}</td>
+          <td style="padding:8px;border-bottom:1px solid #EEE;font-size:13px;white-space:nowrap;">
+            {STATUS_LABEL.get(a['status_anterior'], a['status_anterior'])} →
+            {STATUS_LABEL.get(a['novo_status'], a['novo_status'])}
+          </td>
+          <td style="padding:8px;border-bottom:1px solid #EEE;color:#666;font-size:13px;">{", ".join(a['responsaveis'])}</td>
+        </tr>
+        """
+    corpo = f"""
+    <p style="color:#333;font-size:15px;">Olá, <strong>{nome_pmo}</strong>!</p>
+    <p style="color:#555;">
+      Os responsáveis atualizaram o status de <strong>{len(alteracoes)} ação(ões)</strong>.
+    </p>
+    <table width="100%" cellpadding="0" cellspacing="0"
+           style="border-collapse:collapse;border:1px solid #EEE;margin:16px 0;">
+      <thead>
+        <tr style="background:#1B3A6B;">
+          <th style="padding:10px;color:white;text-align:left;font-size:12px;">Ação</th>
+          <th style="padding:10px;color:white;text-align:left;font-size:12px;">Projeto</th>
+          <th style="padding:10px;color:white;text-align:left;font-size:12px;">Status</th>
+          <th style="padding:10px;color:white;text-align:left;font-size:12px;">Por</th>
+        </tr>
+      </thead>
+      <tbody>{linhas}</tbody>
+    </table>
+    {_botao("📊 Ver no Painel")}
+    """
+    return _base_template(
+        titulo="🔄 Status de Ações Atualizados",
+        subtitulo=f"{len(alteracoes)} ação(ões) atualizada(s) até {date.today().strftime('%d/%m/%Y')}",
+        corpo=corpo,
+    )
+
+
+def _enviar_status_consolidado(email_pmo: str, nome_pmo: str, alteracoes: list):
+    """Callback do `AgrupadorStatus`: uma alteração usa o e-mail individual, várias viram tabela."""
+    if len(alteracoes) == 1:
+        a       = alteracoes[0]
+        assunto = f"[Contrex] Status Atualizado — {a['projeto']}"
+        html    = _html_atualizacao_status(nome_pmo, ", ".join(a["responsaveis"]), a["acao"],
+                                           a["status_anterior"], a["novo_status"], a["comentario"], a["projeto"])
+    else:
+        assunto = f"[Contrex] Status Atualizado — {len(alteracoes)} ações"
+        html    = _html_status_consolidado(nome_pmo, alteracoes)
+    # chama a fila diretamente: se o enfileiramento falhar, o agrupador mantém os eventos
+    with medir("fila_email", "emails", "enfileirar", len(html)):
+        get_fila_email().enfileirar_muitos([(email_pmo, assunto, html)])
+
+
+@st.cache_resource
+def get_agrupador_status() -> AgrupadorStatus:
+    cfg = st.secrets.get("fila_email", {})
+    return AgrupadorStatus(
+        caminho = cfg.get("caminho", "fila_email.sqlite3"),
+        janela  = float(cfg.get("janela_status", 300)),
+        enviar  = _enviar_status_consolidado,
+    )
+
+
+def notificar_atualizacao_status_agrupado(
+    destinatarios: list, acao_id: str, responsavel_nome: str,
+    acao: str, status_anterior: str, novo_status: str,
+    comentario: str, projeto: str,
+) -> int:
+    """Registra a mudança no agrupador; cada PMO recebe um e-mail consolidado por janela."""
+    try:
+        return get_agrupador_status().registrar(
+            destinatarios, acao_id, acao, projeto, responsavel_nome,
+            status_anterior, novo_status, comentario,
+        )
+    except Exception as e:
+        st.warning(f"⚠️ Falha ao registrar a notificação de status: {e}")
+        return 0
+
+
 # ================================================================
 # 6. Todos — parada avançou de fase
 # ================================================================
@@ -410,17 +609,17 @@ def notificar_avanco_fase(
         subtitulo=f"{label_ant} → {label_nov}",
         corpo=corpo,
     )
-    sucessos = 0
-    for email in emails:
-        if _send_email(email, f"[Contrex] Parada Avançou de Fase — {parada}", html):
-            sucessos += 1
-    return sucessos
+    assunto = f"[Contrex] Parada Avançou de Fase — {parada}"
+    return _send_many([(email, assunto, html) for email in emails])
 
 
 # ================================================================
 # 7. PMO — resumo semanal
 # ================================================================
-def notificar_resumo_semanal(email_pmo: str, nome_pmo: str, dados: dict):
+def _html_resumo_semanal(nome_pmo: str, dados: dict, semana: date = None) -> str:
+    """`semana` é a segunda-feira de início do snapshot (padrão: a semana anterior à atual)."""
+    hoje   = date.today()
+    semana = semana or hoje - timedelta(days=hoje.weekday() + 7)
     acoes_venc_html = ""
     for a in dados.get("acoes_vencidas", [])[:10]:
         acoes_venc_html += f"""
@@ -452,7 +651,7 @@ def notificar_resumo_semanal(email_pmo: str, nome_pmo: str, dados: dict):
     {f'''
     <div style="margin:20px 0;">
       <div style="font-size:15px;font-weight:bold;color:#DC3545;margin-bottom:10px;">
-        🔴 Ações Vencidas ({len(dados.get("acoes_vencidas",[]))})
+        🔴 Ações Vencidas ({dados.get("vencidas", len(dados.get("acoes_vencidas",[])))})
       </div>
       <table width="100%" cellpadding="0" cellspacing="0"
              style="border-collapse:collapse;border:1px solid #EEE;border-radius:8px;">
@@ -470,10 +669,69 @@ def notificar_resumo_semanal(email_pmo: str, nome_pmo: str, dados: dict):
     {f'<div style="margin:20px 0;"><div style="font-size:15px;font-weight:bold;color:#1B3A6B;margin-bottom:10px;">🏗️ Paradas Ativas</div><ul style="margin:0;padding-left:20px;">{paradas_html}</ul></div>' if dados.get('paradas_ativas') else ''}
     {_botao("📊 Acessar o Painel Completo")}
     """
-    html = _base_template(
+    return _base_template(
         titulo="📊 Resumo Semanal",
-        subtitulo=f"Semana encerrada em {date.today().strftime('%d/%m/%Y')}",
+        subtitulo=f"Semana encerrada em {(semana + timedelta(days=6)).strftime('%d/%m/%Y')}",
         corpo=corpo,
         rodape="Resumo enviado automaticamente toda segunda-feira.",
     )
+
+
+def notificar_resumo_semanal(email_pmo: str, nome_pmo: str, dados: dict, semana: date = None):
+    html = _html_resumo_semanal(nome_pmo, dados, semana)
     return _send_email(email_pmo, "[Contrex] Resumo Semanal — Lições Aprendidas", html)
+
+
+def notificar_resumo_semanal_lote(destinatarios: list, dados: dict, semana: date = None, chave: str = None,
+                                  levantar_erros: bool = False) -> int:
+    """Renderiza o resumo uma única vez e distribui a `[{"email", "nome"}, ...]`; retorna quantos entraram na fila."""
+    html = _html_resumo_semanal(_MARCADOR_NOME, dados, semana)
+    return _send_para_todos(destinatarios, "[Contrex] Resumo Semanal — Lições Aprendidas", html,
+                            chave=chave, levantar_erros=levantar_erros)
+
+
+# ================================================================
+# 8. Responsável — lembrete diário (vencidas + vencendo)
+# ================================================================
+def _html_lembrete_prazos(nome: str, acoes_proximas: list, acoes_vencidas: list) -> str:
+    corpo = f"""
+    <p style="color:#333;font-size:15px;">Olá, <strong>{nome}</strong>!</p>
+    {_alerta_vencidas(len(acoes_vencidas))}
+    {_tabela_vencidas(acoes_vencidas)}
+    <p style="color:#555;margin-top:24px;">Você também tem ações com prazo se encerrando nos próximos dias.</p>
+    {_tabela_prazo_vencendo(acoes_proximas)}
+    {_botao("✏️ Atualizar Status das Ações")}
+    """
+    return _base_template(
+        titulo="⏰ Lembrete de Prazos",
+        subtitulo=f"{len(acoes_vencidas)} ação(ões) vencida(s) e {len(acoes_proximas)} vencendo em breve.",
+        corpo=corpo,
+        rodape="Lembrete automático enviado quando prazos estão próximos.",
+    )
+
+
+def _lembrete_prazos(nome: str, acoes_proximas: list, acoes_vencidas: list) -> tuple:
+    """`(assunto, html)` do lembrete; usa os modelos 3 ou 4 quando só há um dos tipos."""
+    if not acoes_vencidas:
+        return "[Contrex] ⚠️ Ações com Prazo se Encerrando", _html_prazo_vencendo(nome, acoes_proximas)
+    if not acoes_proximas:
+        return "[Contrex] 🔴 Ações com Prazo Vencido — Atenção Necessária", _html_acao_vencida(nome, acoes_vencidas)
+    return ("[Contrex] ⏰ Lembrete de Prazos — Ações Pendentes",
+            _html_lembrete_prazos(nome, acoes_proximas, acoes_vencidas))
+
+
+def notificar_lembrete_prazos(
+    email: str, nome: str, acoes_proximas: list, acoes_vencidas: list, chave: str = None,
+):
+    """Um único e-mail por responsável."""
+    assunto, html = _lembrete_prazos(nome, acoes_proximas, acoes_vencidas)
+    return _send_email(email, assunto, html, chave=chave)
+
+
+def notificar_lembretes_prazos_lote(lembretes: list, chave: str = None, levantar_erros: bool = False) -> int:
+    """Enfileira de uma vez os lembretes `[{"email", "nome", "proximas", "vencidas"}, ...]`;
+    retorna quantos entraram na fila."""
+    return _send_many([
+        (l["email"], *_lembrete_prazos(l["nome"], l["proximas"], l["vencidas"]))
+        for l in lembretes
+    ], chave=chave, levantar_erros=levantar_erros)
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+from datetime import date
+
+STATUS_ORDEM   = ["pendente","em_andamento","concluido","cancelado"]
+STATUS_ABERTOS = ["pendente","em_andamento"]
+GUT_ORDEM      = ["alto","medio","baixo"]
+
+GUT_BADGE    = {"alto":"🔴 Alto","medio":"🟡 Médio","baixo":"🟢 Baixo"}
+STATUS_LABEL = {"pendente":"🔵 Pendente","em_andamento":"🟠 Em Andamento",
+                "concluido":"🟢 Concluído","cancelado":"⚫ Cancelado"}
+
+# coluna do json_normalize -> coluna do Painel
+_COLUNAS = {
+    "id":                     "id",
+    "paradas.nome":           "Projeto",
+    "ocorrencias.area_setor": "Área/Setor",
+    "ocorrencias.ocorrencia": "Ocorrência",
+    "ocorrencias.classificacao": "GUT_nivel",
+    "descricao":              "Ação",
+    "responsavel_nome":       "Responsável",
+    "prazo":                  "Prazo",
+    "status":                 "Status",
+    "comentarios":            "Comentários",
+    "data_conclusao":         "Data Conclusão",
+}
+
+
+def preparar_acoes(acoes: list, hoje: date = None) -> pd.DataFrame:
+    """Converte as ações do PostgREST (com `ocorrencias`/`paradas` embutidos) no DataFrame do Painel.
+
+    Todas as derivações são vetorizadas: `Prazo` é datetime64, `dias_restantes` vem de
+    aritmética de datas e `vencida`/`vence_em_breve` são máscaras booleanas.
+    """
+    hoje = pd.Timestamp(hoje or date.today())
+    df = pd.json_normalize(acoes) if acoes else pd.DataFrame()
+    df = df.reindex(columns=list(_COLUNAS)).rename(columns=_COLUNAS)
+
+    for col in ["Projeto","Área/Setor","Ocorrência","Ação","Responsável","Comentários"]:
+        df[col] = df[col].fillna("")
+    df["Ocorrência"]     = df["Ocorrência"].str.slice(0, 60)
+    df["GUT_nivel"]      = pd.Categorical(df["GUT_nivel"], categories=GUT_ORDEM)
+    df["Status"]         = pd.Categorical(df["Status"], categories=STATUS_ORDEM)
+    df["Prazo"]          = pd.to_datetime(df["Prazo"], errors="coerce")
+    df["Data Conclusão"] = pd.to_datetime(df["Data Conclusão"], errors="coerce")
+
+    dias   = (df["Prazo"] - hoje).dt.days
+    aberta = df["Status"].isin(STATUS_ABERTOS).to_numpy()
+    df["dias_restantes"] = dias.astype("Int64")
+    df["vencida"]        = aberta & (dias < 0).to_numpy()
+    df["vence_em_breve"] = aberta & dias.between(0, 3).to_numpy()
+    return df
+
+
+def preparar_exibicao(df: pd.DataFrame) -> pd.DataFrame:
+    """Acrescenta as colunas formatadas da tabela (GUT, Dias Restantes, Status_label)."""
+    df = df.copy()
+    df["GUT"]          = df["GUT_nivel"].map(GUT_BADGE).astype(object).fillna("—")
+    df["Status_label"] = df["Status"].map(STATUS_LABEL).astype(object).fillna(df["Status"].astype(object))
+    dias  = df["dias_restantes"]
+    alerta = pd.Series(np.where(dias.lt(0).fillna(False), "⚠️ ", ""), index=df.index, dtype=object)
+    df["Dias Restantes"] = (alerta + dias.astype(str) + "d").where(dias.notna(), "—")
+    return df
+
+
+def estilos_linhas(df: pd.DataFrame) -> pd.DataFrame:
+    """Matriz de CSS para `Styler.apply(..., axis=None)`: destaca vencidas e vencendo em breve."""
+    cor = np.where(df["vencida"], "background-color:#FFEAEA",
+          np.where(df["vence_em_breve"], "background-color:#FFF8E1", ""))
+    return pd.DataFrame(np.repeat(cor[:, None], df.shape[1], axis=1), index=df.index, columns=df.columns)
@@ -0,0 +1,113 @@
+import time
+import uuid
+import pandas as pd
+from utils.importacao import FASES, CAMPOS
+
+COLUNAS = ["id"] + CAMPOS
+
+
+def novo_rascunho(linhas: list = None) -> pd.DataFrame:
+    """DataFrame do editor (`st.data_editor`): uma linha por ocorrência, com `id` estável.
+
+    `attrs["token"]` identifica esta base (e entra na chave do editor): uma base nova recria o
+    editor sobre ela.
+    """
+    linhas = linhas or [{"id": uuid.uuid4().hex, "area_setor": "", "fase": FASES[0],
+                         "ocorrencia": "", "impacto": "", "licao_aprendida": ""}]
+    df = pd.DataFrame(linhas).reindex(columns=COLUNAS).reset_index(drop=True)
+    df.attrs["token"] = uuid.uuid4().hex
+    return df
+
+
+def linhas_do_editor(editado: pd.DataFrame) -> tuple:
+    """Linhas do editor como `[{"id", campo: str, ...}]`, em ordem, e se alguma acabou de ser adicionada.
+
+    Linhas adicionadas no editor ainda não têm `id` e recebem um uuid4 aqui. Quem chama deve
+    gravá-las de volta como nova base (`novo_rascunho`): o `id` fica preso à linha, e não à
+    posição dela entre as adicionadas, que muda quando uma anterior é excluída.
+    """
+    linhas = []
+    novas  = False
+    for valores in editado.to_dict("records"):
+        linha = {c: "" if pd.isna(valores.get(c)) else str(valores[c]) for c in CAMPOS}
+        rid   = valores.get("id")
+        if not (isinstance(rid, str) and rid):
+            rid, novas = uuid.uuid4().hex, True
+        linha["id"] = rid
+        linhas.append(linha)
+    return linhas, novas
+
+
+def vazia(linha: dict) -> bool:
+    """Linha sem nada digitado (a fase sempre tem o valor padrão)."""
+    return not any(linha[c].strip() for c in CAMPOS if c != "fase")
+
+
+def do_banco(linhas_salvas: list) -> list:
+    """Linhas de `db_queries.carregar_rascunho` no formato do editor (com `ordem`)."""
+    return [{"id": l["linha_id"], "ordem": l["ordem"], **{c: l.get(c) or "" for c in CAMPOS}}
+            for l in linhas_salvas]
+
+
+class Autosalvamento:
+    """Estado do autosave incremental de um rascunho (guardado em `st.session_state`).
+
+    `salvo` é o que o banco tem, por `id`. `registrar` é chamado a cada rerun com as linhas do
+    editor; `deve_salvar` aplica o debounce — salva depois de `espera` segundos sem edição, ou
+    a cada `maximo` segundos durante uma edição contínua — e `diferenca` devolve só as linhas
+    novas/alteradas e os ids removidos; linhas novas ainda vazias (como a linha inicial de um
+    rascunho novo) não são gravadas. A ordem das linhas existentes é mantida (o editor não
+    reordena), então excluir uma linha não regrava as seguintes.
+    """
+
+    def __init__(self, salvas: list = None, espera: float = 3, maximo: float = 30):
+        self.salvo             = {l["id"]: l for l in (salvas or [])}
+        self.espera            = espera
+        self.maximo            = maximo
+        self._atuais           = list(self.salvo.values())
+        self.ultima_edicao     = 0.0
+        self.ultimo_salvamento = time.time()
+
+    def registrar(self, linhas: list, agora: float = None):
+        if linhas != self._atuais:
+            self._atuais       = linhas
+            self.ultima_edicao = agora or time.time()
+
+    def diferenca(self) -> tuple:
+        proxima   = max((l["ordem"] for l in self.salvo.values()), default=-1) + 1
+        alteradas = []
+        ids       = set()
+        for l in self._atuais:
+            ids.add(l["id"])
+            anterior = self.salvo.get(l["id"])
+            if anterior is None:
+                if vazia(l):
+                    continue
+                alteradas.append({**l, "ordem": proxima})
+                proxima += 1
+            elif any(anterior[c] != l[c] for c in CAMPOS):
+                alteradas.append({**l, "ordem": anterior["ordem"]})
+        removidas = [i for i in self.salvo if i not in ids]
+        return alteradas, removidas
+
+    def pendente(self) -> bool:
+        alteradas, removidas = self.diferenca()
+        return bool(alteradas or removidas)
+
+    def deve_salvar(self, agora: float = None) -> bool:
+        agora = agora or time.time()
+        if self.ultima_edicao <= self.ultimo_salvamento:
+            return False
+        return agora - self.ultima_edicao >= self.espera or agora - self.ultimo_salvamento >= self.maximo
+
+    def salvar(self, gravar) -> int:
+        """Chama `gravar(alteradas, removidas)` se houver diferença; retorna quantas linhas foram enviadas."""
+        alteradas, removidas = self.diferenca()
+        if alteradas or removidas:
+            gravar(alteradas, removidas)
+            for l in alteradas:
+                self.salvo[l["id"]] = l
+            for i in removidas:
+                del self.salvo[i]
+        self.ultimo_salvamento = time.time()
+        return len(alteradas) + len(removidas)
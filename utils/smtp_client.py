@@ -0,0 +1,219 @@
+import smtplib
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from queue import LifoQueue, Empty, Full
+import streamlit as st
+from utils.email_templates import html_para_texto
+from utils.instrumentacao import medir
+
+
+def _erro_de_conexao(e: BaseException) -> bool:
+    """Falhas que indicam conexão morta/instável: a conexão é descartada e o envio repetido."""
+    if isinstance(e, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    # SMTPException herda de OSError; erros de protocolo (ex.: destinatário recusado) não derrubam a conexão
+    return isinstance(e, OSError) and not isinstance(e, smtplib.SMTPException)
+
+
+def montar_mensagem(remetente: str, to_email: str, subject: str, html_body: str) -> str:
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = subject
+    msg["From"]    = remetente
+    msg["To"]      = to_email
+    msg.attach(MIMEText(html_para_texto(html_body), "plain", "utf-8"))
+    msg.attach(MIMEText(html_body, "html", "utf-8"))
+    return msg.as_string()
+
+
+class LimiteTaxa:
+    """Token bucket: no máximo `por_segundo` liberações por segundo (rajadas de até `rajada`), entre threads."""
+
+    def __init__(self, por_segundo: float, rajada: int = 1):
+        self.intervalo = 1.0 / por_segundo
+        self.rajada    = max(1, rajada)
+        self._fichas   = float(self.rajada)
+        self._ultimo   = time.monotonic()
+        self._lock     = threading.Lock()
+
+    def aguardar(self):
+        while True:
+            with self._lock:
+                agora        = time.monotonic()
+                self._fichas = min(self.rajada, self._fichas + (agora - self._ultimo) / self.intervalo)
+                self._ultimo = agora
+                if self._fichas >= 1:
+                    self._fichas -= 1
+                    return
+                espera = (1 - self._fichas) * self.intervalo
+            time.sleep(espera)
+
+
+class SMTPTransport:
+    """Pool de conexões SMTP autenticadas, reaproveitadas entre envios.
+
+    `taxa` (mensagens/segundo, somando todas as conexões) respeita o limite do relay.
+    """
+
+    def __init__(self, host: str, port: int, user: str = None, password: str = None,
+                 starttls: bool = True, tamanho_pool: int = 4, timeout: float = 30,
+                 tentativas: int = 2, taxa: float = None):
+        self.host         = host
+        self.port         = int(port)
+        self.user         = user
+        self.password     = password
+        self.starttls     = starttls
+        self.timeout      = timeout
+        self.tentativas   = max(1, tentativas)
+        self.tamanho_pool = max(1, tamanho_pool)
+        self._livres      = LifoQueue(maxsize=self.tamanho_pool)
+        self._vagas       = threading.BoundedSemaphore(self.tamanho_pool)
+        self._limite      = LimiteTaxa(taxa, rajada=self.tamanho_pool) if taxa else None
+
+    def _conectar(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            server.ehlo()
+            if self.starttls:
+                server.starttls()
+                server.ehlo()
+            if self.user:
+                server.login(self.user, self.password)
+        except Exception:
+            self._descartar(server)
+            raise
+        return server
+
+    @staticmethod
+    def _descartar(server: smtplib.SMTP):
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    @contextmanager
+    def _conexao(self):
+        self._vagas.acquire()
+        server = None
+        try:
+            try:
+                server = self._livres.get_nowait()
+            except Empty:
+                server = self._conectar()
+            yield server
+        except BaseException as e:
+            if server is not None and (_erro_de_conexao(e) or not isinstance(e, Exception)):
+                self._descartar(server)
+                server = None
+            raise
+        finally:
+            if server is not None:
+                try:
+                    self._livres.put_nowait(server)
+                except Full:
+                    self._descartar(server)
+            self._vagas.release()
+
+    def send(self, remetente: str, to_email: str, mensagem: str):
+        """Envia uma mensagem já serializada; reconecta se a conexão do pool caiu."""
+        for tentativa in range(self.tentativas):
+            try:
+                with self._conexao() as server:
+                    if self._limite:
+                        self._limite.aguardar()
+                    with medir("smtp", self.host, "send", len(mensagem)):
+                        server.sendmail(remetente, to_email, mensagem)
+                return
+            except Exception as e:
+                if not _erro_de_conexao(e) or tentativa == self.tentativas - 1:
+                    raise
+
+    def send_many(self, remetente: str, envios: list) -> list:
+        """Envia `[(to_email, mensagem), ...]` reaproveitando uma única conexão.
+
+        Retorna uma lista com `None` (sucesso) ou a exceção de cada envio, na mesma ordem.
+        """
+        resultados = [None] * len(envios)
+        pendentes  = deque(range(len(envios)))
+        for tentativa in range(self.tentativas):
+            try:
+                with self._conexao() as server:
+                    while pendentes:
+                        i = pendentes[0]
+                        to_email, mensagem = envios[i]
+                        try:
+                            if self._limite:
+                                self._limite.aguardar()
+                            with medir("smtp", self.host, "send", len(mensagem)):
+                                server.sendmail(remetente, to_email, mensagem)
+                        except Exception as e:
+                            if _erro_de_conexao(e):
+                                raise
+                            resultados[i] = e
+                        pendentes.popleft()
+                return resultados
+            except Exception as e:
+                if not _erro_de_conexao(e):
+                    raise
+                if tentativa == self.tentativas - 1:
+                    for i in pendentes:
+                        resultados[i] = e
+        return resultados
+
+    def send_many_paralelo(self, remetente: str, envios: list, paralelo: int = None) -> list:
+        """Como `send_many`, mas divide os envios entre até `paralelo` conexões do pool em paralelo.
+
+        O padrão é o tamanho do pool; o `taxa` do transporte continua valendo para o total.
+        """
+        paralelo = min(paralelo or self.tamanho_pool, len(envios))
+        if paralelo <= 1:
+            return self.send_many(remetente, envios)
+        fatias = [range(i, len(envios), paralelo) for i in range(paralelo)]
+        resultados = [None] * len(envios)
+        with ThreadPoolExecutor(max_workers=paralelo, thread_name_prefix="smtp-envio") as executor:
+            futuros = [executor.submit(self.send_many, remetente, [envios[i] for i in fatia]) for fatia in fatias]
+            for fatia, futuro in zip(fatias, futuros):
+                try:
+                    parcial = futuro.result()
+                except Exception as e:
+                    parcial = [e] * len(fatia)
+                for i, r in zip(fatia, parcial):
+                    resultados[i] = r
+        return resultados
+
+    def fechar(self):
+        while True:
+            try:
+                self._descartar(self._livres.get_nowait())
+            except Empty:
+                return
+
+
+@st.cache_resource
+def get_smtp() -> SMTPTransport:
+    cfg = st.secrets["smtp"]
+    return SMTPTransport(
+        host         = cfg["host"],
+        port         = int(cfg["port"]),
+        user         = cfg.get("user"),
+        password     = cfg.get("password"),
+        starttls     = bool(cfg.get("starttls", True)),
+        tamanho_pool = int(cfg.get("pool", 4)),
+        taxa         = float(cfg["taxa"]) if cfg.get("taxa") else None,
+    )
+
+
+def enviar_lote(envios: list) -> list:
+    """Envia `[(to_email, subject, html_body), ...]`; retorna `None` ou a exceção de cada envio."""
+    cfg       = st.secrets["smtp"]
+    remetente = cfg["from"]
+    envelope  = cfg.get("user") or remetente
+    mensagens = [(to, montar_mensagem(remetente, to, subject, html)) for to, subject, html in envios]
+    return get_smtp().send_many_paralelo(envelope, mensagens)
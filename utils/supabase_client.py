@@ -1,12 +1,46 @@
-from supabase import create_client, Client
+import httpx
+from supabase import create_client, acreate_client, Client, AsyncClient, ClientOptions, AsyncClientOptions
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from utils.instrumentacao import GANCHOS_HTTPX, GANCHOS_HTTPX_ASYNC
+
+_CHAVE_CLIENTE = "_supabase_cliente"
 
 
 @st.cache_resource
-def get_supabase() -> Client:
+def _http() -> httpx.Client:
+    """Pool de conexões de todos os clientes, com os ganchos de `utils.instrumentacao`
+    (inertes se ela estiver desligada). Os cabeçalhos de autenticação são de cada cliente."""
+    return httpx.Client(timeout=120, event_hooks=GANCHOS_HTTPX)
+
+
+def _opcoes() -> ClientOptions:
+    return ClientOptions(httpx_client=_http())
+
+
+@st.cache_resource
+def _get_supabase_anonimo() -> Client:
     url = st.secrets["SUPABASE_URL"]
     key = st.secrets["SUPABASE_KEY"]
-    return create_client(url, key)
+    return create_client(url, key, options=_opcoes())
+
+
+def get_supabase() -> Client:
+    """Cliente da sessão do usuário.
+
+    O login (`auth.sign_in_*`) autentica o cliente em que é feito; com um cliente por sessão,
+    `auth.uid()` nas políticas RLS é sempre o usuário desta sessão, e não o último a logar.
+    Fora de uma sessão Streamlit (agendador, threads de fundo) devolve um cliente anônimo
+    compartilhado.
+    """
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return _get_supabase_anonimo()
+    cliente = st.session_state.get(_CHAVE_CLIENTE)
+    if cliente is None:
+        url     = st.secrets["SUPABASE_URL"]
+        key     = st.secrets["SUPABASE_KEY"]
+        cliente = st.session_state[_CHAVE_CLIENTE] = create_client(url, key, options=_opcoes())
+    return cliente
 
 
 @st.cache_resource
@@ -14,4 +48,20 @@ def get_supabase_admin() -> Client:
     """Cliente com Service Role Key — usar APENAS em operações administrativas."""
     url = st.secrets["SUPABASE_URL"]
     key = st.secrets["SUPABASE_SERVICE_KEY"]
-    return create_client(url, key)
+    return create_client(url, key, options=_opcoes())
+
+
+def criar_http_async() -> httpx.AsyncClient:
+    """Pool de conexões para clientes assíncronos, com os ganchos assíncronos de `utils.instrumentacao`."""
+    return httpx.AsyncClient(timeout=120, event_hooks=GANCHOS_HTTPX_ASYNC)
+
+
+async def criar_supabase_async(http: httpx.AsyncClient = None) -> AsyncClient:
+    """Cliente assíncrono (anon key) para `utils.db_async`; deve ser criado no laço em que será usado.
+
+    `http` pode ser compartilhado entre clientes — os cabeçalhos de autenticação são de cada um.
+    """
+    url    = st.secrets["SUPABASE_URL"]
+    key    = st.secrets["SUPABASE_KEY"]
+    opcoes = AsyncClientOptions(httpx_client=http or criar_http_async())
+    return await acreate_client(url, key, options=opcoes)